@@ -1,14 +1,14 @@
-import copy
 import csv
 import math
 import struct
-import matplotlib.pyplot as plt
+import numpy as np
 
-import os, platform, random
+import os, platform, random, sys
 from kivy.logger import Logger
 from kivy.config import Config
 
-from pysimbotlib.core import Simbot, PySimbotApp, Robot
+from pysimbotlib.core import Simbot, PySimbotApp, Robot, NoPoseChange, OutputWriter
+from pysimbotlib.optim import IslandRunner, GenomePool, GACheckpoint, CheckpointWriter, SurrogateFilter
 
 # Hyperparameter Configuration
 NUM_GENERATIONS = 100
@@ -21,14 +21,26 @@ SELECTION_PRESSURE_LOW = 20  # When eaten == 0
 SELECTION_PRESSURE_HIGH = 5  # When eaten > 0
 SIMULATION_INTERVAL = 1 / 50.0
 MAX_TICK = 1000
+TERMINATION_PATIENCE = 20  # End a generation once no robot has moved for this many ticks
 GRAPHICS_WIDTH = 800
 GRAPHICS_HEIGHT = 800
+NUM_ISLANDS = os.cpu_count()  # Used by `--islands`: one headless population per core
+MIGRATION_INTERVAL = 10
+CHECKPOINT_PATH = "ga_checkpoint.npz"  # Resume from it with `--resume`
+CHECKPOINT_INTERVAL = 5  # Generations between checkpoints
+NUM_MIGRANTS = 2
+RACING_HORIZONS = (100, 300, MAX_TICK)  # Islands cut hopeless genomes after 100 and 300 ticks
+SURROGATE_OVERSAMPLE = 3  # With `--surrogate`: breed 3x the children, simulate the best predicted third
 
 if platform.system() == "Linux" or platform.system() == "Darwin":
     os.environ["KIVY_VIDEO"] = "ffpyplayer"
 Config.set('kivy', 'log_level', 'info')
 
-next_gen_robots = []
+rng = np.random.default_rng()
+population = None  # GenomePool of the generation being simulated
+checkpoint_writer = None
+output_writer = None  # OutputWriter saving rules, fitness data and plots off the simulation thread
+surrogate = None  # SurrogateFilter learning genome -> fitness, see `--surrogate`
 best_fitness_values = []
 avg_fitness_values = []
 
@@ -69,47 +81,51 @@ class Util:
         return gene
 
 
+def compute_fitness(simbot: Simbot, robot):
+    food_pos = simbot.objectives[0].pos
+    robot_pos = robot.pos
+    distance = Util.distance(food_pos, robot_pos)
+    fitness = 1000 - int(distance)
+    fitness -= robot.collision_count
+    # the configured length, not simbot.iteration, which early termination shortens
+    if robot.eat_count <= 0:
+        fitness -= 100
+        fitness -= simbot.max_tick
+    else:
+        fitness += 500
+        fitness += simbot.max_tick
+    return fitness
+
+
 def before_simulation(simbot: Simbot):
-    for robot in simbot.robots:
-        if simbot.simulation_count == 0:
-            Logger.info("GA: initial population")
-            for i, RULE in enumerate(robot.RULES):
-                for k in range(len(RULE)):
-                    robot.RULES[i][k] = random.randrange(256)
-        else:
-            Logger.info("GA: copy the rules from previous generation")
-            for simbot_robot, robot_from_last_gen in zip(
-                simbot.robots, next_gen_robots
-            ):
-                simbot_robot.RULES = robot_from_last_gen.RULES
+    global population
+    if simbot.simulation_count == 0:
+        Logger.info("GA: initial population")
+        population = GenomePool.random(len(simbot.robots), rng)
+    else:
+        Logger.info("GA: copy the rules from previous generation")
+    for i, robot in enumerate(simbot.robots):
+        robot.genome_index = i
+        robot.RULES = population.rules(i)
 
 
 def after_simulation(simbot: Simbot):
+    global population
     Logger.info("GA: Start GA Process ...")
     eaten = 0
 
     # Evaluation – compute fitness values here
+    fitness = np.zeros(len(population))
     for robot in simbot.robots:
-        food_pos = simbot.objectives[0].pos
-        robot_pos = robot.pos
-        distance = Util.distance(food_pos, robot_pos)
-        robot.fitness = 1000 - int(distance)
-        robot.fitness -= robot.collision_count
-        if robot.eat_count <= 0:
-            robot.fitness -= 100
-            robot.fitness -= simbot.iteration
-        else:
+        robot.fitness = compute_fitness(simbot, robot)
+        fitness[robot.genome_index] = robot.fitness
+        if robot.eat_count > 0:
             eaten += 1
-            robot.fitness += 500
-            robot.fitness += simbot.iteration
-
-    # Descending sort and rank: the best 10 will be on the list at index 0 to 9
-    simbot.robots.sort(key=lambda robot: robot.fitness, reverse=True)
 
     # Calculate fitness statistics
-    fitness_values = [robot.fitness for robot in simbot.robots]
-    best_fitness = max(fitness_values)
-    avg_fitness = sum(fitness_values) / len(fitness_values)
+    best_index = int(np.argmax(fitness))
+    best_fitness = fitness[best_index]
+    avg_fitness = fitness.mean()
     
     # Store fitness values for plotting
     best_fitness_values.append(best_fitness)
@@ -118,52 +134,30 @@ def after_simulation(simbot: Simbot):
     print(f"Generation {simbot.simulation_count}: Best Fitness = {best_fitness:.2f}, Average Fitness = {avg_fitness:.2f}")
     Logger.info(f"GA: Generation {simbot.simulation_count} - Best: {best_fitness:.2f}, Avg: {avg_fitness:.2f}")
 
-    # Empty the list
-    next_gen_robots.clear()
-
-    # Keep elite individuals
-    for i in range(ELITE_SIZE):
-        next_gen_robots.append(simbot.robots[i])
-
-    num_robots = len(simbot.robots)
-
-    def select():
-        if eaten == 0:
-            index = random.randrange(num_robots) % SELECTION_PRESSURE_LOW
-        else:
-            index = random.randrange(num_robots) % SELECTION_PRESSURE_HIGH
-        return simbot.robots[index]
-
-    for _ in range(num_robots - ELITE_SIZE):
-        select1 = select()
-        select2 = select()
-
-        while select1 == select2:
-            select2 = select()
-
-        child = StupidRobot()
-
-        if eaten < 10:
-            # Use byte-level crossover for rule arrays
-            child_rules1 = copy.deepcopy(select1.RULES)
-            child_rules2 = copy.deepcopy(select2.RULES)
-            
-            # Apply byte-level crossover to each rule
-            for rule_idx in range(len(child_rules1)):
-                child_rules1[rule_idx], child_rules2[rule_idx] = Util.byte_level_crossover(
-                    child_rules1[rule_idx], child_rules2[rule_idx]
-                )
-            
-            child.RULES = child_rules1
-            child.RULES = Util.mutation(child.RULES, MUTATION_RATE_HIGH)
-            next_gen_robots.append(child)
-        else:
-            child.RULES = copy.deepcopy(select1.RULES)
-            child.RULES = Util.mutation(child.RULES, MUTATION_RATE_LOW)
-            next_gen_robots.append(child)
-
     # Write the best rule to file
-    write_rule(simbot.robots[0], "best_gen_0.csv".format(simbot.simulation_count))
+    write_rules(population.rules(best_index), "best_gen_0.csv")
+
+    if surrogate is not None:
+        surrogate.record(population.genes, fitness)
+
+    # Keep the elites and breed the rest of the generation in one batch:
+    # byte-level crossover while few robots reach the food, mutation only afterwards
+    population = population.next_generation(
+        fitness,
+        rng,
+        elite_size=ELITE_SIZE,
+        selection_pressure=SELECTION_PRESSURE_LOW if eaten == 0 else SELECTION_PRESSURE_HIGH,
+        crossover_rate=CROSSOVER_RATE,
+        mutation_rate=MUTATION_RATE_HIGH if eaten < 10 else MUTATION_RATE_LOW,
+        crossover=eaten < 10,
+        surrogate=surrogate,
+    )
+
+    # The checkpoint holds the population about to be simulated, so a resumed run
+    # continues with exactly the next generation
+    if simbot.simulation_count % CHECKPOINT_INTERVAL == 0:
+        checkpoint_writer.submit(GACheckpoint.capture(
+            simbot.simulation_count, population.genes, best_fitness_values, avg_fitness_values, rng))
 
 
 class StupidRobot(Robot):
@@ -183,6 +177,10 @@ class StupidRobot(Robot):
 
     def update(self):
         """Update method which will be called each frame"""
+        if self.just_eat:
+            # Food never moves in this assignment, so a robot sitting on it is done
+            self.freeze()
+            return
         self.ir_values = self.distance()
         (
             self.S0,
@@ -409,10 +407,78 @@ class StupidRobot(Robot):
             return -self.target / 180.0
 
 
-def write_rule(robot, filename):
+def random_rules():
+    return [[random.randrange(256) for _ in range(StupidRobot.RULE_LENGTH)] for _ in range(StupidRobot.NUM_RULES)]
+
+
+def crossover_rules(rules1, rules2):
+    """Byte-level crossover applied rule by rule, as in after_simulation"""
+    for rule_idx in range(len(rules1)):
+        rules1[rule_idx], rules2[rule_idx] = Util.byte_level_crossover(rules1[rule_idx], rules2[rule_idx])
+    return rules1, rules2
+
+
+def mutate_rules(rules):
+    return Util.mutation(rules, MUTATION_RATE_HIGH)
+
+
+def run_islands():
+    """Headless island-model run: one population per core with periodic migration"""
+    runner = IslandRunner(
+        robot_cls=StupidRobot,
+        init_fn=random_rules,
+        fitness_fn=compute_fitness,
+        crossover_fn=crossover_rules,
+        mutation_fn=mutate_rules,
+        num_islands=NUM_ISLANDS,
+        population_size=POPULATION_SIZE,
+        generations=NUM_GENERATIONS,
+        elite_size=ELITE_SIZE,
+        selection_pressure=SELECTION_PRESSURE_HIGH,
+        migration_interval=MIGRATION_INTERVAL,
+        num_migrants=NUM_MIGRANTS,
+        max_tick=MAX_TICK,
+        food_move_after_eat=False,
+        termination=[NoPoseChange(TERMINATION_PATIENCE)],
+        reuse_widgets=True,
+        racing_horizons=RACING_HORIZONS,
+    )
+    results = runner.run()
+    best = max(results, key=lambda result: result.best_fitness)
+    Logger.info(f"GA: Best island {best.island} - Fitness: {best.best_fitness:.2f}")
+    Logger.info(f"GA: Racing saved {sum(result.ticks_saved for result in results)} robot-ticks")
+
+    # Keep the plot/CSV output of the single-population run (best island's curves)
+    best_fitness_values[:] = best.best_fitness_values
+    avg_fitness_values[:] = best.avg_fitness_values
+    write_rules(best.best_genome, "best_gen_0.csv")
+
+
+def write_rules(rules, filename):
+    if output_writer is not None:
+        output_writer.write_csv(filename, rules, lineterminator="\n")
+        return
     with open(filename, "w") as f:
         writer = csv.writer(f, lineterminator="\n")
-        writer.writerows(robot.RULES)
+        writer.writerows(rules)
+
+
+def write_rule(robot, filename):
+    write_rules(robot.RULES, filename)
+
+
+def draw_fitness(figure, best_values, avg_values):
+    ax = figure.subplots()
+    generations = range(len(best_values))
+    
+    ax.plot(generations, best_values, label='Best Fitness', linewidth=2, color='blue')
+    ax.plot(generations, avg_values, label='Average Fitness', linewidth=2, color='red')
+    
+    ax.set_xlabel('Generation')
+    ax.set_ylabel('Fitness')
+    ax.set_title('Genetic Algorithm Fitness Over Generations')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
 
 
 def plot_fitness_graph():
@@ -420,40 +486,50 @@ def plot_fitness_graph():
     if len(best_fitness_values) == 0:
         Logger.warning("No fitness data to plot")
         return
-    
-    plt.figure(figsize=(10, 6))
-    generations = range(len(best_fitness_values))
-    
-    plt.plot(generations, best_fitness_values, label='Best Fitness', linewidth=2, color='blue')
-    plt.plot(generations, avg_fitness_values, label='Average Fitness', linewidth=2, color='red')
-    
-    plt.xlabel('Generation')
-    plt.ylabel('Fitness')
-    plt.title('Genetic Algorithm Fitness Over Generations')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    
-    # Save the plot
-    plt.savefig('fitness_over_generations.png', dpi=300, bbox_inches='tight')
-    Logger.info("Fitness plot saved as 'fitness_over_generations.png'")
+
+    # Rendering and writing happen on the output writer's thread
+    writer = output_writer or OutputWriter()
+    writer.plot('fitness_over_generations.png', draw_fitness, list(best_fitness_values), list(avg_fitness_values), dpi=300)
     
     # Also save data to CSV for further analysis
-    with open('fitness_data.csv', 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Generation', 'Best_Fitness', 'Average_Fitness'])
-        for gen, best, avg in zip(generations, best_fitness_values, avg_fitness_values):
-            writer.writerow([gen, best, avg])
-    Logger.info("Fitness data saved as 'fitness_data.csv'")
-    
-    plt.close()
+    rows = [['Generation', 'Best_Fitness', 'Average_Fitness']]
+    rows += [[gen, best, avg] for gen, (best, avg) in enumerate(zip(best_fitness_values, avg_fitness_values))]
+    writer.write_csv('fitness_data.csv', rows)
+    if writer is not output_writer:
+        writer.close()
+    Logger.info("Fitness plot and data queued as 'fitness_over_generations.png' and 'fitness_data.csv'")
+
+
+def resume_from_checkpoint(simbot: Simbot):
+    """Restore population, fitness history and RNG states from CHECKPOINT_PATH"""
+    global population
+    checkpoint = GACheckpoint.load(CHECKPOINT_PATH)
+    population = GenomePool(checkpoint.population)
+    best_fitness_values[:] = checkpoint.best_fitness_values
+    avg_fitness_values[:] = checkpoint.avg_fitness_values
+    checkpoint.restore_random_state(rng)
+    # before_simulation only creates a random population when the count is 0
+    simbot.simulation_count = checkpoint.generation
+    Logger.info(f"GA: Resumed from generation {checkpoint.generation}")
 
 
 def cleanup_and_plot():
     """Cleanup function to generate plots when simulation ends"""
     Logger.info("Generating fitness plots...")
     plot_fitness_graph()
+    # Waits for every queued rule dump and plot
+    if output_writer is not None:
+        output_writer.close()
 
 if __name__ == '__main__':
+    output_writer = OutputWriter()
+    if '--islands' in sys.argv:
+        try:
+            run_islands()
+        finally:
+            cleanup_and_plot()
+        sys.exit(0)
+
     Config.set("graphics", "width", str(GRAPHICS_WIDTH))
     Config.set("graphics", "height", str(GRAPHICS_HEIGHT))
     app = PySimbotApp(
@@ -466,11 +542,20 @@ if __name__ == '__main__':
         simulation_forever=True,
         food_move_after_eat=False,
         enable_wasd_control=False,
+        termination=[NoPoseChange(TERMINATION_PATIENCE)],
+        reuse_widgets=True,
+        writer=output_writer,
     ) 
+    checkpoint_writer = CheckpointWriter(CHECKPOINT_PATH)
+    if '--surrogate' in sys.argv:
+        surrogate = SurrogateFilter(oversample=SURROGATE_OVERSAMPLE)
+    if '--resume' in sys.argv and os.path.exists(CHECKPOINT_PATH):
+        resume_from_checkpoint(app.simbot)
     try:
         app.run()
     except KeyboardInterrupt:
         Logger.info("Simulation interrupted by user")
     finally:
+        checkpoint_writer.close()
         cleanup_and_plot()
         
\ No newline at end of file
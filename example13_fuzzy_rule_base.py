@@ -0,0 +1,32 @@
+#!/usr/bin/python3
+
+import os, platform
+if platform.system() == "Linux" or platform.system() == "Darwin":
+    os.environ["KIVY_VIDEO"] = "ffpyplayer"
+
+from pysimbotlib.core import PySimbotApp
+from pysimbotlib.control import FuzzyRuleBase, FuzzyController, FuzzyRobot, ramp
+
+# Variables reduce the IR columns (0 = front, then clockwise every 45 degrees) or the smell angle (column 8)
+rule_base = (FuzzyRuleBase()
+    .variable('front', [0])
+    .variable('right', [1, 2])
+    .variable('left', [6, 7])
+    .variable('smell', [8])
+    .term('front', 'far', ramp(15, 30)).complement('front', 'near', 'far')
+    .term('right', 'far', ramp(8, 30)).complement('right', 'near', 'far')
+    .term('left', 'far', ramp(8, 30)).complement('left', 'near', 'far')
+    .term('smell', 'left', ramp(0, -90))
+    .term('smell', 'right', ramp(0, 90))
+    .rule(['front.far'], move=5)
+    .rule(['right.near'], turn=-45)
+    .rule(['left.near'], turn=45)
+    .rule(['smell.left'], turn=-30)
+    .rule(['smell.right'], turn=30)
+    .rule(['front.near', 'right.near', 'left.far'], turn=-60)
+    .rule(['front.near', 'left.near', 'right.far'], turn=60))
+
+if __name__ == '__main__':
+    # one batched inference per tick drives all 100 robots
+    app = PySimbotApp(robot_cls=FuzzyRobot, num_robots=100, customfn_before_tick=FuzzyController(rule_base))
+    app.run()
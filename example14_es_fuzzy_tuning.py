@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+
+import os, sys, platform
+if platform.system() == "Linux" or platform.system() == "Darwin":
+    os.environ["KIVY_VIDEO"] = "ffpyplayer"
+
+import numpy as np
+
+from pysimbotlib.control import FuzzyRuleBase, FuzzyController, FuzzyRobot, ramp
+from pysimbotlib.optim import CMAES, BatchEvaluator, optimize
+
+PARAMS_FILE = 'es_fuzzy_params.npy'
+
+# The rule base of example13; CMA-ES tunes its thresholds and rule outputs
+rule_base = (FuzzyRuleBase()
+    .variable('front', [0])
+    .variable('right', [1, 2])
+    .variable('left', [6, 7])
+    .variable('smell', [8])
+    .term('front', 'far', ramp(15, 30)).complement('front', 'near', 'far')
+    .term('right', 'far', ramp(8, 30)).complement('right', 'near', 'far')
+    .term('left', 'far', ramp(8, 30)).complement('left', 'near', 'far')
+    .term('smell', 'left', ramp(0, -90))
+    .term('smell', 'right', ramp(0, 90))
+    .rule(['front.far'], move=5)
+    .rule(['right.near'], turn=-45)
+    .rule(['left.near'], turn=45)
+    .rule(['smell.left'], turn=-30)
+    .rule(['smell.right'], turn=30)
+    .rule(['front.near', 'right.near', 'left.far'], turn=-60)
+    .rule(['front.near', 'left.near', 'right.far'], turn=60))
+
+def train(generations = 30):
+    # every candidate is one robot of the same headless simulation; the default
+    # apply_fn sets robot.params, which the FuzzyController evaluates per robot
+    strategy = CMAES(rule_base.params(), sigma=5.0, population_size=32, rng=np.random.default_rng(0))
+    evaluate = BatchEvaluator(FuzzyRobot,
+                            seeds=range(2),
+                            max_tick=500,
+                            customfn_before_tick=FuzzyController(rule_base))
+    result = optimize(strategy, evaluate, generations=generations)
+    np.save(PARAMS_FILE, result.best_params)
+
+if __name__ == '__main__':
+    if '--train' in sys.argv:
+        train()
+        sys.exit(0)
+
+    # show the tuned rule base when `--train` has been run, the hand-written one otherwise
+    if os.path.exists(PARAMS_FILE):
+        rule_base.set_params(np.load(PARAMS_FILE))
+    from pysimbotlib.core import PySimbotApp
+    app = PySimbotApp(robot_cls=FuzzyRobot, num_robots=100, customfn_before_tick=FuzzyController(rule_base))
+    app.run()
@@ -0,0 +1,250 @@
+#!/usr/bin/python3
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ..core.Sensor import SensorLayout, DEFAULT_SENSORS
+from .Neural import NeuralRobot, num_inputs
+
+# Column of the smell angle in the (ir0..ir7, angle) input layout shared with Neural;
+# with another SensorLayout it is FuzzyRuleBase.smell
+SMELL = 8
+
+REDUCERS = {
+    'min': np.min,
+    'max': np.max,
+    'mean': np.mean,
+}
+
+def ramp(low: float, high: float) -> List[Tuple[float, float]]:
+    """0 up to ``low``, rising linearly to 1 at ``high`` (falling if ``low > high``)."""
+    if low > high:
+        return [(high, 1.0), (low, 0.0)]
+    return [(low, 0.0), (high, 1.0)]
+
+def triangle(left: float, peak: float, right: float) -> List[Tuple[float, float]]:
+    return [(left, 0.0), (peak, 1.0), (right, 0.0)]
+
+def _interp_rows(x: np.ndarray, xp: np.ndarray, fp: np.ndarray) -> np.ndarray:
+    # np.interp with its own sorted breakpoints per row: x (N,), xp (N, K), fp (K,)
+    if xp.shape[1] == 1:
+        return np.full(len(x), fp[0])
+    rows = np.arange(len(x))
+    left = np.clip((xp <= x[:, None]).sum(axis=1) - 1, 0, xp.shape[1] - 2)
+    x0, x1 = xp[rows, left], xp[rows, left + 1]
+    width = x1 - x0
+    t = np.divide(x - x0, width, out=(x >= x1).astype(np.float64), where=width > 0)
+    t = np.clip(t, 0.0, 1.0)
+    return fp[left] + t * (fp[left + 1] - fp[left])
+
+class FuzzyRuleBase:
+    """Declarative Sugeno-style rule base over the IR and smell inputs.
+
+    Variables reduce one or more input columns (e.g. ``min`` of ir6 and ir7),
+    terms are piecewise-linear memberships of a variable, and a rule is the
+    product of its terms' memberships driving a constant (turn, move). After
+    ``compile()`` the rule base evaluates a (9,) input of one robot or an
+    (N, 9) batch of a whole population with a handful of numpy operations.
+    The columns are the distances of ``sensors`` then the smell angle, so a
+    rule base for a robot with another layout is built with its ``SENSORS``
+    and finds the smell column at ``smell``.
+
+    ``params`` flattens the rule base into one vector for evolution
+    strategies: the x of every term point (the thresholds) in declaration
+    order, then the (turn, move) of every rule (the weights).
+    """
+
+    def __init__(self, defuzzify = 'sum', sensors: SensorLayout = DEFAULT_SENSORS):
+        if defuzzify not in ('sum', 'mean'):
+            raise ValueError(F"Invalid defuzzify: {defuzzify}. The valid values are 'sum' and 'mean'")
+        self.defuzzify = defuzzify
+        self.num_inputs = len(sensors) + 1
+        self.smell = len(sensors)
+        self.variables: Dict[str, Tuple[Tuple[int, ...], str, bool]] = {}
+        self.terms: Dict[str, Tuple[str, object]] = {}
+        self.rules: List[Tuple[Tuple[str, ...], float, float]] = []
+        self._compiled = None
+
+    def variable(self, name: str, columns: Sequence[int], reduce = 'min', absolute = False) -> 'FuzzyRuleBase':
+        if reduce not in REDUCERS:
+            raise ValueError(F"Invalid reduce: {reduce}. The valid values are {sorted(REDUCERS)}")
+        for column in columns:
+            if column < 0 or column >= self.num_inputs:
+                raise ValueError(F"Invalid input column: {column}. The valid values are between 0 and {self.num_inputs - 1}")
+        self.variables[name] = (tuple(columns), reduce, absolute)
+        self._compiled = None
+        return self
+
+    def term(self, variable: str, name: str, points: Sequence[Tuple[float, float]]) -> 'FuzzyRuleBase':
+        """Membership through the (x, y) ``points``, constant beyond the first and last one."""
+        if variable not in self.variables:
+            raise ValueError(F"Unknown variable: {variable}")
+        points = sorted(points)
+        self.terms[variable + '.' + name] = (variable, (np.array([p[0] for p in points], dtype=np.float64), np.array([p[1] for p in points], dtype=np.float64)))
+        self._compiled = None
+        return self
+
+    def complement(self, variable: str, name: str, of: str) -> 'FuzzyRuleBase':
+        """``1 - membership`` of the term ``of`` of the same variable."""
+        key = variable + '.' + of
+        if key not in self.terms:
+            raise ValueError(F"Unknown term: {key}")
+        self.terms[variable + '.' + name] = (variable, key)
+        self._compiled = None
+        return self
+
+    def rule(self, terms: Sequence[str], turn: float = 0.0, move: float = 0.0) -> 'FuzzyRuleBase':
+        """Fire with the product of ``terms`` (e.g. ``['front.near', 'left.far']``)."""
+        for key in terms:
+            if key not in self.terms:
+                raise ValueError(F"Unknown term: {key}")
+        self.rules.append((tuple(terms), turn, move))
+        self._compiled = None
+        return self
+
+    def compile(self) -> 'FuzzyRuleBase':
+        if not self.rules:
+            raise ValueError("The rule base has no rules")
+        variable_names = list(self.variables)
+        term_names = list(self.terms)
+        term_index = {key: i for i, key in enumerate(term_names)}
+        # one column per term, plus a trailing column of ones used to pad short rules
+        width = max(len(terms) for terms, _, _ in self.rules)
+        rule_terms = np.full((len(self.rules), width), len(term_names), dtype=np.int64)
+        for r, (terms, _, _) in enumerate(self.rules):
+            rule_terms[r, :len(terms)] = [term_index[key] for key in terms]
+        outputs = np.array([(turn, move) for _, turn, move in self.rules], dtype=np.float64)
+
+        memberships = []
+        for key in term_names:
+            variable, shape = self.terms[key]
+            if isinstance(shape, str):
+                memberships.append((variable_names.index(variable), None, term_index[shape]))
+            else:
+                memberships.append((variable_names.index(variable), shape, None))
+        variables = [(np.array(columns), REDUCERS[reduce], absolute) for columns, reduce, absolute in self.variables.values()]
+        # where each shaped term's thresholds sit in params()
+        offsets, offset = [], 0
+        for _, shape, _ in memberships:
+            offsets.append(offset)
+            offset += 0 if shape is None else len(shape[0])
+        self._compiled = (variables, memberships, rule_terms, outputs, offsets, offset)
+        return self
+
+    @property
+    def num_params(self) -> int:
+        if self._compiled is None:
+            self.compile()
+        _, _, _, outputs, _, num_thresholds = self._compiled
+        return num_thresholds + outputs.size
+
+    def params(self) -> np.ndarray:
+        if self._compiled is None:
+            self.compile()
+        _, memberships, _, outputs, _, _ = self._compiled
+        thresholds = [shape[0] for _, shape, _ in memberships if shape is not None]
+        return np.concatenate(thresholds + [outputs.ravel()])
+
+    def set_params(self, params: Sequence[float]) -> None:
+        params = np.asarray(params, dtype=np.float64)
+        if len(params) != self.num_params:
+            raise ValueError(F"Expected {self.num_params} parameters, got {len(params)}")
+        _, _, _, _, offsets, num_thresholds = self._compiled
+        for key, offset in zip(list(self.terms), offsets):
+            variable, shape = self.terms[key]
+            if not isinstance(shape, str):
+                self.terms[key] = (variable, (np.sort(params[offset:offset + len(shape[0])]), shape[1]))
+        outputs = params[num_thresholds:].reshape(-1, 2)
+        self.rules = [(terms, float(turn), float(move)) for (terms, _, _), (turn, move) in zip(self.rules, outputs)]
+        self.compile()
+
+    def memberships(self, inputs: np.ndarray, params: np.ndarray = None) -> np.ndarray:
+        """(N, terms + 1) membership degrees for an (N, 9) batch; the last column is all ones.
+
+        With ``params`` (N, num_params), row ``i`` uses the thresholds of ``params[i]``.
+        """
+        if self._compiled is None:
+            self.compile()
+        variables, memberships, _, _, offsets, _ = self._compiled
+        values = np.empty((len(inputs), len(variables)))
+        for v, (columns, reduce, absolute) in enumerate(variables):
+            column = reduce(inputs[:, columns], axis=1)
+            values[:, v] = np.abs(column) if absolute else column
+        degrees = np.ones((len(inputs), len(memberships) + 1))
+        # complements refer to terms declared before them, so one pass in order is enough
+        for t, (v, shape, complement_of) in enumerate(memberships):
+            if shape is None:
+                degrees[:, t] = 1.0 - degrees[:, complement_of]
+            elif params is None:
+                degrees[:, t] = np.interp(values[:, v], shape[0], shape[1])
+            else:
+                thresholds = np.sort(params[:, offsets[t]:offsets[t] + len(shape[0])], axis=1)
+                degrees[:, t] = _interp_rows(values[:, v], thresholds, shape[1])
+        return degrees
+
+    def __call__(self, inputs, params = None) -> np.ndarray:
+        """(turn, move) for a (num_inputs,) input, or an (N, 2) array for an (N, num_inputs) batch.
+
+        ``params`` is one parameter vector, or one per row of the batch.
+        """
+        inputs = np.asarray(inputs, dtype=np.float64)
+        single = inputs.ndim == 1
+        if inputs.shape[-1] != self.num_inputs:
+            raise ValueError(F"The rule base takes {self.num_inputs} inputs, got {inputs.shape[-1]}")
+        batch = inputs.reshape(-1, self.num_inputs)
+        if self._compiled is None:
+            self.compile()
+        if params is not None:
+            params = np.asarray(params, dtype=np.float64)
+            if params.shape[-1] != self.num_params:
+                raise ValueError(F"Expected {self.num_params} parameters, got {params.shape[-1]}")
+            params = np.broadcast_to(params, (len(batch), self.num_params))
+        degrees = self.memberships(batch, params)
+        _, _, rule_terms, outputs, _, num_thresholds = self._compiled
+        strengths = degrees[:, rule_terms].prod(axis=2)
+        if params is None:
+            actions = strengths @ outputs
+        else:
+            actions = np.einsum('nr,nrk->nk', strengths, params[:, num_thresholds:].reshape(len(batch), -1, 2))
+        if self.defuzzify == 'mean':
+            total = strengths.sum(axis=1, keepdims=True)
+            actions = np.divide(actions, total, out=np.zeros_like(actions), where=total > 0)
+        return actions[0] if single else actions
+
+class FuzzyRobot(NeuralRobot):
+    """Robot driven by a FuzzyController: update() applies the action computed for it this tick."""
+
+class FuzzyController:
+    """Batched fuzzy inference for every FuzzyRobot of a Simbot, once per tick.
+
+    Pass an instance as ``customfn_before_tick``; like NeuralController it
+    gathers the (N, sensors + 1) batch and hands every robot its (turn, move).
+    The robots' sensor count must match the layout the rule base was built for.
+    Robots with their own ``params`` are evaluated with them, the others with
+    the rule base's.
+    """
+
+    def __init__(self, rule_base: FuzzyRuleBase):
+        self.rule_base = rule_base.compile()
+        self._inputs = np.empty((0, rule_base.num_inputs))
+
+    def __call__(self, simbot) -> None:
+        robots = [r for r in simbot.robots if isinstance(r, FuzzyRobot) and not r.frozen]
+        if not robots:
+            return
+        width = num_inputs(robots)
+        if width != self.rule_base.num_inputs:
+            raise ValueError(F"The rule base was built for {self.rule_base.num_inputs - 1} distance sensors "
+                             F"but the robots have {width - 1}; pass their SENSORS to FuzzyRuleBase")
+        if self._inputs.shape[0] != len(robots):
+            self._inputs = np.empty((len(robots), width))
+        for i, robot in enumerate(robots):
+            self._inputs[i, :-1] = robot.distance()
+            self._inputs[i, -1] = robot.smell()
+        params = None
+        if any(robot.params is not None for robot in robots):
+            default = self.rule_base.params()
+            params = np.array([default if robot.params is None else robot.params for robot in robots], dtype=np.float64)
+        for robot, (turn, move) in zip(robots, self.rule_base(self._inputs, params).tolist()):
+            robot.pending_action = (turn, move)
@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from ..core.Robot import Robot
+
+# Same layout as the rows Simbot.add_history writes: ir0..ir7, angle -> turn, move.
+# With another SensorLayout the inputs are its distances then the smell angle.
+NUM_INPUTS = 9
+NUM_OUTPUTS = 2
+
+def num_inputs(robots: Sequence[Robot]) -> int:
+    """Input width (distances + smell) of a batch of robots, which must share their sensor count."""
+    counts = {len(robot.SENSORS) for robot in robots}
+    if len(counts) > 1:
+        raise ValueError(F"Robots of one batch need the same number of sensors, got {sorted(counts)}")
+    return counts.pop() + 1
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+class DenseForward:
+    """Pure-numpy forward pass for small stacks of dense layers.
+
+    For the tiny models trained on history files, a couple of matrix products
+    are much cheaper than a call into keras/tensorflow. ``params`` flattens
+    every layer's weights then bias into one vector, the layout evolution
+    strategies search over; ``__call__`` takes one such vector per row.
+    """
+
+    ACTIVATIONS = {
+        'linear': lambda x: x,
+        'relu': lambda x: np.maximum(x, 0.0),
+        'tanh': np.tanh,
+        'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+        'softmax': _softmax,
+    }
+
+    def __init__(self, layers: Sequence[Tuple[np.ndarray, np.ndarray, str]]):
+        self.layers = []
+        for weights, bias, activation in layers:
+            if activation not in self.ACTIVATIONS:
+                raise ValueError(F"Unsupported activation: {activation}. The valid values are {sorted(self.ACTIVATIONS)}")
+            self.layers.append((np.asarray(weights, dtype=np.float32), np.asarray(bias, dtype=np.float32), self.ACTIVATIONS[activation]))
+        self.num_params = sum(weights.size + bias.size for weights, bias, _ in self.layers)
+        self.num_inputs = self.layers[0][0].shape[0] if self.layers else None
+
+    @classmethod
+    def from_keras(cls, model) -> 'DenseForward':
+        layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind in ('InputLayer', 'Dropout', 'Flatten'):
+                continue
+            if kind != 'Dense':
+                raise ValueError(F"Cannot convert layer {layer.name} ({kind}); only Dense layers are supported")
+            weights = layer.get_weights()
+            bias = weights[1] if len(weights) > 1 else np.zeros(weights[0].shape[1])
+            layers.append((weights[0], bias, layer.get_config().get('activation', 'linear')))
+        return cls(layers)
+
+    def params(self) -> np.ndarray:
+        return np.concatenate([np.concatenate((weights.ravel(), bias)) for weights, bias, _ in self.layers])
+
+    def set_params(self, params: Sequence[float]) -> None:
+        layers = []
+        for (weights, bias, activation), (w, b) in zip(self.layers, self._split(np.asarray(params, dtype=np.float32).reshape(1, -1))):
+            layers.append((w.reshape(weights.shape), b.reshape(bias.shape), activation))
+        self.layers = layers
+
+    def _split(self, params: np.ndarray):
+        # (weights, bias) of every layer from an (N, num_params) matrix, as (N, in, out) and (N, out)
+        if params.shape[1] != self.num_params:
+            raise ValueError(F"Expected {self.num_params} parameters, got {params.shape[1]}")
+        offset = 0
+        for weights, bias, _ in self.layers:
+            w = params[:, offset:offset + weights.size].reshape(len(params), *weights.shape)
+            offset += weights.size
+            b = params[:, offset:offset + bias.size]
+            offset += bias.size
+            yield w, b
+
+    def __call__(self, x: np.ndarray, params: np.ndarray = None) -> np.ndarray:
+        """Outputs for the (N, in) batch ``x``, row ``i`` with the parameters ``params[i]`` when given."""
+        if params is None:
+            for weights, bias, activation in self.layers:
+                x = activation(x @ weights + bias)
+            return x
+        for (_, _, activation), (weights, bias) in zip(self.layers, self._split(np.asarray(params, dtype=np.float32))):
+            x = activation(np.einsum('ni,nio->no', x, weights) + bias)
+        return x
+
+class NeuralRobot(Robot):
+    """Robot driven by a NeuralController: update() applies the action computed for it this tick.
+
+    ``params``, when set (e.g. by an ES.BatchEvaluator), is this robot's own
+    parameter vector and replaces the controller's for it.
+    """
+
+    pending_action = None
+    params = None
+
+    def update(self) -> None:
+        if self.pending_action is None:
+            return
+        turn, move = self.pending_action
+        self.pending_action = None
+        self.turn(turn)
+        self.move(move)
+
+class NeuralController:
+    """Batched inference for every NeuralRobot of a Simbot, once per tick.
+
+    Pass an instance as ``customfn_before_tick``. Each tick it gathers
+    ``distance()`` + ``smell()`` of all robots into one (N, sensors + 1) batch
+    (9 columns with the stock layout), checked against the model's input
+    width, runs a
+    single inference and hands every robot its (turn, move). With
+    ``numpy_forward=True`` a keras model made of Dense layers is converted to a
+    ``DenseForward`` and evaluated without the framework. Robots with their
+    own ``params`` need such a DenseForward; the others use its weights.
+    """
+
+    def __init__(self,
+                model,
+                numpy_forward = False,
+                input_scale: Sequence[float] = None,
+                input_offset: Sequence[float] = None,
+                output_scale: Sequence[float] = None):
+        if isinstance(model, DenseForward):
+            self.forward: Callable[[np.ndarray], np.ndarray] = model
+        elif numpy_forward:
+            self.forward = DenseForward.from_keras(model)
+        else:
+            # predict_on_batch skips the per-call dataset/callback setup of predict()
+            self.forward = lambda x: np.asarray(model.predict_on_batch(x))
+        if isinstance(self.forward, DenseForward):
+            self.num_inputs = self.forward.num_inputs
+        else:
+            input_shape = getattr(model, 'input_shape', None)
+            self.num_inputs = input_shape[-1] if isinstance(input_shape, tuple) else None
+        self.input_scale = None if input_scale is None else np.asarray(input_scale, dtype=np.float32)
+        self.input_offset = None if input_offset is None else np.asarray(input_offset, dtype=np.float32)
+        self.output_scale = None if output_scale is None else np.asarray(output_scale, dtype=np.float32)
+        self._inputs = np.empty((0, NUM_INPUTS), dtype=np.float32)
+
+    def gather(self, robots: List[NeuralRobot]) -> np.ndarray:
+        width = num_inputs(robots)
+        if self.num_inputs is not None and width != self.num_inputs:
+            raise ValueError(F"The model takes {self.num_inputs} inputs but the robots have {width - 1} distance sensors + smell")
+        if self._inputs.shape != (len(robots), width):
+            self._inputs = np.empty((len(robots), width), dtype=np.float32)
+        inputs = self._inputs
+        for i, robot in enumerate(robots):
+            inputs[i, :-1] = robot.distance()
+            inputs[i, -1] = robot.smell()
+        if self.input_offset is not None:
+            inputs = inputs - self.input_offset
+        if self.input_scale is not None:
+            inputs = inputs * self.input_scale
+        return inputs
+
+    def infer(self, robots: List[NeuralRobot], inputs: np.ndarray) -> np.ndarray:
+        if all(robot.params is None for robot in robots):
+            return self.forward(inputs)
+        if not isinstance(self.forward, DenseForward):
+            raise ValueError("Robots with their own params need a DenseForward model, see numpy_forward")
+        default = None
+        rows = []
+        for robot in robots:
+            if robot.params is None:
+                default = self.forward.params() if default is None else default
+                rows.append(default)
+            else:
+                rows.append(robot.params)
+        return self.forward(inputs, np.asarray(rows, dtype=np.float32))
+
+    def __call__(self, simbot) -> None:
+        robots = [r for r in simbot.robots if isinstance(r, NeuralRobot) and not r.frozen]
+        if not robots:
+            return
+        outputs = np.asarray(self.infer(robots, self.gather(robots)), dtype=np.float32).reshape(len(robots), -1)[:, :NUM_OUTPUTS]
+        if self.output_scale is not None:
+            outputs = outputs * self.output_scale
+        for robot, (turn, move) in zip(robots, outputs.tolist()):
+            robot.pending_action = (turn, move)
@@ -0,0 +1,2 @@
+from .Neural import NeuralController, NeuralRobot, DenseForward
+from .Fuzzy import FuzzyRuleBase, FuzzyController, FuzzyRobot, ramp, triangle
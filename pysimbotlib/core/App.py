@@ -16,8 +16,10 @@ from kivy.metrics import Metrics
 from .Simbot import Simbot, PySimbotMap
 from .Scaler import Scaler
 from .Robot import Robot
+from .Snapshot import SimbotSnapshot
+from .Hud import Hud
 
-from .Global import ROBOT_DEFAULT_START_POS, OBJECTIVE_DEFAULT_START_POS
+from .Global import ROBOT_DEFAULT_START_POS, OBJECTIVE_DEFAULT_START_POS, SIMBOTMAP_SIZE
 
 class PySimbotApp(App):
 
@@ -36,18 +38,33 @@ class PySimbotApp(App):
                 customfn_create_robots = None,
                 customfn_before_simulation = None,
                 customfn_after_simulation = None,
+                customfn_before_tick = None,
                 enable_wasd_control = False,
                 simulation_forever = False,
                 food_move_after_eat = True,
                 save_wasd_history = False,
                 robot_see_each_other = False,
+                checkpoint_path = None,
+                checkpoint_interval = 0,
+                resume_from = None,
+                termination = None,
+                tick_mode = 'sequential',
+                decide_workers = 0,
+                reuse_widgets = False,
+                batch_render = None,
+                world_size = SIMBOTMAP_SIZE,
+                writer = None,
+                hud_interval = 0.25,
+                show_stats = False,
                 **kwargs):
 
         super(PySimbotApp, self).__init__(**kwargs)
         self.interval = interval
         Window.size = (900 / Metrics.dp, 600 / Metrics.dp)
 
-        map_file_name = "pysimbotlib/maps/%s.kv" % map
+        # a MapGen.GeneratedMap is applied to an empty map once the Simbot exists
+        generated_map = None if isinstance(map, str) else map
+        map_file_name = "pysimbotlib/maps/%s.kv" % ('no_wall' if generated_map is not None else map)
         theme_file_name = "pysimbotlib/themes/%s.kv" % theme
         if not os.path.exists(map_file_name):
             raise FileNotFoundError("File [%s] is not found." % map_file_name)
@@ -66,17 +83,39 @@ class PySimbotApp(App):
                             customfn_create_robots = customfn_create_robots,
                             customfn_before_simulation = customfn_before_simulation,
                             customfn_after_simulation = customfn_after_simulation,
+                            customfn_before_tick = customfn_before_tick,
                             simulation_forever = simulation_forever,
                             food_move_after_eat = food_move_after_eat,
                             save_wasd_history = save_wasd_history,
-                            robot_see_each_other = robot_see_each_other)
+                            robot_see_each_other = robot_see_each_other,
+                            checkpoint_path = checkpoint_path,
+                            checkpoint_interval = checkpoint_interval,
+                            termination = termination,
+                            tick_mode = tick_mode,
+                            decide_workers = decide_workers,
+                            reuse_widgets = reuse_widgets,
+                            world_size = world_size,
+                            writer = writer)
+
+        if generated_map is not None:
+            generated_map.apply(self.simbot)
+
+        if resume_from:
+            if not os.path.exists(resume_from):
+                raise FileNotFoundError("File [%s] is not found." % resume_from)
+            self.simbot.restore(SimbotSnapshot.load(resume_from))
 
         self.simbotMap = PySimbotMap(self.simbot,
                             enable_wasd_control = enable_wasd_control,
-                            save_wasd_history = save_wasd_history)
+                            save_wasd_history = save_wasd_history,
+                            batch_render = batch_render)
 
         self.simbot.add_widget(self.simbotMap, index=1)
 
+        # hud_interval = 0 refreshes the status text on every rendered frame
+        self.hud_interval = hud_interval
+        self.hud = Hud(self.simbot, show_stats = show_stats)
+
     def build(self):
         if platform.system() == 'Darwin':
             self._scaler = Scaler(size=Window.size, scale=2)
@@ -86,4 +125,13 @@ class PySimbotApp(App):
         else:
             Window.add_widget(self.simbot)
 
-        Clock.schedule_interval(self.simbot.process, self.interval)
\ No newline at end of file
+        Clock.schedule_interval(self.simbot.process, self.interval)
+        self.hud.refresh()
+        Clock.schedule_interval(self.hud.refresh, self.hud_interval)
+
+    def on_stop(self):
+        # a simulation cut short by closing the window still has its decide threads
+        self.simbot._shutdown_decide_pool()
+        # history files still queued on the writer are saved before the app exits
+        if self.simbot.writer is not None:
+            self.simbot.writer.flush()
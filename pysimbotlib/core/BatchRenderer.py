@@ -0,0 +1,212 @@
+#!/usr/bin/python3
+
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from kivy.clock import Clock
+from kivy.graphics import InstructionGroup, Mesh, RenderContext
+from kivy.lang import Builder
+from kivy.uix.widget import Widget
+
+# kivy prepends its own attributes/uniforms at $HEADER$; only the color is added here
+VERTEX_SHADER = '''
+$HEADER$
+attribute vec4 v_color;
+
+void main(void) {
+    frag_color = v_color;
+    gl_Position = projection_mat * modelview_mat * vec4(vPosition.xy, 0.0, 1.0);
+}
+'''
+
+FRAGMENT_SHADER = '''
+$HEADER$
+
+void main(void) {
+    gl_FragColor = frag_color;
+}
+'''
+
+VERTEX_FORMAT = [(b'vPosition', 2, 'float'), (b'v_color', 4, 'float')]
+FLOATS_PER_VERTEX = 6
+# Mesh indices are unsigned shorts
+MAX_VERTICES_PER_MESH = 65535
+
+# The robot color set with set_color() is used wherever the template says None
+ROBOT_COLOR = None
+
+def _disc(radius: float, segments: int, color) -> Tuple[List, List, List]:
+    points = [(0.0, 0.0)] + [(radius * math.cos(2 * math.pi * k / segments), radius * math.sin(2 * math.pi * k / segments)) for k in range(segments)]
+    indices = []
+    for k in range(segments):
+        indices += [0, 1 + k, 1 + (k + 1) % segments]
+    return points, [color] * len(points), indices
+
+def _quad(x0: float, y0: float, x1: float, y1: float, color) -> Tuple[List, List, List]:
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)], [color] * 4, [0, 1, 2, 0, 2, 3]
+
+def _template(parts) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    points, colors, indices = [], [], []
+    for part_points, part_colors, part_indices in parts:
+        indices += [len(points) + i for i in part_indices]
+        points += part_points
+        colors += part_colors
+    use_robot_color = np.array([c is ROBOT_COLOR for c in colors])
+    colors = np.array([(0, 0, 0, 0) if c is ROBOT_COLOR else c for c in colors], dtype=np.float32)
+    return np.array(points, dtype=np.float32), colors, use_robot_color, np.array(indices, dtype=np.int64)
+
+class _Batch:
+    """Vertices of ``count`` copies of a template, split into as many meshes as the index range needs."""
+
+    def __init__(self, canvas, num_vertices: int, indices: np.ndarray):
+        # own group, so objectives stay below robots however the counts change
+        self.group = InstructionGroup()
+        canvas.add(self.group)
+        self.num_vertices = num_vertices
+        self.indices = indices
+        self.per_mesh = MAX_VERTICES_PER_MESH // num_vertices
+        self.meshes = []
+        self.count = 0
+
+    def resize(self, count: int) -> None:
+        if count == self.count:
+            return
+        self.group.clear()
+        self.meshes = []
+        for start in range(0, count, self.per_mesh):
+            n = min(self.per_mesh, count - start)
+            indices = (self.indices[None, :] + self.num_vertices * np.arange(n)[:, None]).ravel()
+            mesh = Mesh(fmt=VERTEX_FORMAT, mode='triangles', indices=indices.tolist())
+            self.group.add(mesh)
+            self.meshes.append(mesh)
+        self.count = count
+
+    def upload(self, vertices: np.ndarray) -> None:
+        # vertices: (count, num_vertices, FLOATS_PER_VERTEX)
+        for i, mesh in enumerate(self.meshes):
+            mesh.vertices = vertices[i * self.per_mesh:(i + 1) * self.per_mesh].ravel().tolist()
+
+class BatchRenderer(Widget):
+    """Draws every robot and objective of a Simbot as a few triangle meshes.
+
+    Once per frame the positions, headings and colors are read into arrays and
+    the meshes are rebuilt with numpy, so the cost no longer grows with the
+    number of canvas instructions. Robot and objective widgets keep simulating
+    but are not added to the map, and their KV bindings are dropped. The
+    shapes and colors follow the default theme.
+
+    ``view`` returns the visible (x, y, w, h) of the world; only what
+    intersects it is drawn, obstacles included, so a large world costs what
+    is on screen.
+    """
+
+    SEGMENTS = 12
+    ROBOT_INNER_COLOR = (1, 1, 1, 1)
+    ROBOT_HEADING_COLOR = (0, 0, 0, 1)
+    OBJECTIVE_BORDER_COLOR = (0, 0, 0, 0.7)
+    OBJECTIVE_FILL_COLOR = (0.976, 0.047, 0.635, 0.67)
+    OBSTACLE_COLOR = (0, 0, 0, 1)
+
+    def __init__(self, simbot, view = None, **kwargs):
+        self.canvas = RenderContext(use_parent_projection=True, use_parent_modelview=True)
+        self.canvas.shader.vs = VERTEX_SHADER
+        self.canvas.shader.fs = FRAGMENT_SHADER
+        super(BatchRenderer, self).__init__(**kwargs)
+        self.simbot = simbot
+        self.view = view
+
+        # obstacles on the unit square, drawn first; rebuilt only when the view or the layout changes
+        points, colors, _, indices = _template([_quad(0, 0, 1, 1, self.OBSTACLE_COLOR)])
+        self._obstacle_points = points
+        self._obstacle_colors = colors
+        self._obstacles = _Batch(self.canvas, len(points), indices)
+        self._obstacles_key = None
+
+        # robot template, sized for a 20x20 robot centered on the origin and facing +x
+        points, colors, use_robot_color, indices = _template([
+            _disc(10, self.SEGMENTS, ROBOT_COLOR),
+            _disc(8, self.SEGMENTS, self.ROBOT_INNER_COLOR),
+            _quad(0, -1, 10, 1, self.ROBOT_HEADING_COLOR),
+        ])
+        self._robot_points = points / 10.0
+        self._robot_colors = colors
+        self._robot_use_color = use_robot_color
+        self._robots = _Batch(self.canvas, len(points), indices)
+
+        # objective template on the unit square
+        points, colors, _, indices = _template([
+            _quad(0, 0, 1, 1, self.OBJECTIVE_BORDER_COLOR),
+            _quad(0.1, 0.1, 0.9, 0.9, self.OBJECTIVE_FILL_COLOR),
+        ])
+        self._objective_points = points
+        self._objective_colors = colors
+        self._objectives = _Batch(self.canvas, len(points), indices)
+
+        Clock.schedule_interval(self.redraw, 0)
+
+    def _strip(self, widgets: Sequence[Widget]) -> None:
+        # The KV rules keep per-widget canvas instructions in sync with every
+        # property change; nothing of that is drawn here, so unbind it.
+        for w in widgets:
+            if not getattr(w, '_batch_stripped', False):
+                Builder.unbind_widget(w.uid)
+                w.canvas.before.clear()
+                w.canvas.clear()
+                w.canvas.after.clear()
+                w._batch_stripped = True
+
+    def robot_vertices(self, robots) -> np.ndarray:
+        state = np.array([(r.center_x, r.center_y, 0.5 * r.width, r._direction) + tuple(r.color) for r in robots], dtype=np.float32).reshape(-1, 8)
+        # Robot.turn() is clockwise on screen, hence the negated angle
+        rad = np.radians(-state[:, 3])
+        cos, sin = np.cos(rad)[:, None], np.sin(rad)[:, None]
+        px = self._robot_points[None, :, 0] * state[:, 2:3]
+        py = self._robot_points[None, :, 1] * state[:, 2:3]
+        vertices = np.empty((len(state), len(self._robot_points), FLOATS_PER_VERTEX), dtype=np.float32)
+        vertices[:, :, 0] = state[:, 0:1] + px * cos - py * sin
+        vertices[:, :, 1] = state[:, 1:2] + px * sin + py * cos
+        vertices[:, :, 2:] = np.where(self._robot_use_color[None, :, None], state[:, None, 4:8], self._robot_colors[None])
+        return vertices
+
+    def _box_vertices(self, bboxes, points: np.ndarray, colors: np.ndarray) -> np.ndarray:
+        state = np.array(bboxes, dtype=np.float32).reshape(-1, 4)
+        vertices = np.empty((len(state), len(points), FLOATS_PER_VERTEX), dtype=np.float32)
+        vertices[:, :, 0] = state[:, 0:1] + points[None, :, 0] * state[:, 2:3]
+        vertices[:, :, 1] = state[:, 1:2] + points[None, :, 1] * state[:, 3:4]
+        vertices[:, :, 2:] = colors[None]
+        return vertices
+
+    def objective_vertices(self, objectives) -> np.ndarray:
+        return self._box_vertices([(obj.x, obj.y, obj.width, obj.height) for obj in objectives], self._objective_points, self._objective_colors)
+
+    def obstacle_vertices(self, bboxes) -> np.ndarray:
+        return self._box_vertices(bboxes, self._obstacle_points, self._obstacle_colors)
+
+    @staticmethod
+    def _visible(widgets, view):
+        if view is None:
+            return widgets
+        x, y, w, h = view
+        return [obj for obj in widgets if obj.right >= x and obj.x <= x + w and obj.top >= y and obj.y <= y + h]
+
+    def redraw(self, dt = None) -> None:
+        view = self.view() if self.view else None
+        simbot = self.simbot
+        # the layout tuple is only replaced by set_obstacles, so identity is enough
+        all_bboxes = simbot.obstacle_bboxes
+        if self._obstacles_key is None or view != self._obstacles_key[0] or all_bboxes is not self._obstacles_key[1]:
+            bboxes = all_bboxes if view is None else simbot.obstacles_in(*view)
+            self._obstacles.resize(len(bboxes))
+            self._obstacles.upload(self.obstacle_vertices(bboxes))
+            self._obstacles_key = (view, all_bboxes)
+
+        self._strip(simbot.robots)
+        self._strip(simbot.objectives)
+        robots = self._visible(simbot.robots, view)
+        objectives = self._visible(simbot.objectives, view)
+        self._objectives.resize(len(objectives))
+        self._robots.resize(len(robots))
+        self._objectives.upload(self.objective_vertices(objectives))
+        self._robots.upload(self.robot_vertices(robots))
@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+
+import time
+import logging
+import weakref
+from enum import IntEnum
+from typing import Callable, Iterable, List, NamedTuple
+
+from kivy.logger import Logger
+
+class EventType(IntEnum):
+    EAT = 0
+    COLLISION = 1
+    STUCK = 2
+    SPAWN = 3
+    GENERATION_END = 4
+
+class Event(NamedTuple):
+    tick: int
+    kind: EventType
+    robot: int      # robot index in Simbot.robots, -1 for map-wide events
+    x: float
+    y: float
+
+class _Subscriber:
+    __slots__ = ('callback', 'mask', 'sample_every', 'seen')
+
+    def __init__(self, callback, kinds, sample_every):
+        self.callback = callback
+        self.mask = 0
+        for kind in (kinds if kinds is not None else EventType):
+            self.mask |= 1 << int(kind)
+        self.sample_every = max(1, int(sample_every))
+        self.seen = 0
+
+class EventStream:
+    """Fixed-size ring buffer of simulation events.
+
+    ``emit`` only writes a few numbers into preallocated columns, so it is cheap
+    enough to call from the tick loop. Subscribers are called from ``dispatch``,
+    which ``Simbot`` runs once at the end of every tick.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._tick = [0] * capacity
+        self._kind = [0] * capacity
+        self._robot = [0] * capacity
+        self._x = [0.0] * capacity
+        self._y = [0.0] * capacity
+        self._head = 0          # total number of events ever written
+        self._dispatched = 0    # events already handed to subscribers
+        self._subscribers: List[_Subscriber] = []
+        self.dropped = 0
+
+    def emit(self, tick: int, kind: int, robot: int = -1, x: float = 0.0, y: float = 0.0) -> None:
+        i = self._head % self.capacity
+        self._tick[i] = tick
+        self._kind[i] = kind
+        self._robot[i] = robot
+        self._x[i] = x
+        self._y[i] = y
+        self._head += 1
+
+    def subscribe(self, callback: Callable[[Event], None], kinds: Iterable[EventType] = None, sample_every: int = 1) -> Callable[[Event], None]:
+        self._subscribers.append(_Subscriber(callback, kinds, sample_every))
+        return callback
+
+    def unsubscribe(self, callback: Callable[[Event], None]) -> None:
+        self._subscribers = [s for s in self._subscribers if s.callback != callback]
+
+    def _event(self, n: int) -> Event:
+        i = n % self.capacity
+        return Event(self._tick[i], EventType(self._kind[i]), self._robot[i], self._x[i], self._y[i])
+
+    def recent(self, count: int = None) -> List[Event]:
+        available = min(self._head, self.capacity)
+        count = available if count is None else min(count, available)
+        return [self._event(n) for n in range(self._head - count, self._head)]
+
+    def dispatch(self) -> None:
+        start = self._dispatched
+        if self._head - start > self.capacity:
+            # subscribers fell a whole buffer behind, the oldest events are gone
+            self.dropped += self._head - start - self.capacity
+            start = self._head - self.capacity
+        self._dispatched = self._head
+        if not self._subscribers:
+            return
+        for n in range(start, self._head):
+            kind_bit = 1 << self._kind[n % self.capacity]
+            event = None
+            for sub in self._subscribers:
+                if not sub.mask & kind_bit:
+                    continue
+                sub.seen += 1
+                if sub.seen % sub.sample_every:
+                    continue
+                if event is None:
+                    event = self._event(n)
+                sub.callback(event)
+
+    def clear(self) -> None:
+        self._head = 0
+        self._dispatched = 0
+        self.dropped = 0
+
+class Telemetry:
+    """Rate-limited, lazily formatted per-robot logging for controller code.
+
+    The message is only formatted (``%``-style, like ``logging``) when the robot's
+    interval has elapsed, so a controller can call it every tick for free::
+
+        self.telemetry = Telemetry(interval=1.0)
+        self.telemetry.info(self, "IR Sensors: %s", IR)
+    """
+
+    def __init__(self, interval: float = 1.0, every_n: int = 0, logger = Logger, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.every_n = every_n
+        self.logger = logger
+        self.clock = clock
+        # robot -> {msg: last log time, or call count with every_n}. Weak keys drop the
+        # state of robots discarded between generations, and a new robot never
+        # inherits the stamps of one that had the same id().
+        self._state = weakref.WeakKeyDictionary()
+        # for robot arguments that cannot be weakly referenced (e.g. None)
+        self._strong_state = {}
+
+    def _robot_state(self, robot) -> dict:
+        try:
+            return self._state.setdefault(robot, {})
+        except TypeError:
+            return self._strong_state.setdefault(robot, {})
+
+    # Each (robot, message) pair has its own budget, so one chatty line does not
+    # starve the others a controller emits in the same tick.
+    def _should_log(self, robot, msg: str) -> bool:
+        state = self._robot_state(robot)
+        if self.every_n:
+            count = state.get(msg, 0)
+            state[msg] = count + 1
+            return count % self.every_n == 0
+        now = self.clock()
+        if now - state.get(msg, float('-inf')) < self.interval:
+            return False
+        state[msg] = now
+        return True
+
+    def log(self, level: int, robot, msg: str, *args) -> None:
+        if not self.logger.isEnabledFor(level) or not self._should_log(robot, msg):
+            return
+        self.logger.log(level, msg, *args)
+
+    def debug(self, robot, msg: str, *args) -> None:
+        self.log(logging.DEBUG, robot, msg, *args)
+
+    def info(self, robot, msg: str, *args) -> None:
+        self.log(logging.INFO, robot, msg, *args)
+
+    def warning(self, robot, msg: str, *args) -> None:
+        self.log(logging.WARNING, robot, msg, *args)
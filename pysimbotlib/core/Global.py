@@ -4,12 +4,27 @@ ROBOT_DISTANCE_ANGLES = list(range(0, 360, 45))
 ROBOT_MAX_SENSOR_DISTANCE = 100
 ROBOT_DEFAULT_START_POS = (20, 560)
 
+def history_columns(num_sensors):
+    # one ir column per distance sensor of the robot's SensorLayout
+    return tuple("ir%d" % i for i in range(num_sensors)) + ("angle", "turn", "move")
+
+HISTORY_COLUMNS = history_columns(8)
+
 OBJECTIVE_DEFAULT_START_POS = (500, 50)
 
+# Default world size; a Simbot can be given its own world_size. The map view on screen is always this size.
 SIMBOTMAP_SIZE = (700, 600)
-SIMBOTMAP_BOUNDING_LINES = (
-    ((0, 0), (SIMBOTMAP_SIZE[0], 0)),
-    ((SIMBOTMAP_SIZE[0], 0), (SIMBOTMAP_SIZE[0], SIMBOTMAP_SIZE[1])),
-    ((SIMBOTMAP_SIZE[0], SIMBOTMAP_SIZE[1]), (0, SIMBOTMAP_SIZE[1])),
-    ((0, SIMBOTMAP_SIZE[1]), (0, 0)),
-)
\ No newline at end of file
+
+def world_bounding_lines(size):
+    return (
+        ((0, 0), (size[0], 0)),
+        ((size[0], 0), (size[0], size[1])),
+        ((size[0], size[1]), (0, size[1])),
+        ((0, size[1]), (0, 0)),
+    )
+
+SIMBOTMAP_BOUNDING_LINES = world_bounding_lines(SIMBOTMAP_SIZE)
+
+# Cell size of the obstacle grid (SpatialIndex.ObstacleGrid) used by sensors, collisions,
+# rendering and the generated maps; one sensor range
+OBSTACLE_GRID_CELL = 100
\ No newline at end of file
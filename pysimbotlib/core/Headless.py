@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+
+import os
+from typing import Sequence
+
+from kivy.lang import Builder
+
+from .Robot import Robot
+from .Simbot import Simbot
+from .Obstacle import ObstacleWrapper
+from .SharedWorld import SharedWorld
+from .Global import ROBOT_DEFAULT_START_POS, OBJECTIVE_DEFAULT_START_POS
+
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADLESS_THEME_FILE = os.path.join(_PACKAGE_DIR, 'themes', 'headless.kv')
+
+_loaded = {'theme': None, 'map': None}
+
+# the SharedWorld a pool worker attached in init_worker
+_worker = {'world': None}
+
+def map_file(map: str) -> str:
+    map_file_name = os.path.join(_PACKAGE_DIR, 'maps', '%s.kv' % map)
+    if not os.path.exists(map_file_name):
+        raise FileNotFoundError("File [%s] is not found." % map_file_name)
+    return map_file_name
+
+def load_headless(map: str = 'default') -> None:
+    # KV rules accumulate, so swap the previous map out instead of loading on top of it.
+    if _loaded['theme'] is None:
+        Builder.load_file(HEADLESS_THEME_FILE)
+        _loaded['theme'] = HEADLESS_THEME_FILE
+    map_file_name = map_file(map)
+    if _loaded['map'] != map_file_name:
+        if _loaded['map'] is not None:
+            Builder.unload_file(_loaded['map'])
+        Builder.load_file(map_file_name)
+        _loaded['map'] = map_file_name
+
+def create_simbot(robot_cls = Robot,
+                num_robots = 1,
+                num_objectives = 1,
+                robot_default_start_pos = ROBOT_DEFAULT_START_POS,
+                obj_default_start_pos = OBJECTIVE_DEFAULT_START_POS,
+                max_tick = 4000,
+                map = 'default',
+                **kwargs) -> Simbot:
+    """Build a Simbot that runs without a window, App or Clock.
+
+    Drive it with ``run_simulation``; the keyword arguments are the same as
+    ``Simbot``'s. ``map`` is a map name or a MapGen.GeneratedMap. With a
+    ``shared_world`` keyword the map comes from that SharedWorld and ``map``
+    is ignored.
+    """
+    generated = None if isinstance(map, str) else map
+    if kwargs.get('shared_world') is not None:
+        generated = None
+        load_headless('no_wall')
+    else:
+        load_headless('no_wall' if generated is not None else map)
+    simbot = Simbot(max_tick=max_tick,
+                robot_cls = robot_cls,
+                num_robots = num_robots,
+                num_objectives = num_objectives,
+                robot_default_start_pos = robot_default_start_pos,
+                obj_default_start_pos = obj_default_start_pos,
+                **kwargs)
+    if generated is not None:
+        generated.apply(simbot)
+    return simbot
+
+def create_shared_world(map = 'default', num_results: int = 0, **kwargs) -> SharedWorld:
+    """Put the geometry of ``map`` (a map name or a MapGen.GeneratedMap) in shared memory.
+
+    The caller owns the blocks: use the world as a context manager around the
+    pool, and hand ``world.spec`` to ``init_worker``.
+    """
+    if not isinstance(map, str):
+        return SharedWorld.from_generated_map(map, num_results, **kwargs)
+    load_headless(map)
+    bboxes = [(obs.x, obs.y, obs.width, obs.height) for obs in ObstacleWrapper().get_obstacles()]
+    return SharedWorld.create(bboxes, num_results, **kwargs)
+
+def init_worker(spec) -> None:
+    """Pool initializer attaching the SharedWorld described by ``spec``, see ``worker_world``."""
+    _worker['world'] = SharedWorld.attach(spec)
+
+def worker_world() -> SharedWorld:
+    if _worker['world'] is None:
+        raise RuntimeError("No shared world in this process, start the pool with initializer=init_worker")
+    return _worker['world']
+
+def run_simulation(simbot: Simbot, robots: Sequence[Robot] = None, until: int = None) -> Simbot:
+    """Tick ``simbot`` until its simulation ends, or until iteration ``until``.
+
+    A simulation already in progress is continued; otherwise a new one is
+    started, populated with ``robots`` when given.
+    """
+    if simbot.finished and simbot.iteration != 0:
+        simbot.reset()
+    if simbot.iteration == 0:
+        if robots is not None:
+            simbot.customfn_create_robots = lambda: list(robots)
+        simbot.process(0)
+    while not simbot.finished and (until is None or simbot.iteration < until):
+        simbot.process(0)
+    return simbot
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+
+import time
+from typing import Callable, Dict
+
+SHORTCUTS_TEXT = '\n\n----------------------\n[Shortcuts]\nn: to change the food position'
+
+class PhaseTimer:
+    """Accumulates wall time per tick phase; ``Simbot.process`` marks the end of each phase."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.totals: Dict[str, float] = {}
+        self.ticks = 0
+        self._last = 0.0
+
+    def start(self) -> None:
+        self.ticks += 1
+        self._last = self.clock()
+
+    def mark(self, phase: str) -> None:
+        now = self.clock()
+        self.totals[phase] = self.totals.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def take(self):
+        totals, ticks = self.totals, self.ticks
+        self.totals, self.ticks = {}, 0
+        return totals, ticks
+
+class Hud:
+    """Status text of a Simbot, rebuilt at most once per ``refresh``.
+
+    The simulation only changes plain counters; ``refresh`` is scheduled on the
+    Kivy clock (every ``hud_interval`` seconds of PySimbotApp, or every frame
+    with 0) and assigns ``simbot.hud_text`` only when something visible
+    changed, so the label texture is re-rasterized at a bounded rate however
+    fast the simulation runs.
+    With ``show_stats`` it also shows ticks/sec and the mean time per tick of
+    every phase measured by a PhaseTimer.
+    """
+
+    def __init__(self, simbot, show_stats = False, clock: Callable[[], float] = time.perf_counter):
+        self.simbot = simbot
+        self.show_stats = show_stats
+        self.clock = clock
+        self._last_values = None
+        self._stats_text = ''
+        self._last_time = clock()
+        if show_stats:
+            simbot.phase_timer = PhaseTimer(clock)
+
+    def _update_stats(self) -> None:
+        now = self.clock()
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return
+        totals, ticks = self.simbot.phase_timer.take()
+        lines = ['Ticks/s: %.0f' % (ticks / elapsed)]
+        for phase, total in totals.items():
+            lines.append('%s: %.2f ms' % (phase, 1000.0 * total / max(ticks, 1)))
+        self._stats_text = '\n\n' + '\n'.join(lines)
+        self._last_time = now
+
+    def refresh(self, dt = None) -> None:
+        simbot = self.simbot
+        if self.show_stats:
+            self._update_stats()
+        values = (simbot.simulation_count, simbot.iteration, simbot.eat_count, simbot.food_move_count, simbot.scoreStr, self._stats_text)
+        if values == self._last_values:
+            return
+        self._last_values = values
+        simbot.hud_text = ('Simulation Count: %s\nTime: %s\nEat: %s\nFood Moved: %s\nScore: %s' % values[:5]) + self._stats_text + SHORTCUTS_TEXT
@@ -0,0 +1,158 @@
+#!/usr/bin/python3
+
+import math
+from typing import Sequence
+
+import numpy as np
+
+from .Global import ROBOT_MAX_SENSOR_DISTANCE
+
+# Default scan: one ray per degree
+LIDAR_RAYS = 360
+TWO_PI = 2.0 * math.pi
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+def box_edges(bboxes) -> np.ndarray:
+    """(4 * N, 4) edges (x1, y1, x2, y2) of (x, y, w, h) boxes."""
+    b = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    x0, y0, x1, y1 = b[:, 0], b[:, 1], b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    return np.stack((
+        np.stack((x0, y0, x1, y0), axis=1),
+        np.stack((x1, y0, x1, y1), axis=1),
+        np.stack((x1, y1, x0, y1), axis=1),
+        np.stack((x0, y1, x0, y0), axis=1),
+    ), axis=1).reshape(-1, 4)
+
+class VisibilityPolygon:
+    """What a point sees among a set of edges, as a function of the world angle.
+
+    The angular sweep splits the full turn at every edge endpoint and at every
+    point where two edges cross. Within one of these sectors the same edge is
+    nearest along every ray, so it is found once per sector (one vectorized
+    ray cast per sector) and any ray is then answered by a sorted lookup plus
+    one ray/line intersection. Distances are measured from ``radius`` around
+    the origin, like the IR sensors that sit on the robot's edge, and capped
+    at ``max_distance``.
+    """
+
+    def __init__(self, origin, edges: np.ndarray, radius: float = 0.0, max_distance: float = ROBOT_MAX_SENSOR_DISTANCE):
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.radius = radius
+        self.max_distance = max_distance
+        # edges relative to the origin
+        self.edges = np.asarray(edges, dtype=np.float64).reshape(-1, 4) - np.array(self.origin * 2)
+        self.bounds, self.nearest = self._sweep()
+
+    def _critical_angles(self) -> np.ndarray:
+        e = self.edges
+        points = [e[:, 0:2], e[:, 2:4]]
+        if len(e) > 1:
+            # pairwise crossings, where the nearest edge of a sector could change
+            px, py = e[:, 0:1], e[:, 1:2]
+            dx, dy = e[:, 2:3] - px, e[:, 3:4] - py
+            denominator = _cross(dx, dy, dx.T, dy.T)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                s = _cross(px.T - px, py.T - py, dx.T, dy.T) / denominator
+                u = _cross(px.T - px, py.T - py, dx, dy) / denominator
+            crossing = (denominator != 0) & (s >= 0) & (s <= 1) & (u >= 0) & (u <= 1)
+            i, j = np.nonzero(np.triu(crossing, 1))
+            points.append(np.stack((px[i, 0] + s[i, j] * dx[i, 0], py[i, 0] + s[i, j] * dy[i, 0]), axis=1))
+        points = np.concatenate(points)
+        angles = np.mod(np.arctan2(points[:, 1], points[:, 0]), TWO_PI)
+        return np.unique(np.concatenate(([0.0], angles)))
+
+    def _ray_hits(self, angles: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        # (rays, edges) distance from the origin along each ray, inf when missed
+        dx, dy = np.cos(angles)[:, None], np.sin(angles)[:, None]
+        px, py = edges[None, :, 0], edges[None, :, 1]
+        ex, ey = edges[None, :, 2] - px, edges[None, :, 3] - py
+        denominator = _cross(dx, dy, ex, ey)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = _cross(px, py, ex, ey) / denominator
+            s = _cross(px, py, dx, dy) / denominator
+        hit = (denominator != 0) & (t >= 0) & (s >= 0) & (s <= 1)
+        return np.where(hit, t, np.inf)
+
+    def _sweep(self):
+        if not len(self.edges):
+            return np.array([0.0, TWO_PI]), np.array([-1])
+        bounds = self._critical_angles()
+        bounds = np.append(bounds, TWO_PI) if bounds[-1] < TWO_PI else bounds
+        middles = 0.5 * (bounds[:-1] + bounds[1:])
+        hits = self._ray_hits(middles, self.edges)
+        nearest = np.argmin(hits, axis=1)
+        nearest[~np.isfinite(hits[np.arange(len(middles)), nearest])] = -1
+        return bounds, nearest
+
+    def sample(self, angles) -> np.ndarray:
+        """Distances along the world ``angles`` (radians, counter-clockwise from +x)."""
+        angles = np.mod(np.asarray(angles, dtype=np.float64), TWO_PI)
+        sector = np.clip(np.searchsorted(self.bounds, angles, side='right') - 1, 0, len(self.nearest) - 1)
+        edge_index = self.nearest[sector]
+        distances = np.full(len(angles), np.inf)
+        seen = edge_index >= 0
+        if seen.any():
+            edges = self.edges[edge_index[seen]]
+            dx, dy = np.cos(angles[seen]), np.sin(angles[seen])
+            px, py = edges[:, 0], edges[:, 1]
+            ex, ey = edges[:, 2] - px, edges[:, 3] - py
+            denominator = _cross(dx, dy, ex, ey)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # the sector's edge, extended to a line, so rays on a sector bound still land on it
+                t = _cross(px, py, ex, ey) / denominator
+            distances[seen] = np.where((denominator != 0) & (t >= 0), t, np.inf)
+        return np.clip(distances - self.radius, 0.0, self.max_distance)
+
+    def points(self, angles) -> np.ndarray:
+        """(N, 2) world points hit along ``angles``, e.g. to draw the polygon."""
+        angles = np.asarray(angles, dtype=np.float64)
+        d = self.sample(angles) + self.radius
+        return np.stack((self.origin[0] + d * np.cos(angles), self.origin[1] + d * np.sin(angles)), axis=1)
+
+def visibility_polygon(simbot, origin, radius: float = 0.0, max_distance: float = ROBOT_MAX_SENSOR_DISTANCE) -> VisibilityPolygon:
+    """Visibility of ``origin`` among the walls and the obstacles within reach."""
+    reach = radius + max_distance
+    bboxes = simbot.obstacles_in(origin[0] - reach, origin[1] - reach, 2 * reach, 2 * reach)
+    walls = np.array([(a[0], a[1], b[0], b[1]) for a, b in simbot.bounding_lines], dtype=np.float64)
+    edges = np.concatenate((walls, box_edges(bboxes))) if bboxes else walls
+    return VisibilityPolygon(origin, edges, radius, max_distance)
+
+def robot_hits(origin, angles: np.ndarray, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+    """Distance from ``origin`` to the first of the circles along each angle, inf when missed."""
+    dx, dy = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    cx, cy = centers[None, :, 0] - origin[0], centers[None, :, 1] - origin[1]
+    b = dx * cx + dy * cy
+    discriminant = b * b - (cx * cx + cy * cy - radii[None, :] ** 2)
+    with np.errstate(invalid='ignore'):
+        t = b - np.sqrt(discriminant)
+    t = np.where((discriminant >= 0) & (t >= 0), t, np.inf)
+    return t.min(axis=1) if t.shape[1] else np.full(len(angles), np.inf)
+
+def lidar_angles(count: int = LIDAR_RAYS) -> np.ndarray:
+    """``count`` evenly spaced angles in degrees, relative to the heading like ``SensorLayout``."""
+    return 360.0 * np.arange(count) / count
+
+def scan(robot, angles: Sequence[float], max_distance: float) -> np.ndarray:
+    """LIDAR reading of ``robot`` along ``angles`` (degrees, clockwise from its heading)."""
+    sm = robot._sm
+    center = tuple(robot.center)
+    radius = 0.5 * robot.width
+    # walls and obstacles are static, so the sweep is redone only when the robot or the layout changed
+    key = (center, radius, max_distance, id(sm.obstacle_bboxes), id(sm.bounding_lines))
+    polygon = robot._lidar_polygon
+    if polygon is None or robot._lidar_key != key:
+        polygon = visibility_polygon(sm, center, radius, max_distance)
+        robot._lidar_polygon, robot._lidar_key = polygon, key
+    world_angles = np.radians(-(robot._direction + np.asarray(angles, dtype=np.float64)))
+    distances = polygon.sample(world_angles)
+    if sm.robot_see_each_other:
+        others = [r for r in sm._robot_list if r is not robot and
+                  abs(r.center_x - center[0]) <= radius + max_distance + 0.5 * r.width and
+                  abs(r.center_y - center[1]) <= radius + max_distance + 0.5 * r.width]
+        if others:
+            centers = np.array([r.center for r in others], dtype=np.float64)
+            radii = np.array([0.5 * r.width for r in others], dtype=np.float64)
+            distances = np.minimum(distances, np.clip(robot_hits(center, world_angles, centers, radii) - radius, 0.0, max_distance))
+    return distances
@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+
+import os
+import json
+import random
+import hashlib
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .Geom import Geom
+from .SpatialIndex import ObstacleGrid
+from .Global import SIMBOTMAP_SIZE, ROBOT_DEFAULT_START_POS, OBJECTIVE_DEFAULT_START_POS
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pysimbotlib', 'maps')
+# bump when the generators change, so stale cache files are not reused
+GENERATOR_VERSION = 3
+
+FREE_STEP = 10
+FREE_SIZE = 20      # robots and objectives are 20 x 20
+CLEARANCE = 40      # margin kept free around the default robot and food positions
+
+def _protected_regions() -> List[Geom.BBox]:
+    return [(x - CLEARANCE, y - CLEARANCE, FREE_SIZE + 2 * CLEARANCE, FREE_SIZE + 2 * CLEARANCE)
+            for x, y in (ROBOT_DEFAULT_START_POS, OBJECTIVE_DEFAULT_START_POS)]
+
+def _overlaps(a: Geom.BBox, b: Geom.BBox) -> bool:
+    return a[0] <= b[0] + b[2] and b[0] <= a[0] + a[2] and a[1] <= b[1] + b[3] and b[1] <= a[1] + a[3]
+
+def _keep_clear(bboxes: List[Geom.BBox]) -> List[Geom.BBox]:
+    protected = _protected_regions()
+    return [bbox for bbox in bboxes if not any(_overlaps(bbox, region) for region in protected)]
+
+Size = Tuple[int, int]
+
+def random_rectangles(rng: random.Random, count: int = 10, min_size: int = 20, max_size: int = 120, world_size: Size = SIMBOTMAP_SIZE) -> List[Geom.BBox]:
+    bboxes = []
+    for _ in range(count * 20):
+        if len(bboxes) == count:
+            break
+        w = rng.randrange(min_size, max_size + 1, 10)
+        h = rng.randrange(min_size, max_size + 1, 10)
+        bbox = (rng.randrange(10, world_size[0] - w - 10, 10), rng.randrange(10, world_size[1] - h - 10, 10), w, h)
+        if _keep_clear([bbox]):
+            bboxes.append(bbox)
+    return bboxes
+
+def corridors(rng: random.Random, count: int = 4, wall: int = 20, gap: int = 60, world_size: Size = SIMBOTMAP_SIZE) -> List[Geom.BBox]:
+    """Horizontal walls across the map, each with one opening of ``gap`` pixels."""
+    bboxes = []
+    levels = np.linspace(120, world_size[1] - 140, count).round().astype(int).tolist()
+    for y in levels:
+        opening = rng.randrange(20, world_size[0] - gap - 20, 10)
+        bboxes.append((0, y, opening, wall))
+        bboxes.append((opening + gap, y, world_size[0] - opening - gap, wall))
+    return _keep_clear(bboxes)
+
+def maze(rng: random.Random, cols: int = 7, rows: int = 6, wall: int = 10, world_size: Size = SIMBOTMAP_SIZE) -> List[Geom.BBox]:
+    """Perfect maze (randomized depth-first search) on a ``cols`` x ``rows`` cell grid."""
+    cell_w, cell_h = world_size[0] / cols, world_size[1] / rows
+    # walls[(c, r, 'v')] is the wall right of cell (c, r); 'h' the wall above it
+    walls = {(c, r, 'v') for c in range(cols - 1) for r in range(rows)} | {(c, r, 'h') for c in range(cols) for r in range(rows - 1)}
+    visited = {(0, 0)}
+    stack = [(0, 0)]
+    while stack:
+        c, r = stack[-1]
+        neighbours = [(nc, nr) for nc, nr in ((c + 1, r), (c - 1, r), (c, r + 1), (c, r - 1))
+                      if 0 <= nc < cols and 0 <= nr < rows and (nc, nr) not in visited]
+        if not neighbours:
+            stack.pop()
+            continue
+        nc, nr = rng.choice(neighbours)
+        if nc != c:
+            walls.discard((min(c, nc), r, 'v'))
+        else:
+            walls.discard((c, min(r, nr), 'h'))
+        visited.add((nc, nr))
+        stack.append((nc, nr))
+
+    bboxes = []
+    for c, r, kind in sorted(walls):
+        if kind == 'v':
+            bboxes.append((round((c + 1) * cell_w - wall / 2), round(r * cell_h), wall, round(cell_h)))
+        else:
+            bboxes.append((round(c * cell_w), round((r + 1) * cell_h - wall / 2), round(cell_w), wall))
+    return _keep_clear(bboxes)
+
+GENERATORS: Dict[str, Callable[..., List[Geom.BBox]]] = {
+    'rectangles': random_rectangles,
+    'corridors': corridors,
+    'maze': maze,
+}
+
+class GeneratedMap:
+    """Compiled geometry of one generated layout.
+
+    ``obstacles`` is an (N, 4) array of (x, y, w, h). ``grid_start``/``grid_items``
+    are the arrays of its ObstacleGrid (CSR layout: the obstacles of cell i are
+    ``grid_items[grid_start[i]:grid_start[i + 1]]``). ``free_positions`` lists
+    every FREE_STEP-aligned position where a 20 x 20 robot or objective fits.
+    """
+
+    def __init__(self, name: str, obstacles: np.ndarray, grid_start: np.ndarray, grid_items: np.ndarray, free_positions: np.ndarray, world_size: Size = SIMBOTMAP_SIZE):
+        self.name = name
+        self.world_size = tuple(int(v) for v in world_size)
+        self.obstacles = obstacles
+        self.grid_start = grid_start
+        self.grid_items = grid_items
+        self.free_positions = free_positions
+        self._bboxes = None
+        self._free = None
+        self._grid = None
+
+    @classmethod
+    def compile(cls, name: str, bboxes: Sequence[Geom.BBox], world_size: Size = SIMBOTMAP_SIZE) -> 'GeneratedMap':
+        obstacles = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        grid = ObstacleGrid.build(obstacles.tolist(), world_size)
+
+        # same bounds as Simbot.is_robot_pos_valid. Each obstacle blocks a
+        # rectangle of the position raster, so marking it is one slice
+        # assignment and big worlds cost their area, not area x obstacles.
+        xs = np.arange(FREE_STEP, world_size[0] - FREE_SIZE, FREE_STEP)
+        ys = np.arange(FREE_STEP, world_size[1] - FREE_SIZE, FREE_STEP)
+        free = np.ones((len(ys), len(xs)), dtype=bool)
+        for x, y, w, h in obstacles.tolist():
+            # position p = FREE_STEP * (i + 1) is blocked when x - FREE_SIZE <= p <= x + w
+            x0 = max(0, int(np.ceil((x - FREE_SIZE) / FREE_STEP)) - 1)
+            x1 = int(np.floor((x + w) / FREE_STEP))
+            y0 = max(0, int(np.ceil((y - FREE_SIZE) / FREE_STEP)) - 1)
+            y1 = int(np.floor((y + h) / FREE_STEP))
+            if x1 > x0 and y1 > y0:
+                free[y0:y1, x0:x1] = False
+        rows_free, cols_free = np.nonzero(free)
+        free_positions = np.stack((xs[cols_free], ys[rows_free]), axis=1).astype(np.float64)
+        return cls(name, obstacles, grid.start, grid.items, free_positions, world_size)
+
+    def bboxes(self) -> Tuple[Geom.BBox, ...]:
+        if self._bboxes is None:
+            self._bboxes = tuple(tuple(bbox) for bbox in self.obstacles.tolist())
+        return self._bboxes
+
+    def grid(self) -> ObstacleGrid:
+        if self._grid is None:
+            self._grid = ObstacleGrid(self.world_size, self.grid_start, self.grid_items)
+        return self._grid
+
+    def obstacles_near(self, x: float, y: float, w: float = 0.0, h: float = 0.0) -> np.ndarray:
+        """Indices of the obstacles in the grid cells touched by (x, y, w, h)."""
+        return np.array(self.grid().query(x, y, w, h), dtype=np.int32)
+
+    def apply(self, simbot) -> None:
+        if self._free is None:
+            self._free = tuple(tuple(pos) for pos in self.free_positions.tolist())
+        # geometry, spawn table and spatial index are all handed over as compiled
+        simbot.set_world_size(self.world_size)
+        simbot.set_obstacles(self.bboxes(), free_positions=self._free, grid=self.grid())
+
+    def save(self, path: str) -> None:
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, name=np.array(self.name), obstacles=self.obstacles, grid_start=self.grid_start,
+                 grid_items=self.grid_items, free_positions=self.free_positions, world_size=np.array(self.world_size))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'GeneratedMap':
+        with np.load(path) as data:
+            world_size = tuple(data['world_size'].tolist()) if 'world_size' in data else SIMBOTMAP_SIZE
+            return cls(str(data['name']), data['obstacles'], data['grid_start'], data['grid_items'], data['free_positions'], world_size)
+
+def generate_map(kind: str = 'rectangles', seed: int = 0, cache_dir: str = DEFAULT_CACHE_DIR, world_size: Size = SIMBOTMAP_SIZE, **params) -> GeneratedMap:
+    """Generate (or load from ``cache_dir``) the compiled map of ``kind`` for ``seed``."""
+    world_size = tuple(int(v) for v in world_size)
+    if kind not in GENERATORS:
+        raise ValueError(F"Invalid map kind: {kind}. The valid values are {sorted(GENERATORS)}")
+    name = '%s-%d' % (kind, seed)
+    path = None
+    if cache_dir:
+        key = hashlib.sha1(json.dumps([GENERATOR_VERSION, kind, seed, params, world_size], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(cache_dir, '%s-%s.npz' % (name, key))
+        if os.path.exists(path):
+            return GeneratedMap.load(path)
+    generated = GeneratedMap.compile(name, GENERATORS[kind](random.Random(seed), world_size=world_size, **params), world_size)
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        generated.save(path)
+    return generated
+
+class MapSuite:
+    """A fixed list of generated maps to score controllers on.
+
+    ``evaluate`` reuses one headless Simbot: switching maps only swaps its
+    obstacle geometry, spawn table and spatial index for the compiled ones.
+    """
+
+    def __init__(self, maps: Sequence[GeneratedMap]):
+        self.maps = list(maps)
+
+    @classmethod
+    def generate(cls,
+                kinds: Sequence[str] = ('rectangles', 'corridors', 'maze'),
+                seeds: Sequence[int] = range(4),
+                cache_dir: str = DEFAULT_CACHE_DIR,
+                params: Dict[str, Dict[str, Any]] = None,
+                world_size: Size = SIMBOTMAP_SIZE) -> 'MapSuite':
+        """Every kind for every seed; ``params`` maps a kind to its generator arguments."""
+        params = params or {}
+        return cls([generate_map(kind, seed, cache_dir, world_size, **params.get(kind, {})) for kind in kinds for seed in seeds])
+
+    def __len__(self) -> int:
+        return len(self.maps)
+
+    def evaluate(self,
+                robot_cls,
+                genomes: Sequence[Any],
+                fitness_fn: Callable[[Any, Any], float],
+                genome_attr = 'RULES',
+                seed: int = 0,
+                simbot = None,
+                **simbot_kwargs) -> np.ndarray:
+        """(genomes, maps) fitness; every map is one simulation of all genomes together."""
+        from .Headless import create_simbot, run_simulation
+        if simbot is None:
+            simbot_kwargs.setdefault('food_move_after_eat', False)
+            simbot = create_simbot(robot_cls=robot_cls, map='no_wall', **simbot_kwargs)
+        fitness = np.zeros((len(genomes), len(self.maps)))
+        for m, generated in enumerate(self.maps):
+            generated.apply(simbot)
+            random.seed(seed)
+            robots = []
+            for genome in genomes:
+                robot = robot_cls()
+                setattr(robot, genome_attr, genome)
+                robots.append(robot)
+            run_simulation(simbot, robots=robots)
+            fitness[:, m] = [fitness_fn(simbot, robot) for robot in robots]
+        return fitness
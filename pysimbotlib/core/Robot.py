@@ -1,24 +1,35 @@
 #!/usr/bin/python3
 
+import copy
 import math
 
 from itertools import chain
-from functools import cache
-from typing import Generator, Iterable, Sequence, Union
+from functools import lru_cache
+from typing import Any, Dict, Generator, Iterable, Sequence, Union
+
+import numpy as np
 
 from kivy.uix.widget import Widget
 from kivy.properties import NumericProperty, ReferenceListProperty
-from kivy.logger import Logger
 
-from .Obstacle import Obstacle
 from .Objective import Objective
 from .Geom import Geom
-from .Global import SIMBOTMAP_SIZE, SIMBOTMAP_BOUNDING_LINES, ROBOT_DISTANCE_ANGLES, ROBOT_MAX_SENSOR_DISTANCE
+from .Events import EventType
+from .Sensor import SensorLayout, DEFAULT_SENSORS
+from . import Lidar
+from .Global import SIMBOTMAP_BOUNDING_LINES, ROBOT_MAX_SENSOR_DISTANCE
+
+# Bounded so long simulation_forever runs do not grow the ray cache without limit
+DISTANCE_CACHE_SIZE = 1 << 16
 
 class Robot(Widget):
 
+    # Distance sensors of this robot class, e.g. SensorLayout.uniform(16)
+    SENSORS: SensorLayout = DEFAULT_SENSORS
+
     # Facing 0 degree direction
     _sm = None
+    _index = -1
     _direction = NumericProperty(0)
     
     _color_r = NumericProperty(0)
@@ -32,37 +43,50 @@ class Robot(Widget):
     collision_count: int = 0
     just_eat: bool = False
     stuck: bool = False
+    frozen: bool = False
+
+    # sensor readings and pending actions of a synchronous tick, see sense()
+    _sensed_distance = None
+    _sensed_smell = None
+    _sensed_smell_nearest = None
+    _actions = None
+
+    # visibility polygon of the last lidar() call and the pose it was built for
+    _lidar_polygon = None
+    _lidar_key = None
+
+    _SNAPSHOT_TYPES = (bool, int, float, str, list, tuple, dict, type(None), np.ndarray)
 
-    @cache
     def get_obstacles_bboxes(self) -> Generator[Geom.BBox, None, None]:
-        return tuple((obs.x, obs.y, obs.width, obs.height) for obs in self._sm.obstacles)
+        return self._sm.obstacle_bboxes
 
     @staticmethod
-    def distance_to_line_generators(sensor_coor: Geom.Point2D, sensor_coverage_coor: Geom.Point2D, bounding_lines) -> Generator[float, None, None]:
+    def distance_to_line_generators(sensor_coor: Geom.Point2D, sensor_coverage_coor: Geom.Point2D, bounding_lines, max_distance: float = ROBOT_MAX_SENSOR_DISTANCE) -> Generator[float, None, None]:
         for line in bounding_lines:
             intersection = Geom.line_segment_intersect(sensor_coor, sensor_coverage_coor, line[0], line[1])
-            yield (Geom.distance(sensor_coor, intersection) if intersection else ROBOT_MAX_SENSOR_DISTANCE)
+            yield (Geom.distance(sensor_coor, intersection) if intersection else max_distance)
 
     @staticmethod
-    def distance_to_robot_generators(sensor_coor: Geom.Point2D, sensor_coverage_coor: Geom.Point2D, robots) -> Generator[float, None, None]:
+    def distance_to_robot_generators(sensor_coor: Geom.Point2D, sensor_coverage_coor: Geom.Point2D, robots, max_distance: float = ROBOT_MAX_SENSOR_DISTANCE) -> Generator[float, None, None]:
         for r in robots:
             intersection = Geom.line_segment_circle_intersect(sensor_coor, sensor_coverage_coor, r.center, 0.5 * r.width)
             near_intersection = intersection[0]
-            yield (Geom.distance(sensor_coor, near_intersection) if near_intersection else ROBOT_MAX_SENSOR_DISTANCE)
-        yield ROBOT_MAX_SENSOR_DISTANCE
+            yield (Geom.distance(sensor_coor, near_intersection) if near_intersection else max_distance)
+        yield max_distance
 
     @staticmethod
-    @cache
-    def _min_distance_to_wall_or_obstacle(obstacle_bboxes: Iterable[Geom.BBox], sensor_coor: Geom.Point2D, sensor_coverage_coor: Geom.Point2D) -> float:
+    @lru_cache(maxsize=DISTANCE_CACHE_SIZE)
+    def _min_distance_to_wall_or_obstacle(obstacle_bboxes: Iterable[Geom.BBox], sensor_coor: Geom.Point2D, sensor_coverage_coor: Geom.Point2D, bounding_lines = SIMBOTMAP_BOUNDING_LINES, max_distance: float = ROBOT_MAX_SENSOR_DISTANCE) -> float:
         obstacle_bounding_lines: Generator[Geom.Line] = (line for line in Geom.all_bounding_lines_generator(obstacle_bboxes))
-        min_distance_to_wall_or_obs = min(Robot.distance_to_line_generators(sensor_coor, sensor_coverage_coor, chain(SIMBOTMAP_BOUNDING_LINES, obstacle_bounding_lines)))
+        min_distance_to_wall_or_obs = min(Robot.distance_to_line_generators(sensor_coor, sensor_coverage_coor, chain(bounding_lines, obstacle_bounding_lines), max_distance))
         return min_distance_to_wall_or_obs
 
-    def _distance(self, angle: float) -> float:
-        rad_angle = math.radians(-(self._direction+angle))
-        unit_x = math.cos(rad_angle)
-        unit_y = math.sin(rad_angle)
+    def _distances(self) -> Sequence[float]:
+        # one ray per sensor, the unit vectors come from the layout's heading table
+        max_distance = self.SENSORS.max_distance
+        return tuple(self._cast(unit_x, unit_y, max_distance) for unit_x, unit_y in self.SENSORS.directions(self._direction))
 
+    def _cast(self, unit_x: float, unit_y: float, max_distance: float) -> float:
         # Point2D that represents sensor coordinate. It must be located at the robot edge.
         sensor_coor = (
             self.center_x + 0.5 * self.width * unit_x, 
@@ -71,21 +95,23 @@ class Robot(Widget):
 
         # Point2D that represents coordinates that sensor can be reached. It is outside the robot.
         sensor_coverage_coor = (
-            sensor_coor[0] + unit_x * ROBOT_MAX_SENSOR_DISTANCE, 
-            sensor_coor[1] + unit_y * ROBOT_MAX_SENSOR_DISTANCE,
+            sensor_coor[0] + unit_x * max_distance, 
+            sensor_coor[1] + unit_y * max_distance,
         )
 
-        obstacle_bboxes = self.get_obstacles_bboxes()
-        min_distance_to_wall_and_obs = Robot._min_distance_to_wall_or_obstacle(obstacle_bboxes, sensor_coor, sensor_coverage_coor)
+        x = min(sensor_coor[0], sensor_coverage_coor[0])
+        y = min(sensor_coor[1], sensor_coverage_coor[1])
+        w = abs(sensor_coor[0] - sensor_coverage_coor[0])
+        h = abs(sensor_coor[1] - sensor_coverage_coor[1])
+        ROI = (x, y, w, h)
+
+        # only obstacles in the grid cells under the ray can be hit
+        obstacle_bboxes = self._sm.obstacles_in(*ROI)
+        min_distance_to_wall_and_obs = Robot._min_distance_to_wall_or_obstacle(obstacle_bboxes, sensor_coor, sensor_coverage_coor, self._sm.bounding_lines, max_distance)
         
         if self._sm.robot_see_each_other:
-            x = min(sensor_coor[0], sensor_coverage_coor[0])
-            y = min(sensor_coor[1], sensor_coverage_coor[1])
-            w = abs(sensor_coor[0] - sensor_coverage_coor[0])
-            h = abs(sensor_coor[1] - sensor_coverage_coor[1])
-            ROI = (x, y, w, h)
             other_robots_in_ROI = (r for r in self._sm._robot_list if r != self and Geom.is_bbox_overlap(ROI, (r.x, r.y, r.width, r.height)))
-            min_distance_to_other_robot = min(Robot.distance_to_robot_generators(sensor_coor, sensor_coverage_coor, other_robots_in_ROI))
+            min_distance_to_other_robot = min(Robot.distance_to_robot_generators(sensor_coor, sensor_coverage_coor, other_robots_in_ROI, max_distance))
             return min(min_distance_to_wall_and_obs, min_distance_to_other_robot)
         else:
             return min_distance_to_wall_and_obs
@@ -98,8 +124,8 @@ class Robot(Widget):
         robot_center = (p[0] + robot_radius, p[1] + robot_radius)
         
         map_pos = self._sm.pos
-        map_half_width = 0.5 * SIMBOTMAP_SIZE[0]
-        map_half_height = 0.5 * SIMBOTMAP_SIZE[1]
+        map_half_width = 0.5 * self._sm.world_size[0]
+        map_half_height = 0.5 * self._sm.world_size[1]
         map_center = (map_pos[0] + map_half_width, map_pos[1] + map_half_height)
 
         dx = abs(robot_center[0] - map_center[0])
@@ -109,21 +135,19 @@ class Robot(Widget):
             return False
         return True
 
-    def _is_robot_collide_obstacles(self, p: Geom.Point2D, obstacles_included: Iterable[Obstacle] = None) -> bool:
-        if obstacles_included is None:
-            obstacles_included = self._sm.obstacles
-
+    def _is_robot_collide_obstacles(self, p: Geom.Point2D, obstacles_included: Iterable[Geom.BBox] = None) -> bool:
         if p is None:
             p = self.pos
 
+        if obstacles_included is None:
+            obstacles_included = self._sm.obstacles_in(p[0], p[1], self.width, self.height)
+
         robot_radius = 0.5 * self.width
         robot_center = (p[0] + robot_radius, p[1] + robot_radius)
 
         # Check obstacles
-        for obs in obstacles_included:
-            obs_pos = obs.pos
-            obs_width, obs_height = obs.size
-            obs_center = (obs_pos[0] + 0.5 * obs_width, obs_pos[1] + 0.5 * obs_height)
+        for obs_x, obs_y, obs_width, obs_height in obstacles_included:
+            obs_center = (obs_x + 0.5 * obs_width, obs_y + 0.5 * obs_height)
 
             if Geom.is_circle_rect_intersect(robot_center, robot_radius, obs_center, obs_width, obs_height):
                 return True
@@ -174,12 +198,29 @@ class Robot(Widget):
 
     def distance(self, index: int = None) -> Union[Sequence[float], float]:
         if index is None:
-            return tuple(self._distance(angle) for angle in ROBOT_DISTANCE_ANGLES)
+            if self._sensed_distance is not None:
+                return self._sensed_distance
+            return self._distances()
         if isinstance(index, int):
-            if index < 0 or index >= len(ROBOT_DISTANCE_ANGLES):
-                raise ValueError(F"Invalid distance sensor index: {index}. The valid values are between 0 and {len(ROBOT_DISTANCE_ANGLES) - 1}")
+            if index < 0 or index >= len(self.SENSORS):
+                raise ValueError(F"Invalid distance sensor index: {index}. The valid values are between 0 and {len(self.SENSORS) - 1}")
+            elif self._sensed_distance is not None:
+                return self._sensed_distance[index]
             else:
-                return self._distance(ROBOT_DISTANCE_ANGLES[index])
+                # same (possibly quantized) ray as distance() reads for the full set
+                unit_x, unit_y = self.SENSORS.directions(self._direction)[index]
+                return self._cast(unit_x, unit_y, self.SENSORS.max_distance)
+
+    def lidar(self, angles: Sequence[float] = None, max_distance: float = None) -> np.ndarray:
+        """Distances along many rays at once, ``angles`` in degrees relative to the heading like the IR sensors.
+
+        Defaults to one ray per degree and the range of ``SENSORS``. The
+        visibility polygon is built once per pose and every ray is read from
+        it, so a 360-ray scan costs about as much as a few distance() rays.
+        """
+        if angles is None:
+            angles = Lidar.lidar_angles()
+        return Lidar.scan(self, angles, self.SENSORS.max_distance if max_distance is None else max_distance)
 
     def calc_angle_to_objective(self, obj: Widget) -> float:
         dx = obj.center_x - self.center_x
@@ -191,17 +232,50 @@ class Robot(Widget):
     def smell(self, index: int = 0) -> float:
         if index < 0 or index >= len(self._sm.objectives):
             raise ValueError(F"Cannot smell the objective indexed at {index}. The valid values are between 0 and {len(self._sm.objectives) - 1}")
+        if self._sensed_smell is not None:
+            return self._sensed_smell[index]
         return self.calc_angle_to_objective(self._sm.objectives[index])
 
     def smell_nearest(self) -> float:
+        if self._sensed_smell_nearest is not None:
+            return self._sensed_smell_nearest
         nearest_food = min(self._sm.objectives, key=lambda food: Geom.distance(self.pos, food.pos))
         return self.calc_angle_to_objective(nearest_food)
 
+    # Synchronous ticks (Simbot tick_mode='synchronous') split update() in three:
+    # sense() reads every sensor against the frozen world, decide() runs update()
+    # with turn()/move() only recorded, and act() applies the recorded actions.
+    def sense(self) -> None:
+        objectives = self._sm.objectives
+        self._sensed_distance = self._distances()
+        self._sensed_smell = tuple(self.calc_angle_to_objective(obj) for obj in objectives)
+        self._sensed_smell_nearest = self.smell_nearest() if objectives else None
+
+    def decide(self) -> None:
+        self._actions = []
+        self.update()
+
+    def act(self) -> None:
+        actions = self._actions
+        self._actions = None
+        self._sensed_distance = self._sensed_smell = self._sensed_smell_nearest = None
+        for is_turn, value in actions:
+            if is_turn:
+                self.turn(value)
+            else:
+                self.move(value)
+
     def turn(self, degree: float = 1.0) -> None:
+        if self._actions is not None:
+            self._actions.append((True, degree))
+            return
         self._direction = (self._direction + degree) % 360
         self.stuck = False
 
     def move(self, step: int = 1) -> None:
+        if self._actions is not None:
+            self._actions.append((False, step))
+            return
         if step >= 0:
             rad_angle = math.radians(-self._direction)
             step = int(step)
@@ -222,8 +296,10 @@ class Robot(Widget):
                 # If can move
                 if not self._is_valid_position(next_position_to_validate):
                     self.collision_count += 1
+                    self._sm.events.emit(self._sm.iteration, EventType.COLLISION, self._index, next_position[0], next_position[1])
                     if distance == 0:
                         self.stuck = True
+                        self._sm.events.emit(self._sm.iteration, EventType.STUCK, self._index, next_position[0], next_position[1])
                     break
                 next_position = next_position_to_validate
         self.pos = next_position
@@ -232,11 +308,61 @@ class Robot(Widget):
         if not obj:
             self.just_eat = False
         elif obj and not self.just_eat:
-            Logger.debug('Robot: Eat Objective at [{}, {}]'.format(obj.pos[0], obj.pos[1]))
+            self._sm.events.emit(self._sm.iteration, EventType.EAT, self._index, obj.x, obj.y)
             self._sm.on_robot_eat(self, obj)
             self.eat_count += 1
             self.just_eat = True
         
+    def get_state(self) -> Dict[str, Any]:
+        # Public plain-data attributes (genomes, controller counters...) are carried
+        # along so a restored robot resumes with the same controller state.
+        extra = {k: copy.deepcopy(v) for k, v in vars(self).items()
+                if not k.startswith('_') and isinstance(v, Robot._SNAPSHOT_TYPES)}
+        return {
+            'pos': tuple(self.pos),
+            'direction': self._direction,
+            'color': tuple(self.color),
+            'eat_count': self.eat_count,
+            'collision_count': self.collision_count,
+            'just_eat': self.just_eat,
+            'stuck': self.stuck,
+            'frozen': self.frozen,
+            'extra': extra,
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        for k, v in state['extra'].items():
+            setattr(self, k, copy.deepcopy(v))
+        self.pos = state['pos']
+        self._direction = state['direction']
+        self.set_color(*state['color'])
+        self.eat_count = state['eat_count']
+        self.collision_count = state['collision_count']
+        self.just_eat = state['just_eat']
+        self.stuck = state['stuck']
+        self.frozen = state.get('frozen', False)
+
+    def reset(self) -> None:
+        # Called when Simbot(reuse_widgets=True) recycles this robot for a new
+        # generation. Subclasses keeping per-run state should extend it.
+        self.pos = (0, 0)
+        self._direction = 0
+        self.eat_count = 0
+        self.collision_count = 0
+        self.just_eat = False
+        self.stuck = False
+        self.frozen = False
+        self._sensed_distance = self._sensed_smell = self._sensed_smell_nearest = None
+        self._actions = None
+        self._lidar_polygon = self._lidar_key = None
+
+    def freeze(self) -> None:
+        # A frozen robot keeps its pose and counters but is no longer updated.
+        self.frozen = True
+
+    def unfreeze(self) -> None:
+        self.frozen = False
+
     def update(self) -> None:
         pass
 
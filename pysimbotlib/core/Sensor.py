@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+import math
+from typing import Sequence, Tuple
+
+from .Global import ROBOT_DISTANCE_ANGLES, ROBOT_MAX_SENSOR_DISTANCE
+
+Direction = Tuple[float, float]
+
+class SensorLayout:
+    """Distance sensor rig of a robot class: ray angles (degrees, relative to the heading) and range.
+
+    Set it as ``SENSORS`` on a Robot subclass. The unit vectors of all rays
+    are tabulated up front for every heading on the ``heading_step`` grid and
+    shared by every robot using the layout; a heading is rounded to the
+    nearest grid heading before the lookup. Integer turns with the default
+    1 degree step read exactly. Otherwise a ray is off by at most half a step,
+    i.e. ``max_distance * sin(heading_step / 2)`` at full range (0.87 px for
+    the stock 100 px sensors). Pass ``heading_step=None`` to compute exact
+    directions on every read instead.
+    """
+
+    def __init__(self,
+                angles: Sequence[float] = ROBOT_DISTANCE_ANGLES,
+                max_distance: float = ROBOT_MAX_SENSOR_DISTANCE,
+                heading_step: float = 1.0):
+        if not angles:
+            raise ValueError("A sensor layout needs at least one angle")
+        if max_distance <= 0:
+            raise ValueError(F"max_distance must be positive, got {max_distance}")
+        self.angles = tuple(angles)
+        self.max_distance = max_distance
+        self.heading_step = heading_step
+        self._templates: Tuple[Tuple[Direction, ...], ...] = ()
+        if heading_step is not None:
+            count = round(360.0 / heading_step) if heading_step > 0 else 0
+            if count < 1 or not math.isclose(count * heading_step, 360.0):
+                raise ValueError(F"heading_step must divide 360 degrees, got {heading_step}")
+            self._templates = tuple(self._compute(i * heading_step) for i in range(count))
+
+    @classmethod
+    def uniform(cls, count: int, max_distance: float = ROBOT_MAX_SENSOR_DISTANCE, offset: float = 0.0, heading_step: float = 1.0) -> 'SensorLayout':
+        """``count`` rays evenly spaced around the robot, the first at ``offset`` degrees."""
+        return cls([offset + 360.0 * k / count for k in range(count)], max_distance, heading_step)
+
+    def __len__(self) -> int:
+        return len(self.angles)
+
+    def _compute(self, heading: float) -> Tuple[Direction, ...]:
+        # Robot.turn() is clockwise on screen, hence the negated angle
+        directions = []
+        for angle in self.angles:
+            rad_angle = math.radians(-(heading + angle))
+            directions.append((math.cos(rad_angle), math.sin(rad_angle)))
+        return tuple(directions)
+
+    def directions(self, heading: float) -> Tuple[Direction, ...]:
+        """Unit vector of every ray for a robot facing ``heading``, see the class docstring."""
+        if self.heading_step is None:
+            return self._compute(heading)
+        return self._templates[round(heading / self.heading_step) % len(self._templates)]
+
+# Layout of the stock 8 IR sensors
+DEFAULT_SENSORS = SensorLayout()
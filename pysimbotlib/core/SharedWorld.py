@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+
+import sys
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from .Geom import Geom
+from .SpatialIndex import ObstacleGrid
+from .Global import SIMBOTMAP_SIZE
+
+class SharedWorld:
+    """Map geometry, spawn tables and result buffers held in shared memory.
+
+    The coordinator calls ``SharedWorld.create(...)`` (or ``Headless.create_shared_world``)
+    and hands ``spec`` (a small picklable dict) to each worker, which calls
+    ``SharedWorld.attach(spec)`` and passes the world to ``create_simbot``.
+    Every array is a numpy view over the shared block, so nothing is copied or
+    pickled in either direction, and the obstacle grid is built only once.
+    """
+
+    RESULT_FIELDS = ('fitness', 'eat_count', 'collision_count', 'x', 'y', 'direction')
+    FITNESS, EAT_COUNT, COLLISION_COUNT, X, Y, DIRECTION = range(len(RESULT_FIELDS))
+
+    # name -> (columns, dtype); the row count is chosen at creation time
+    _LAYOUT = {
+        'obstacles': (4, np.float64),        # x, y, w, h
+        'robot_spawns': (3, np.float64),     # x, y, direction
+        'objective_spawns': (2, np.float64), # x, y
+        'free_positions': (2, np.float64),   # x, y, see Simbot.set_obstacles
+        'grid_start': (1, np.int32),         # ObstacleGrid arrays of the obstacles
+        'grid_items': (1, np.int32),
+        'results': (len(RESULT_FIELDS), np.float64),
+    }
+
+    def __init__(self, spec: Dict, blocks: Dict[str, shared_memory.SharedMemory], owner: bool):
+        self.spec = spec
+        self._blocks = blocks
+        self._owner = owner
+        self._arrays = {}
+        for name, (columns, dtype) in self._LAYOUT.items():
+            rows = spec['rows'][name]
+            self._arrays[name] = np.ndarray((rows, columns), dtype=dtype, buffer=blocks[name].buf)
+        self._obstacle_bboxes = None
+        self._free_positions = None
+        self._grid = None
+
+    @staticmethod
+    def compile_obstacles(obstacles: Iterable) -> np.ndarray:
+        bboxes = [(obs.x, obs.y, obs.width, obs.height) for obs in obstacles]
+        return np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+
+    @classmethod
+    def create(cls,
+            obstacle_bboxes: Sequence[Geom.BBox],
+            num_results: int,
+            robot_spawns: Sequence[Tuple[float, float, float]] = (),
+            objective_spawns: Sequence[Geom.Point2D] = (),
+            world_size: Tuple[int, int] = SIMBOTMAP_SIZE,
+            free_positions: Sequence[Geom.Point2D] = (),
+            grid: ObstacleGrid = None) -> 'SharedWorld':
+        obstacles = np.asarray(obstacle_bboxes, dtype=np.float64).reshape(-1, 4)
+        if grid is None:
+            grid = ObstacleGrid.build(obstacles.tolist(), world_size)
+        sources = {
+            'obstacles': obstacles,
+            'robot_spawns': np.asarray(robot_spawns, dtype=np.float64).reshape(-1, 3),
+            'objective_spawns': np.asarray(objective_spawns, dtype=np.float64).reshape(-1, 2),
+            'free_positions': np.asarray(free_positions, dtype=np.float64).reshape(-1, 2),
+            'grid_start': np.asarray(grid.start, dtype=np.int32).reshape(-1, 1),
+            'grid_items': np.asarray(grid.items, dtype=np.int32).reshape(-1, 1),
+            'results': np.zeros((num_results, len(cls.RESULT_FIELDS)), dtype=np.float64),
+        }
+        blocks = {}
+        spec = {'names': {}, 'rows': {}, 'world_size': tuple(int(v) for v in grid.world_size)}
+        try:
+            for name, array in sources.items():
+                # zero-sized blocks are not allowed, so keep at least one byte around
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks[name] = block
+                spec['names'][name] = block.name
+                spec['rows'][name] = array.shape[0]
+        except Exception:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+            raise
+        world = cls(spec, blocks, owner=True)
+        for name, array in sources.items():
+            world._arrays[name][:] = array
+        return world
+
+    @classmethod
+    def from_simbot(cls, simbot, num_results: int, **kwargs) -> 'SharedWorld':
+        return cls.create(simbot.obstacle_bboxes, num_results, world_size=simbot.world_size, grid=simbot.obstacle_grid, **kwargs)
+
+    @classmethod
+    def from_generated_map(cls, generated, num_results: int, **kwargs) -> 'SharedWorld':
+        return cls.create(generated.obstacles, num_results, world_size=generated.world_size,
+                          free_positions=generated.free_positions, grid=generated.grid(), **kwargs)
+
+    @classmethod
+    def attach(cls, spec: Dict) -> 'SharedWorld':
+        blocks = {}
+        for name, block_name in spec['names'].items():
+            blocks[name] = cls._attach_block(block_name)
+        return cls(spec, blocks, owner=False)
+
+    @staticmethod
+    def _attach_block(block_name: str) -> shared_memory.SharedMemory:
+        # The coordinator owns the blocks and unlinks them. Before python 3.13
+        # attaching also registers the block with the resource tracker, which
+        # unlinks whatever is still registered when it shuts down. Processes
+        # started by multiprocessing (fork, spawn and forkserver alike) share
+        # the coordinator's tracker, where the name is already registered, so
+        # the registration is a no-op and unlink() drops it. Unregistering here
+        # would drop the coordinator's entry instead.
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=block_name, track=False)
+        return shared_memory.SharedMemory(name=block_name)
+
+    @property
+    def world_size(self) -> Tuple[int, int]:
+        return tuple(self.spec['world_size'])
+
+    @property
+    def obstacles(self) -> np.ndarray:
+        return self._arrays['obstacles']
+
+    @property
+    def robot_spawns(self) -> np.ndarray:
+        return self._arrays['robot_spawns']
+
+    @property
+    def objective_spawns(self) -> np.ndarray:
+        return self._arrays['objective_spawns']
+
+    @property
+    def results(self) -> np.ndarray:
+        return self._arrays['results']
+
+    def grid(self) -> ObstacleGrid:
+        # views over the shared blocks, nothing is copied
+        if self._grid is None:
+            self._grid = ObstacleGrid(self.world_size, self._arrays['grid_start'][:, 0], self._arrays['grid_items'][:, 0])
+        return self._grid
+
+    def apply(self, simbot) -> None:
+        """Give ``simbot`` this world's size, obstacles, spawn table and obstacle grid."""
+        if self._free_positions is None:
+            self._free_positions = tuple(tuple(pos) for pos in self._arrays['free_positions'].tolist())
+        simbot.set_world_size(self.world_size)
+        simbot.set_obstacles(self.obstacle_bboxes(), free_positions=self._free_positions or None, grid=self.grid())
+
+    def obstacle_bboxes(self) -> Tuple[Geom.BBox, ...]:
+        # Robot sensing hashes the bboxes for its distance cache, so hand out tuples.
+        if self._obstacle_bboxes is None:
+            self._obstacle_bboxes = tuple(tuple(bbox) for bbox in self.obstacles.tolist())
+        return self._obstacle_bboxes
+
+    def apply_spawns(self, simbot, first_slot: int = 0) -> None:
+        spawns = self.robot_spawns
+        for i, robot in enumerate(simbot.robots, start=first_slot):
+            if i >= len(spawns):
+                break
+            x, y, direction = spawns[i]
+            robot.pos = (x, y)
+            robot._direction = direction
+        for obj, (x, y) in zip(simbot.objectives, self.objective_spawns):
+            obj.pos = (x, y)
+
+    def write_result(self, slot: int, robot, fitness: float = None) -> None:
+        row = self.results[slot]
+        row[self.FITNESS] = getattr(robot, 'fitness', 0) if fitness is None else fitness
+        row[self.EAT_COUNT] = robot.eat_count
+        row[self.COLLISION_COUNT] = robot.collision_count
+        row[self.X], row[self.Y] = robot.pos
+        row[self.DIRECTION] = robot._direction
+
+    def write_results(self, robots: Iterable, first_slot: int = 0) -> None:
+        for slot, robot in enumerate(robots, start=first_slot):
+            self.write_result(slot, robot)
+
+    def close(self) -> None:
+        self._grid = None
+        self._arrays.clear()
+        for block in self._blocks.values():
+            block.close()
+
+    def unlink(self) -> None:
+        if not self._owner:
+            return
+        for block in self._blocks.values():
+            block.unlink()
+
+    def __enter__(self) -> 'SharedWorld':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        self.unlink()
@@ -3,16 +3,20 @@
 from kivy.uix.widget import Widget
 from kivy.properties import NumericProperty, ObjectProperty, StringProperty
 from kivy.logger import Logger
-from kivy.core.window import Window
 from kivy.uix.boxlayout import BoxLayout
 
+import copy
 import random
 import csv
+from concurrent.futures import ThreadPoolExecutor
 
-from .Obstacle import ObstacleWrapper
+from .Obstacle import Obstacle, ObstacleWrapper
 from .Objective import ObjectiveWrapper, Objective
-from .Robot import RobotWrapper
-from .Global import SIMBOTMAP_SIZE
+from .Robot import Robot, RobotWrapper
+from .Snapshot import SimbotSnapshot
+from .Events import EventStream, EventType
+from .SpatialIndex import ObstacleGrid
+from .Global import SIMBOTMAP_SIZE, HISTORY_COLUMNS, world_bounding_lines
 
 class Simbot(BoxLayout):
     
@@ -28,7 +32,8 @@ class Simbot(BoxLayout):
     eat_count = NumericProperty(0)
     food_move_count = NumericProperty(0)
     score = NumericProperty(0)
-    scoreStr = StringProperty("")
+    # status text shown by the themes, refreshed at a capped rate by core.Hud
+    hud_text = StringProperty("")
 
     def __init__(self, 
                 robot_cls, 
@@ -39,13 +44,26 @@ class Simbot(BoxLayout):
                 customfn_create_robots = None, 
                 customfn_before_simulation = None,
                 customfn_after_simulation = None,
+                customfn_before_tick = None,
                 simulation_forever = False,
                 food_move_after_eat = True,
                 save_wasd_history = False,
                 robot_see_each_other = False,
+                shared_world = None,
+                checkpoint_path = None,
+                checkpoint_interval = 0,
+                termination = None,
+                tick_mode = 'sequential',
+                decide_workers = 0,
+                reuse_widgets = False,
+                world_size = SIMBOTMAP_SIZE,
+                writer = None,
                 **kwargs):
         super(Simbot, self).__init__(**kwargs)
 
+        # world dimensions and walls; sensors, collisions and spawns all read them from here
+        self.set_world_size(world_size)
+
         # initialize obstacles, objectives, and robot wrapper
         self._obstacles = ObstacleWrapper()
         self._objectives = ObjectiveWrapper()
@@ -53,6 +71,12 @@ class Simbot(BoxLayout):
         self._objective_list = []
         self._robot_list = []
 
+        # with reuse_widgets, reset() parks robots and objectives here instead of
+        # destroying them, and the next generation resets them in place
+        self.reuse_widgets = reuse_widgets
+        self._robot_pool = []
+        self._objective_pool = []
+
         # initialize robot creator function/params
         if customfn_create_robots:
             self.customfn_create_robots = customfn_create_robots
@@ -68,10 +92,48 @@ class Simbot(BoxLayout):
         # intialize simulation parameters
         self._before_simulation = customfn_before_simulation if customfn_before_simulation else lambda simbot: None
         self._after_simulation = customfn_after_simulation if customfn_after_simulation else lambda simbot: None
+        self._before_tick = customfn_before_tick if customfn_before_tick else lambda simbot: None
         self.simulation_forever = simulation_forever
         self.food_move_after_eat = food_move_after_eat
         self.save_wasd_history = save_wasd_history
         self.robot_see_each_other = robot_see_each_other
+        # Writer.OutputWriter taking the history files off the tick; None writes them in place
+        self.writer = writer
+
+        self._obstacle_bboxes = None
+        self._custom_obstacles = False
+        # candidate spawn positions known to be obstacle-free, see set_obstacles
+        self._free_positions = None
+
+        # periodic snapshot of a running simulation, every checkpoint_interval ticks
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+
+        # typed eat/collision/stuck/spawn/generation events, dispatched once per tick
+        self.events = EventStream()
+
+        # early-termination predicates, checked after every tick
+        self.termination = list(termination) if termination else []
+        self.finished = False
+        self.termination_reason = None
+
+        # 'sequential': every robot senses, moves and eats in turn (the original behaviour)
+        # 'synchronous': all robots sense the same world, then decide, then act in index order
+        if tick_mode not in ('sequential', 'synchronous'):
+            raise ValueError(F"Invalid tick_mode: {tick_mode}. The valid values are 'sequential' and 'synchronous'")
+        self.tick_mode = tick_mode
+        # the decide threads live for one simulation, see _shutdown_decide_pool
+        self.decide_workers = decide_workers
+        self._decide_pool = None
+
+        # per-phase timings, set to a Hud.PhaseTimer when the stats panel is shown
+        self.phase_timer = None
+
+        # SharedWorld.SharedWorld attached by a pool worker: its world size, obstacles,
+        # spawn table and grid replace the map's, and the obstacle widgets follow them
+        self.shared_world = shared_world
+        if shared_world is not None:
+            shared_world.apply(self)
     
     @property
     def robots(self):
@@ -81,60 +143,201 @@ class Simbot(BoxLayout):
     def obstacles(self):
         return self._obstacles.get_obstacles()
 
+    @property
+    def obstacle_bboxes(self):
+        if self._obstacle_bboxes is None:
+            self._obstacle_bboxes = tuple((obs.x, obs.y, obs.width, obs.height) for obs in self.obstacles)
+        return self._obstacle_bboxes
+
+    def set_obstacles(self, bboxes, free_positions = None, grid = None):
+        """Replace the map's obstacles with (x, y, w, h) boxes, e.g. from MapGen.
+
+        With ``free_positions`` random spawns draw from that table instead of
+        the whole map. ``grid`` is a prebuilt ObstacleGrid of ``bboxes`` for
+        this world; without it the grid is built on first use. Obstacle
+        widgets are only rebuilt once the Simbot is shown (see PySimbotMap),
+        so headless runs never create them.
+        """
+        if grid is not None and grid.world_size != tuple(self.world_size):
+            raise ValueError(F"Grid of a {grid.world_size} world does not fit a {self.world_size} world")
+        self._obstacle_bboxes = tuple(tuple(bbox) for bbox in bboxes)
+        self._set_obstacle_grid(grid)
+        self._free_positions = free_positions
+        self._custom_obstacles = True
+        if self._obstacles.parent is not None:
+            self._sync_obstacle_widgets()
+
+    def _sync_obstacle_widgets(self):
+        self._obstacles.clear_widgets()
+        for x, y, w, h in self._obstacle_bboxes:
+            self._obstacles.add_widget(Obstacle(pos=(x, y), size=(w, h)))
+
+    def set_world_size(self, world_size):
+        self.world_size = (world_size[0], world_size[1])
+        self.bounding_lines = world_bounding_lines(self.world_size)
+        # the grid covers the world, so it is rebuilt for the new size on first use
+        self._set_obstacle_grid(None)
+
+    def _set_obstacle_grid(self, grid):
+        self._obstacle_grid = grid
+        self._obstacles_in_cache = {}
+
+    @property
+    def obstacle_grid(self):
+        if self._obstacle_grid is None:
+            self._obstacle_grid = ObstacleGrid.build(self.obstacle_bboxes, self.world_size)
+        return self._obstacle_grid
+
+    def obstacles_in(self, x, y, w, h):
+        """Obstacle boxes in the grid cells touched by (x, y, w, h), in map order."""
+        grid = self.obstacle_grid
+        key = grid.cell_range(x, y, w, h)
+        found = self._obstacles_in_cache.get(key)
+        if found is None:
+            # memoized per cell range, so sensors hashing the result for their cache get the same tuple back
+            bboxes = self.obstacle_bboxes
+            found = tuple(bboxes[i] for i in grid.query(x, y, w, h))
+            if len(self._obstacles_in_cache) >= 1 << 16:
+                self._obstacles_in_cache.clear()
+            self._obstacles_in_cache[key] = found
+        return found
+
+    def _random_pos(self, widget):
+        if self._free_positions:
+            return self._free_positions[random.randrange(len(self._free_positions))]
+        return (random.randrange(self.world_size[0] - widget.size[0]), random.randrange(self.world_size[1] - widget.size[1]))
+
     @property
     def objectives(self):
         return self._objectives.get_objectives()
 
+    @property
+    def scoreStr(self):
+        # formatted on read instead of on every eat
+        return str(self.score) + " %" if self.food_move_after_eat else str(self.score)
+
     def _create_robots(self):
-        self._robot_list = self.customfn_create_robots() if hasattr(self, 'customfn_create_robots') else [self.robot_cls() for _ in range(self.num_robots)]
-        for r in self._robot_list:
+        reuse = self._robot_pool and not hasattr(self, 'customfn_create_robots') and len(self._robot_pool) == self.num_robots
+        if reuse:
+            self._robot_list, self._robot_pool = self._robot_pool, []
+            for r in self._robot_list:
+                r.reset()
+        else:
+            self._remove_all_robots_from_map()
+            self._robot_list = self.customfn_create_robots() if hasattr(self, 'customfn_create_robots') else [self.robot_cls() for _ in range(self.num_robots)]
+        for i, r in enumerate(self._robot_list):
+            r._index = i
             r.pos = self.robot_default_start_pos
             trial_count = 0
             while not self.is_robot_pos_valid(r):
-                r.pos = (random.randrange(SIMBOTMAP_SIZE[0] - r.size[0]), random.randrange(SIMBOTMAP_SIZE[1] - r.size[1]))
+                r.pos = self._random_pos(r)
                 r._direction = random.randrange(360)
                 trial_count += 1
                 if trial_count == 500:
                     raise Exception("Can't find the place for spawning robots")
             r._sm = self
-            self._robots.add_widget(r)
+            if not reuse:
+                self._robots.add_widget(r)
+            self.events.emit(self.iteration, EventType.SPAWN, i, r.x, r.y)
 
     def _create_objectives(self):
-        self._objective_list = [Objective() for _ in range(self.num_objectives)]
+        reuse = len(self._objective_pool) == self.num_objectives
+        if reuse:
+            self._objective_list, self._objective_pool = self._objective_pool, []
+            for obj in self._objective_list:
+                obj.pos = (0, 0)
+        else:
+            self._remove_all_objectives_from_map()
+            self._objective_list = [Objective() for _ in range(self.num_objectives)]
         for obj in self._objective_list:
             obj.pos = self.obj_default_start_pos
             trial_count = 0
             while not self.is_objective_pos_valid(obj):
-                obj.pos = (random.randrange(SIMBOTMAP_SIZE[0] - obj.size[0]), random.randrange(SIMBOTMAP_SIZE[1] - obj.size[1]))
+                obj.pos = self._random_pos(obj)
                 trial_count += 1
                 if trial_count == 500:
                     raise Exception("Can't find the place for spawning objective")
-            self._objectives.add_widget(obj)
+            if not reuse:
+                self._objectives.add_widget(obj)
 
     def _remove_all_robots_from_map(self):
         self._robots.clear_widgets()
         self._robot_list.clear()
+        self._robot_pool = []
 
     def _remove_all_objectives_from_map(self):
         self._objectives.clear_widgets()
         self._objective_list.clear()
+        self._objective_pool = []
+
+    def reset(self):
+        if self.reuse_widgets:
+            # keep the widgets (and their canvas instructions) on the map for the next generation
+            self._robot_pool, self._robot_list = self._robot_list, []
+            self._objective_pool, self._objective_list = self._objective_list, []
+        else:
+            self._remove_all_robots_from_map()
+            self._remove_all_objectives_from_map()
+        self.iteration = 0
 
     def _reset_stats(self):
         self.eat_count = 0
         self.food_move_count = 0
         self.score = 0
-        if self.food_move_after_eat:
-            self.scoreStr = str(self.score) + " %"
-        else:
-            self.scoreStr = str(self.score)
 
     def add_history(self, robot, turn, move):
         distance = robot.distance()
         angle = robot.smell()
         if not self.history:
-            self.history.append(("ir0", "ir1", "ir2", "ir3", "ir4", "ir5", "ir6", "ir7", "angle", "turn", "move"))
+            self.history.append(HISTORY_COLUMNS)
         self.history.append(list(distance) + [angle, turn, move])
 
+    def snapshot(self):
+        return SimbotSnapshot.capture(self)
+
+    def restore(self, snapshot, restore_random_state = True):
+        robot_classes = [cls for cls, _ in snapshot.robots]
+        if [type(r) for r in self._robot_list] != robot_classes:
+            self._remove_all_robots_from_map()
+            self._robot_list = [cls() for cls in robot_classes]
+            for r in self._robot_list:
+                r._sm = self
+                self._robots.add_widget(r)
+        for i, (r, (_, state)) in enumerate(zip(self._robot_list, snapshot.robots)):
+            r._index = i
+            r.set_state(state)
+
+        if len(self._objective_list) != len(snapshot.objectives):
+            self._remove_all_objectives_from_map()
+            self._objective_list = [Objective() for _ in snapshot.objectives]
+            for obj in self._objective_list:
+                self._objectives.add_widget(obj)
+        for obj, pos in zip(self._objective_list, snapshot.objectives):
+            obj.pos = pos
+
+        for name, value in snapshot.stats.items():
+            # scoreStr is a read-only property now; snapshots saved before that still carry it
+            if name != 'scoreStr':
+                setattr(self, name, value)
+        self.history = copy.deepcopy(snapshot.history)
+        self.simulation_count = snapshot.simulation_count
+        self.iteration = snapshot.iteration
+        self.finished = False
+        self.termination_reason = None
+        # the predicates continue where they were; snapshots without their state start them over
+        states = getattr(snapshot, 'termination', None)
+        if states is not None and len(states) == len(self.termination):
+            for predicate, state in zip(self.termination, states):
+                predicate.set_state(self, state)
+        else:
+            for predicate in self.termination:
+                predicate.reset(self)
+        if restore_random_state:
+            snapshot.restore_random_state()
+
+    def save_checkpoint(self, path = None):
+        self.snapshot().save(path or self.checkpoint_path)
+
     def process(self, dt):
         if self.iteration == 0:
             self._reset_stats()
@@ -143,49 +346,112 @@ class Simbot(BoxLayout):
             self._before_simulation(self)
             self.history = []
             self.simulation_count += 1
+            self.finished = False
+            self.termination_reason = None
+            for predicate in self.termination:
+                predicate.reset(self)
             Logger.debug('Map: Start Simulation')
             self.iteration += 1
 
-        elif self.iteration < self.max_tick:
+        elif not self.finished and self.iteration < self.max_tick:
             self.iteration += 1
-            Logger.debug('Map: Start Iteration')
-            for robot in self._robots.get_robots():
-                robot.update()
-            Logger.debug('Map: End Iteration: {}'.format(self.iteration))
+            timer = self.phase_timer
+            if timer:
+                timer.start()
+            self._before_tick(self)
+            if timer:
+                timer.mark('before_tick')
+            if self.tick_mode == 'synchronous':
+                self._tick_synchronous(timer)
+            else:
+                for robot in self._robots.get_robots():
+                    if not robot.frozen:
+                        robot.update()
+                if timer:
+                    timer.mark('update')
+            self.events.dispatch()
+            if timer:
+                timer.mark('events')
+
+            if self.checkpoint_path and self.checkpoint_interval and self.iteration % self.checkpoint_interval == 0:
+                self.save_checkpoint()
 
             if self.iteration == self.max_tick:
-                self._after_simulation(self)
-                if self.save_wasd_history:
-                    Logger.debug("History: Saving History")
-                    with open('history{0}.csv'.format(self.simulation_count), 'w', newline='') as out_file:
-                        csv_writer = csv.writer(out_file)
-                        csv_writer.writerows(self.history if self.history else [["No history"]])
-
-                Logger.debug('Map: End Simulation: {}'.format(self.simulation_count))
-                if self.simulation_forever:
-                    self._remove_all_robots_from_map()
-                    self._remove_all_objectives_from_map()
-                    self.iteration = 0
-    
+                self._end_simulation('max_tick')
+            elif self._robot_list and all(r.frozen for r in self._robot_list):
+                self._end_simulation('all_robots_frozen')
+            else:
+                for predicate in self.termination:
+                    if predicate(self):
+                        self._end_simulation(predicate.reason)
+                        break
+
+    def _tick_synchronous(self, timer = None):
+        # robot-robot conflicts are resolved by applying actions in spawn index order
+        robots = sorted((r for r in self._robot_list if not r.frozen), key=lambda r: r._index)
+        for robot in robots:
+            robot.sense()
+        if timer:
+            timer.mark('sense')
+        if self.decide_workers:
+            if self._decide_pool is None:
+                self._decide_pool = ThreadPoolExecutor(max_workers=self.decide_workers)
+            # list() surfaces exceptions raised by update() in the worker threads
+            list(self._decide_pool.map(Robot.decide, robots))
+        else:
+            for robot in robots:
+                robot.decide()
+        if timer:
+            timer.mark('decide')
+        for robot in robots:
+            robot.act()
+        if timer:
+            timer.mark('act')
+
+    def _shutdown_decide_pool(self):
+        if self._decide_pool is not None:
+            self._decide_pool.shutdown(wait=True)
+            self._decide_pool = None
+
+    def _end_simulation(self, reason):
+        self.finished = True
+        self.termination_reason = reason
+        self._shutdown_decide_pool()
+        self._after_simulation(self)
+        if self.save_wasd_history:
+            Logger.debug("History: Saving History")
+            history_path = 'history{0}.csv'.format(self.simulation_count)
+            rows = self.history if self.history else [["No history"]]
+            if self.writer is not None:
+                self.writer.write_csv(history_path, rows)
+            else:
+                with open(history_path, 'w', newline='') as out_file:
+                    csv_writer = csv.writer(out_file)
+                    csv_writer.writerows(rows)
+
+        self.events.emit(self.iteration, EventType.GENERATION_END)
+        self.events.dispatch()
+        Logger.debug('Map: End Simulation: %d (%s)', self.simulation_count, reason)
+        if self.simulation_forever:
+            self.reset()
+
     def on_robot_eat(self, robot, obj):
         self.eat_count += 1
         if self.food_move_after_eat:
             self.food_move_count += 1
             self.change_objective_pos(obj)
             self.score = int(self.eat_count * 100 / self.food_move_count)
-            self.scoreStr = str(self.score) + " %"
         else:
             self.score += 5
-            self.scoreStr = str(self.score)
 
     def change_objective_pos(self, obj, pos=None):
         if pos:
             obj.pos = pos
         else:
-            obj.pos = (random.randrange(SIMBOTMAP_SIZE[0]-obj.size[0]), random.randrange(SIMBOTMAP_SIZE[1]-obj.size[1]))
+            obj.pos = self._random_pos(obj)
             trial_count = 0
             while not self.is_objective_pos_valid(obj):
-                obj.pos = (random.randrange(SIMBOTMAP_SIZE[0]-obj.size[0]), random.randrange(SIMBOTMAP_SIZE[1]-obj.size[1]))
+                obj.pos = self._random_pos(obj)
                 trial_count += 1
                 if trial_count == 500:
                     raise Exception("Can't find the place for spawning food")
@@ -193,15 +459,15 @@ class Simbot(BoxLayout):
     def is_objective_pos_valid(self, obj):
         pos = obj.pos
         # check wall
-        if pos[0] <= 0 or pos[0] >= SIMBOTMAP_SIZE[0] - obj.size[0]:
+        if pos[0] <= 0 or pos[0] >= self.world_size[0] - obj.size[0]:
             return False
-        if pos[1] <= 0 or pos[1] >= SIMBOTMAP_SIZE[1] - obj.size[1]:
+        if pos[1] <= 0 or pos[1] >= self.world_size[1] - obj.size[1]:
             return False
 
         # check obstacles
-        for obs in self.obstacles:
-            if (obs.pos[0] <= pos[0] <= obs.pos[0] + obs.size[0] or obs.pos[0] <= pos[0] + obj.size[0] <= obs.pos[0] + obs.size[0])\
-                and (obs.pos[1] <= pos[1] <= obs.pos[1] + obs.size[1] or obs.pos[1] <= pos[1] + obj.size[1] <= obs.pos[1] + obs.size[1]):
+        for obs_x, obs_y, obs_w, obs_h in self.obstacles_in(pos[0], pos[1], obj.size[0], obj.size[1]):
+            if (obs_x <= pos[0] <= obs_x + obs_w or obs_x <= pos[0] + obj.size[0] <= obs_x + obs_w)\
+                and (obs_y <= pos[1] <= obs_y + obs_h or obs_y <= pos[1] + obj.size[1] <= obs_y + obs_h):
                 return False
 
         # check robots
@@ -222,15 +488,15 @@ class Simbot(BoxLayout):
 
     def is_robot_pos_valid(self, robot):
         pos = robot.pos
-        if pos[0] <= 0 or pos[0] >= SIMBOTMAP_SIZE[0] - robot.size[0]:
+        if pos[0] <= 0 or pos[0] >= self.world_size[0] - robot.size[0]:
             return False
-        if pos[1] <= 0 or pos[1] >= SIMBOTMAP_SIZE[1] - robot.size[1]:
+        if pos[1] <= 0 or pos[1] >= self.world_size[1] - robot.size[1]:
             return False
 
         # check obstacles
-        for obs in self.obstacles:
-            if (obs.pos[0] <= pos[0] <= obs.pos[0] + obs.size[0] or obs.pos[0] <= pos[0] + robot.size[0] <= obs.pos[0] + obs.size[0])\
-                and (obs.pos[1] <= pos[1] <= obs.pos[1] + obs.size[1] or obs.pos[1] <= pos[1] + robot.size[1] <= obs.pos[1] + obs.size[1]):
+        for obs_x, obs_y, obs_w, obs_h in self.obstacles_in(pos[0], pos[1], robot.size[0], robot.size[1]):
+            if (obs_x <= pos[0] <= obs_x + obs_w or obs_x <= pos[0] + robot.size[0] <= obs_x + obs_w)\
+                and (obs_y <= pos[1] <= obs_y + obs_h or obs_y <= pos[1] + robot.size[1] <= obs_y + obs_h):
                 return False
 
         # check other robots
@@ -245,32 +511,108 @@ class Simbot(BoxLayout):
         return True
 
 class PySimbotMap(Widget):
+    """The view of a Simbot's world on screen.
+
+    A world larger than the view is seen through a camera (arrow keys, c to
+    center it). The StencilView only clips pixels: the widget path still
+    submits every robot, objective and obstacle canvas each frame. So
+    ``batch_render`` defaults to the BatchRenderer for such worlds, which
+    draws only what is inside ``view_rect``. It stays off for worlds that fit
+    the view. Forcing it off for a large world logs a warning.
+    """
+
+    CAMERA_STEP = 100
+    CAMERA_KEYS = {
+        'left': (-CAMERA_STEP, 0),
+        'right': (CAMERA_STEP, 0),
+        'up': (0, CAMERA_STEP),
+        'down': (0, -CAMERA_STEP),
+    }
+
     def __init__(self,
                 simbot,
                 enable_wasd_control = False,
                 save_wasd_history = False,
+                batch_render = None,
                 **kwargs):
         super(PySimbotMap, self).__init__(**kwargs)
+        # imported here: kivy opens the window on import, and Simbot itself must stay usable headless
+        from kivy.core.window import Window
         self._keyboard = Window.request_keyboard(self._keyboard_closed, self)
         self._keyboard.bind(on_key_down=self._on_keyboard_down)
         self.enable_wasd_control = enable_wasd_control
         self.save_wasd_history = save_wasd_history
-
-        self.add_widget(simbot._obstacles)
-        self.add_widget(simbot._objectives)
-        self.add_widget(simbot._robots)
-        
         self.simbot = simbot
+        # the view on screen keeps its size; a larger world is seen through a camera
         self.size = SIMBOTMAP_SIZE
+        self.camera = [0, 0]
+
+        large_world = simbot.world_size[0] > SIMBOTMAP_SIZE[0] or simbot.world_size[1] > SIMBOTMAP_SIZE[1]
+        if batch_render is None:
+            batch_render = large_world
+        elif large_world and not batch_render:
+            Logger.warning('Map: batch_render is off for a %dx%d world, every widget is drawn each frame', *simbot.world_size)
+
+        if large_world:
+            from kivy.uix.stencilview import StencilView
+            from kivy.graphics import PushMatrix, PopMatrix, Translate
+            view = StencilView(pos=self.pos, size=self.size)
+            self.bind(pos=view.setter('pos'))
+            content = Widget()
+            with content.canvas.before:
+                PushMatrix()
+                self._translate = Translate(0, 0)
+            with content.canvas.after:
+                PopMatrix()
+            view.add_widget(content)
+            self.add_widget(view)
+        else:
+            self._translate = None
+            content = self
+
+        if batch_render:
+            # robots, objectives and the obstacles in view are drawn as meshes instead of one canvas per widget
+            from .BatchRenderer import BatchRenderer
+            self.renderer = BatchRenderer(simbot, view = self.view_rect)
+            content.add_widget(self.renderer)
+        else:
+            self.renderer = None
+            if simbot._custom_obstacles:
+                simbot._sync_obstacle_widgets()
+            content.add_widget(simbot._obstacles)
+            content.add_widget(simbot._objectives)
+            content.add_widget(simbot._robots)
+
+    def view_rect(self):
+        """Visible part of the world as (x, y, w, h)."""
+        return (self.camera[0], self.camera[1], self.width, self.height)
+
+    def move_camera(self, dx, dy):
+        if self._translate is None:
+            return
+        world_w, world_h = self.simbot.world_size
+        self.camera[0] = min(max(self.camera[0] + dx, 0), max(world_w - self.width, 0))
+        self.camera[1] = min(max(self.camera[1] + dy, 0), max(world_h - self.height, 0))
+        self._translate.xy = (-self.camera[0], -self.camera[1])
+
+    def center_camera(self, x, y):
+        self.move_camera(x - 0.5 * self.width - self.camera[0], y - 0.5 * self.height - self.camera[1])
     
     def _keyboard_closed(self):
         self._keyboard.unbind(on_key_down=self._on_keyboard_down)
         self._keyboard = None
     
     def _on_keyboard_down(self, keyboard, keycode, text, modifiers):
+        # arrow keys pan the camera, c centers it on the first robot
+        if keycode[1] in self.CAMERA_KEYS:
+            self.move_camera(*self.CAMERA_KEYS[keycode[1]])
+            return
+        if keycode[1] == 'c' and self.simbot.robots:
+            self.center_camera(*self.simbot.robots[0].center)
+            return
         if not self.simbot.robots:
             return
-        if self.simbot.iteration >= self.simbot.max_tick:
+        if self.simbot.finished:
             return
         if keycode[1] == 'n':
             for obj in self.simbot.objectives:
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+
+import os
+import copy
+import pickle
+import random
+import zlib
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+class SimbotSnapshot:
+    """Frozen copy of a running simulation.
+
+    A snapshot holds plain data only (no widgets), so it can be restored into the
+    same ``Simbot`` many times to branch variants, or written to disk with
+    ``save`` and loaded back later to resume a long run.
+    """
+
+    VERSION = 1
+
+    def __init__(self,
+                iteration: int,
+                simulation_count: int,
+                stats: Dict[str, Any],
+                robots: Sequence[Tuple[type, Dict[str, Any]]],
+                objectives: Sequence[Tuple[float, float]],
+                history: List,
+                random_state: Tuple,
+                numpy_random_state: Tuple,
+                termination: List = None):
+        self.iteration = iteration
+        self.simulation_count = simulation_count
+        self.stats = stats
+        self.robots = robots
+        self.objectives = objectives
+        self.history = history
+        self.random_state = random_state
+        self.numpy_random_state = numpy_random_state
+        # TerminationPredicate.get_state of each predicate, in order
+        self.termination = termination
+
+    @classmethod
+    def capture(cls, simbot) -> 'SimbotSnapshot':
+        return cls(
+            iteration=int(simbot.iteration),
+            simulation_count=int(simbot.simulation_count),
+            stats={
+                'eat_count': simbot.eat_count,
+                'food_move_count': simbot.food_move_count,
+                'score': simbot.score,
+            },
+            robots=[(type(r), r.get_state()) for r in simbot.robots],
+            objectives=[tuple(obj.pos) for obj in simbot.objectives],
+            history=copy.deepcopy(getattr(simbot, 'history', [])),
+            random_state=random.getstate(),
+            numpy_random_state=np.random.get_state(),
+            termination=[predicate.get_state(simbot) for predicate in simbot.termination],
+        )
+
+    def restore_random_state(self) -> None:
+        random.setstate(self.random_state)
+        np.random.set_state(self.numpy_random_state)
+
+    def to_bytes(self) -> bytes:
+        payload = (self.VERSION, self.__dict__)
+        return zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SimbotSnapshot':
+        version, fields = pickle.loads(zlib.decompress(data))
+        if version != cls.VERSION:
+            raise ValueError(F"Unsupported snapshot version: {version}. Expected {cls.VERSION}")
+        snapshot = cls.__new__(cls)
+        snapshot.__dict__.update(fields)
+        return snapshot
+
+    def save(self, path: str) -> None:
+        # write next to the target and swap it in, so a crash never leaves a torn file
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as out_file:
+            out_file.write(self.to_bytes())
+            out_file.flush()
+            os.fsync(out_file.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SimbotSnapshot':
+        with open(path, 'rb') as in_file:
+            return cls.from_bytes(in_file.read())
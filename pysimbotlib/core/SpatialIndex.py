@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .Geom import Geom
+from .Global import OBSTACLE_GRID_CELL
+
+class ObstacleGrid:
+    """Uniform grid over (x, y, w, h) boxes, stored as two flat arrays (CSR layout).
+
+    The indices of the boxes touching cell ``i`` (row-major, ``cols`` cells per
+    row) are ``items[start[i]:start[i + 1]]``. Boxes and queries reaching past
+    the world are clamped to the border cells. The plain arrays are what
+    MapGen caches on disk and SharedWorld puts in shared memory, so a map's
+    index is built only once.
+    """
+
+    def __init__(self, world_size: Tuple[int, int], start: np.ndarray, items: np.ndarray, cell_size: int = OBSTACLE_GRID_CELL):
+        self.world_size = (int(world_size[0]), int(world_size[1]))
+        self.cell_size = cell_size
+        self.cols, self.rows = self.shape(self.world_size, cell_size)
+        if len(start) != self.cols * self.rows + 1:
+            raise ValueError(F"Grid of {len(start) - 1} cells does not match a {self.cols} x {self.rows} world grid")
+        self.start = start
+        self.items = items
+
+    @staticmethod
+    def shape(world_size: Tuple[int, int], cell_size: int = OBSTACLE_GRID_CELL) -> Tuple[int, int]:
+        return max(1, -(-int(world_size[0]) // cell_size)), max(1, -(-int(world_size[1]) // cell_size))
+
+    @classmethod
+    def build(cls, bboxes: Sequence[Geom.BBox], world_size: Tuple[int, int], cell_size: int = OBSTACLE_GRID_CELL) -> 'ObstacleGrid':
+        cols, rows = cls.shape(world_size, cell_size)
+        grid = cls(world_size, np.zeros(cols * rows + 1, dtype=np.int32), np.empty(0, dtype=np.int32), cell_size)
+        cells = [[] for _ in range(cols * rows)]
+        for i, (x, y, w, h) in enumerate(bboxes):
+            x0, y0, x1, y1 = grid.cell_range(x, y, w, h)
+            for cy in range(y0, y1 + 1):
+                for cx in range(x0, x1 + 1):
+                    cells[cy * cols + cx].append(i)
+        grid.start = np.cumsum([0] + [len(cell) for cell in cells]).astype(np.int32)
+        grid.items = np.array([i for cell in cells for i in cell], dtype=np.int32)
+        return grid
+
+    def cell_range(self, x: float, y: float, w: float = 0.0, h: float = 0.0) -> Tuple[int, int, int, int]:
+        """First and last (column, row) touched by (x, y, w, h), clamped to the grid."""
+        size = self.cell_size
+        return (min(max(int(x // size), 0), self.cols - 1),
+                min(max(int(y // size), 0), self.rows - 1),
+                min(max(int((x + w) // size), 0), self.cols - 1),
+                min(max(int((y + h) // size), 0), self.rows - 1))
+
+    def query(self, x: float, y: float, w: float = 0.0, h: float = 0.0) -> List[int]:
+        """Sorted indices of the boxes in the cells touched by (x, y, w, h)."""
+        x0, y0, x1, y1 = self.cell_range(x, y, w, h)
+        start, items = self.start, self.items
+        found = set()
+        for cy in range(y0, y1 + 1):
+            row = cy * self.cols
+            found.update(items[start[row + x0]:start[row + x1 + 1]].tolist())
+        return sorted(found)
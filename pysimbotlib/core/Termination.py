@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+
+import copy
+import time
+from typing import Any, Dict, Tuple
+
+class TerminationPredicate:
+    """Ends a simulation before ``max_tick`` once it returns True.
+
+    ``reset`` is called when a simulation starts, ``__call__`` after every tick.
+    ``get_state``/``set_state`` carry the counters through Simbot snapshots;
+    by default they copy the instance attributes. Frozen robots count as
+    finished for every predicate here.
+    """
+
+    reason = 'predicate'
+
+    def reset(self, simbot) -> None:
+        pass
+
+    def get_state(self, simbot) -> Any:
+        return copy.deepcopy(self.__dict__)
+
+    def set_state(self, simbot, state: Any) -> None:
+        self.__dict__.update(copy.deepcopy(state))
+
+    def __call__(self, simbot) -> bool:
+        raise NotImplementedError
+
+class AllRobotsStuck(TerminationPredicate):
+
+    reason = 'all_robots_stuck'
+
+    def __init__(self, ticks: int = 50):
+        self.ticks = ticks
+        self._count = 0
+
+    def reset(self, simbot) -> None:
+        self._count = 0
+
+    def __call__(self, simbot) -> bool:
+        if all(r.frozen or r.stuck for r in simbot.robots):
+            self._count += 1
+        else:
+            self._count = 0
+        return self._count >= self.ticks
+
+class EatCountReached(TerminationPredicate):
+
+    reason = 'eat_count_reached'
+
+    def __init__(self, target: int, per_robot: bool = False):
+        self.target = target
+        self.per_robot = per_robot
+
+    def __call__(self, simbot) -> bool:
+        if self.per_robot:
+            return all(r.frozen or r.eat_count >= self.target for r in simbot.robots)
+        return simbot.eat_count >= self.target
+
+class NoPoseChange(TerminationPredicate):
+    """No robot moved or turned for ``ticks`` ticks.
+
+    A robot pushing into a wall keeps its pose but still collides every tick,
+    which its fitness may count, so a robot whose collision_count went up
+    counts as changed.
+    """
+
+    reason = 'no_pose_change'
+
+    def __init__(self, ticks: int = 50, tolerance: float = 0.0):
+        self.ticks = ticks
+        self.tolerance = tolerance
+        self._count = 0
+        # (x, y, direction, collision_count) keyed by the robot's index, which survives a snapshot restore
+        self._poses: Dict[int, Tuple[float, float, float, int]] = {}
+
+    def reset(self, simbot) -> None:
+        self._count = 0
+        self._poses = {}
+
+    def __call__(self, simbot) -> bool:
+        changed = False
+        tol = self.tolerance
+        for i, r in enumerate(simbot.robots):
+            if r.frozen:
+                continue
+            pose = (r.x, r.y, r._direction, r.collision_count)
+            last = self._poses.get(i)
+            self._poses[i] = pose
+            if last is None or pose[3] != last[3] or any(abs(a - b) > tol for a, b in zip(pose[:3], last[:3])):
+                changed = True
+        self._count = 0 if changed else self._count + 1
+        return self._count >= self.ticks
+
+class WallClockBudget(TerminationPredicate):
+
+    reason = 'wall_clock_budget'
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._start = 0.0
+
+    def reset(self, simbot) -> None:
+        self._start = time.perf_counter()
+
+    # the elapsed time is kept, not the start, so a restored run gets what was left of the budget
+    def get_state(self, simbot) -> Any:
+        return time.perf_counter() - self._start
+
+    def set_state(self, simbot, state: Any) -> None:
+        self._start = time.perf_counter() - state
+
+    def __call__(self, simbot) -> bool:
+        return time.perf_counter() - self._start >= self.seconds
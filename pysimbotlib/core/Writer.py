@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+
+import os
+import csv
+import atexit
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Sequence
+
+from kivy.logger import Logger
+
+class OutputWriter:
+    """Background thread doing the file output of a run off the simulation thread.
+
+    Jobs run in submission order. A job submitted with a ``key`` (the helpers
+    use the output path) replaces a still-pending job with the same key, so a
+    file rewritten every generation is only written in its latest state.
+    At most ``max_pending`` jobs wait in the queue: ``submit`` blocks beyond
+    that, so a slow disk slows the simulation down instead of piling up
+    memory. ``close`` (also registered with atexit) runs every pending job
+    before returning; call it from a ``finally`` to keep output on Ctrl-C.
+    """
+
+    def __init__(self, max_pending: int = 16):
+        if max_pending < 1:
+            raise ValueError(F"max_pending must be at least 1, got {max_pending}")
+        self.max_pending = max_pending
+        self.written = 0
+        self.coalesced = 0
+        self.stalls = 0
+        self._jobs = OrderedDict()
+        self._ids = itertools.count()
+        self._closed = False
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='OutputWriter', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, fn: Callable[..., Any], *args, key: Hashable = None, **kwargs) -> None:
+        """Run ``fn(*args, **kwargs)`` on the writer thread; its arguments must not change afterwards."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("OutputWriter is closed")
+            if key is not None and key in self._jobs:
+                self._jobs[key] = (fn, args, kwargs)
+                self.coalesced += 1
+                return
+            if len(self._jobs) >= self.max_pending:
+                self.stalls += 1
+                while len(self._jobs) >= self.max_pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    raise RuntimeError("OutputWriter is closed")
+            self._jobs[('job', next(self._ids)) if key is None else key] = (fn, args, kwargs)
+            self._cond.notify_all()
+
+    def write_csv(self, path: str, rows: Iterable[Sequence], **fmtparams) -> None:
+        # the rows are copied here, so the caller may keep appending to its lists
+        self.submit(_write_csv, path, [list(row) for row in rows], key=path, **fmtparams)
+
+    def plot(self, path: str, draw: Callable[..., None], *args, dpi: int = 300, figsize = (10, 6)) -> None:
+        """Render ``draw(figure, *args)`` to ``path``.
+
+        The figure is a plain matplotlib ``Figure``: pyplot keeps global state
+        and must stay on the main thread, so ``draw`` should only use the
+        figure's own methods (``figure.subplots()``, ``ax.plot``...).
+        """
+        self.submit(_plot, path, draw, args, dpi, figsize, key=path)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                key, (fn, args, kwargs) = self._jobs.popitem(last=False)
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                fn(*args, **kwargs)
+                self.written += 1
+            except Exception as e:
+                Logger.error('Writer: job %s failed: %s', key, e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Block until every job submitted so far is done."""
+        with self._cond:
+            while self._jobs or self._busy:
+                self._cond.wait()
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed and not self._thread.is_alive():
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
+        Logger.debug('Writer: %d jobs written, %d coalesced, %d stalls', self.written, self.coalesced, self.stalls)
+
+def _write_csv(path: str, rows, **fmtparams) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as out_file:
+        csv.writer(out_file, **fmtparams).writerows(rows)
+    os.replace(tmp_path, path)
+
+def _plot(path: str, draw, args, dpi, figsize) -> None:
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=figsize)
+    draw(figure, *args)
+    figure.savefig(path, dpi=dpi, bbox_inches='tight')
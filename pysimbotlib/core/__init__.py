@@ -2,5 +2,20 @@ from .Robot import Robot
 # from .Objective import Objective
 # from .Obstacle import Obstacle
 from .Simbot import Simbot
-from .App import PySimbotApp
-# from .Geom import Geom
\ No newline at end of file
+# from .Geom import Geom
+from .SharedWorld import SharedWorld
+from .Snapshot import SimbotSnapshot
+from .Events import EventStream, EventType, Telemetry
+from .Termination import TerminationPredicate, AllRobotsStuck, EatCountReached, NoPoseChange, WallClockBudget
+from .MapGen import GeneratedMap, MapSuite, generate_map
+from .Sensor import SensorLayout
+from .Lidar import VisibilityPolygon, visibility_polygon
+from .Writer import OutputWriter
+
+def __getattr__(name):
+    # App imports kivy.core.window, which opens a window as a side effect.
+    # Load it on first use so headless workers never create one.
+    if name == 'PySimbotApp':
+        from .App import PySimbotApp
+        return PySimbotApp
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+
+import os
+import json
+import random
+import multiprocessing as mp
+from typing import Dict, Iterable, List
+
+import numpy as np
+from kivy.logger import Logger
+
+from ..core.Global import history_columns
+from ..core.Headless import create_simbot, create_shared_world, init_worker, worker_world, run_simulation
+
+MANIFEST_FILE = 'manifest.json'
+SHARD_FILE = 'shard-{:06d}.npy'
+
+class _RowSink:
+    def __init__(self, capacity: int, width: int):
+        self.rows = np.empty((capacity, width), dtype=np.float32)
+        self.count = 0
+
+class _Recording:
+    """Mixin recording (ir0..irN, angle, turn, move) for every update() of a robot.
+
+    The sensors are the readings the controller receives: those of the sense
+    phase under synchronous ticks, otherwise one sense() taken right before
+    update() and served to it until the robot first turns or moves. Turn and
+    move are the totals of the calls the controller made during that update.
+    """
+
+    _sink = None
+    _turn_total = 0.0
+    _move_total = 0.0
+
+    def update(self):
+        if self._sensed_distance is None:
+            self.sense()
+        distance = self._sensed_distance
+        smell = self._sensed_smell
+        self._turn_total = 0.0
+        self._move_total = 0.0
+        super().update()
+        self._drop_readings()
+        sink = self._sink
+        if sink.count < len(sink.rows):
+            row = sink.rows[sink.count]
+            row[:-3] = distance
+            row[-3] = smell[0] if smell else 0.0
+            row[-2] = self._turn_total
+            row[-1] = self._move_total
+            sink.count += 1
+
+    def _drop_readings(self):
+        # outside the synchronous decide phase the readings are stale once the robot acted
+        if self._actions is None:
+            self._sensed_distance = self._sensed_smell = self._sensed_smell_nearest = None
+
+    def turn(self, degree=1.0):
+        self._turn_total += degree
+        super().turn(degree)
+        self._drop_readings()
+
+    def move(self, step=1):
+        self._move_total += step
+        super().move(step)
+        self._drop_readings()
+
+_recording_classes = {}
+
+def recording_class(robot_cls):
+    if robot_cls not in _recording_classes:
+        _recording_classes[robot_cls] = type('Recording' + robot_cls.__name__, (_Recording, robot_cls), {})
+    return _recording_classes[robot_cls]
+
+_simbots = {}
+
+def _generate_shard(task: Dict) -> Dict:
+    # the map is the pool's SharedWorld, so only the robot count varies per worker
+    key = task['num_robots']
+    if key not in _simbots:
+        _simbots[key] = create_simbot(num_robots=task['num_robots'], shared_world=worker_world(), **task['simbot_kwargs'])
+    simbot = _simbots[key]
+    simbot.max_tick = task['max_tick']
+
+    random.seed(task['seed'])
+    np.random.seed(task['seed'] % (2 ** 32))
+    sink = _RowSink(task['num_robots'] * task['max_tick'], len(task['columns']))
+    cls = recording_class(task['robot_cls'])
+    robots = []
+    for _ in range(task['num_robots']):
+        robot = cls()
+        robot._sink = sink
+        robots.append(robot)
+    run_simulation(simbot, robots=robots)
+
+    path = os.path.join(task['out_dir'], SHARD_FILE.format(task['shard']))
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, sink.rows[:sink.count])
+    os.replace(tmp_path, path)
+    return {'file': os.path.basename(path), 'rows': sink.count, 'seed': task['seed']}
+
+def generate_dataset(robot_cls,
+                    out_dir: str,
+                    seeds: Iterable[int] = tuple(range(16)),
+                    num_robots = 10,
+                    max_tick = 4000,
+                    map = 'default',
+                    processes = None,
+                    **simbot_kwargs) -> Dict:
+    """Run ``robot_cls`` headless over ``seeds`` and write one .npy shard per seed.
+
+    Each shard is a float32 (rows, sensors + 3) array in the manifest's
+    ``columns`` order: one ir column per sensor of ``robot_cls.SENSORS`` (11
+    columns, ``HISTORY_COLUMNS``, with the stock layout), then angle, turn and
+    move. It is written atomically as soon as its simulation ends.
+    ``manifest.json`` lists the shards and is written last. Load the result
+    with ``load_dataset``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    columns = history_columns(len(robot_cls.SENSORS))
+    tasks = [{
+        'columns': columns,
+        'robot_cls': robot_cls,
+        'seed': seed,
+        'shard': shard,
+        'out_dir': out_dir,
+        'num_robots': num_robots,
+        'max_tick': max_tick,
+        'simbot_kwargs': simbot_kwargs,
+    } for shard, seed in enumerate(seeds)]
+
+    shards = []
+    with create_shared_world(map) as world, \
+            mp.get_context().Pool(processes, initializer=init_worker, initargs=(world.spec,)) as pool:
+        for shard in pool.imap_unordered(_generate_shard, tasks):
+            shards.append(shard)
+            Logger.info("Dataset: %s done, %d rows (%d/%d)", shard['file'], shard['rows'], len(shards), len(tasks))
+
+    shards.sort(key=lambda shard: shard['file'])
+    manifest = {
+        'columns': list(columns),
+        'dtype': 'float32',
+        'robot_cls': '{}.{}'.format(robot_cls.__module__, robot_cls.__qualname__),
+        'map': map if isinstance(map, str) else map.name,
+        'num_robots': num_robots,
+        'max_tick': max_tick,
+        'total_rows': sum(shard['rows'] for shard in shards),
+        'shards': shards,
+    }
+    tmp_path = os.path.join(out_dir, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w') as out_file:
+        json.dump(manifest, out_file, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_FILE))
+    return manifest
+
+def load_dataset(out_dir: str) -> List[np.ndarray]:
+    """Memory-map every shard listed in the manifest; nothing is read until sliced."""
+    with open(os.path.join(out_dir, MANIFEST_FILE)) as in_file:
+        manifest = json.load(in_file)
+    return [np.load(os.path.join(out_dir, shard['file']), mmap_mode='r') for shard in manifest['shards']]
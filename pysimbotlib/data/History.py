@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+
+import os
+import csv
+import json
+import struct
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from ..core.Global import HISTORY_COLUMNS
+
+MAGIC = b'PSHIST01'
+ALIGNMENT = 64
+DEFAULT_FEATURES = HISTORY_COLUMNS[:9]
+DEFAULT_TARGETS = HISTORY_COLUMNS[9:]
+
+def _csv_rows(path: str) -> Iterator[List[str]]:
+    with open(path, newline='') as in_file:
+        for row in csv.reader(in_file):
+            # skip the header row and the placeholder of an empty session
+            if len(row) != len(HISTORY_COLUMNS) or row[0] == HISTORY_COLUMNS[0]:
+                continue
+            yield row
+
+def _write_header(out_file, rows: int) -> int:
+    header = json.dumps({
+        'columns': list(HISTORY_COLUMNS),
+        'dtype': 'float32',
+        'rows': rows,
+        'layout': 'columnar',
+    }).encode('utf-8')
+    prefix = len(MAGIC) + 4
+    data_offset = -(-(prefix + len(header)) // ALIGNMENT) * ALIGNMENT
+    out_file.write(MAGIC)
+    out_file.write(struct.pack('<I', len(header)))
+    out_file.write(header.ljust(data_offset - prefix, b' '))
+    return data_offset
+
+def convert_history(sources: Iterable[str], out_path: str, chunk_rows: int = 65536) -> 'HistoryDataset':
+    """Convert ``history*.csv`` files (or .npy shards from ``generate_dataset``) once.
+
+    The output is a small JSON header followed by one contiguous float32 block
+    per column. Rows are streamed in ``chunk_rows`` pieces, so sources larger
+    than memory convert fine.
+    """
+    sources = list(sources)
+    counts = []
+    for path in sources:
+        if path.endswith('.npy'):
+            counts.append(np.load(path, mmap_mode='r').shape[0])
+        else:
+            counts.append(sum(1 for _ in _csv_rows(path)))
+    rows = sum(counts)
+
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as out_file:
+        data_offset = _write_header(out_file, rows)
+        out_file.truncate(data_offset + rows * len(HISTORY_COLUMNS) * 4)
+    if rows:
+        data = np.memmap(tmp_path, dtype=np.float32, mode='r+', offset=data_offset, shape=(len(HISTORY_COLUMNS), rows))
+        start = 0
+        for path, count in zip(sources, counts):
+            if path.endswith('.npy'):
+                shard = np.load(path, mmap_mode='r')
+                for i in range(0, count, chunk_rows):
+                    block = shard[i:i + chunk_rows]
+                    data[:, start:start + len(block)] = block.T
+                    start += len(block)
+            else:
+                chunk = []
+                for row in _csv_rows(path):
+                    chunk.append(row)
+                    if len(chunk) == chunk_rows:
+                        data[:, start:start + len(chunk)] = np.asarray(chunk, dtype=np.float32).T
+                        start += len(chunk)
+                        chunk = []
+                if chunk:
+                    data[:, start:start + len(chunk)] = np.asarray(chunk, dtype=np.float32).T
+                    start += len(chunk)
+        data.flush()
+        del data
+    os.replace(tmp_path, out_path)
+    return HistoryDataset(out_path)
+
+class HistoryDataset:
+    """Read-only, memory-mapped view of a file written by ``convert_history``.
+
+    ``batches`` yields (inputs, targets) as (batch, n) arrays. In order they
+    are views straight into the mapping (unless the columns are not adjacent).
+    Shuffled, every batch draws its rows from one permutation of the whole
+    file, so consecutive ticks of a robot are spread over different batches;
+    those rows are gathered into a copy, in file order within the batch to
+    keep the reads local.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as in_file:
+            if in_file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(F"{path} is not a history dataset")
+            header_len, = struct.unpack('<I', in_file.read(4))
+            header = json.loads(in_file.read(header_len).decode('utf-8'))
+        prefix = len(MAGIC) + 4
+        data_offset = -(-(prefix + header_len) // ALIGNMENT) * ALIGNMENT
+        self.path = path
+        self.columns: Tuple[str, ...] = tuple(header['columns'])
+        self.rows: int = header['rows']
+        if self.rows:
+            self.data = np.memmap(path, dtype=np.dtype(header['dtype']), mode='r', offset=data_offset, shape=(len(self.columns), self.rows))
+        else:
+            self.data = np.empty((len(self.columns), 0), dtype=np.dtype(header['dtype']))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> np.ndarray:
+        return self.data[self.columns.index(name)]
+
+    def _select(self, names: Sequence[str]):
+        index = [self.columns.index(name) for name in names]
+        if index == list(range(index[0], index[0] + len(index))):
+            return slice(index[0], index[-1] + 1)
+        return index
+
+    def batches(self,
+                batch_size: int = 256,
+                features: Sequence[str] = DEFAULT_FEATURES,
+                targets: Sequence[str] = DEFAULT_TARGETS,
+                shuffle: bool = True,
+                rng: np.random.Generator = None,
+                drop_last: bool = False) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        feature_index = self._select(features)
+        target_index = self._select(targets)
+        starts = np.arange(0, self.rows, batch_size)
+        if drop_last and len(starts) and self.rows % batch_size:
+            starts = starts[:-1]
+        if not shuffle:
+            for start in starts.tolist():
+                stop = min(start + batch_size, self.rows)
+                yield self.data[feature_index, start:stop].T, self.data[target_index, start:stop].T
+            return
+        order = (rng or np.random.default_rng()).permutation(self.rows)
+        for start in starts.tolist():
+            rows = np.sort(order[start:start + batch_size])
+            yield self._gather(feature_index, rows).T, self._gather(target_index, rows).T
+
+    def _gather(self, index, rows: np.ndarray) -> np.ndarray:
+        if isinstance(index, slice):
+            return self.data[index][:, rows]
+        return self.data[np.ix_(index, rows)]
@@ -0,0 +1,2 @@
+from .Dataset import generate_dataset, load_dataset, recording_class
+from .History import convert_history, HistoryDataset
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+
+import io
+import os
+import json
+import random
+import threading
+from typing import Any, Dict, Sequence
+
+import numpy as np
+from kivy.logger import Logger
+
+class GACheckpoint:
+    """Everything needed to resume a GA run: population, history, RNGs, generation.
+
+    Saved as a compressed ``.npz`` archive (plain numpy arrays, no pickle) and
+    written atomically, so a crash mid-write leaves the previous checkpoint intact.
+    """
+
+    VERSION = 1
+
+    def __init__(self,
+                generation: int,
+                population: np.ndarray,
+                best_fitness_values: Sequence[float] = (),
+                avg_fitness_values: Sequence[float] = (),
+                random_state: tuple = None,
+                rng_state: Dict[str, Any] = None):
+        self.generation = generation
+        self.population = np.array(population, dtype=np.uint8)
+        self.best_fitness_values = [float(v) for v in best_fitness_values]
+        self.avg_fitness_values = [float(v) for v in avg_fitness_values]
+        self.random_state = random_state if random_state is not None else random.getstate()
+        self.rng_state = rng_state
+
+    @classmethod
+    def capture(cls, generation: int, population: np.ndarray, best_fitness_values, avg_fitness_values, rng: np.random.Generator = None) -> 'GACheckpoint':
+        return cls(generation, population, best_fitness_values, avg_fitness_values,
+                random_state=random.getstate(),
+                rng_state=rng.bit_generator.state if rng is not None else None)
+
+    def restore_random_state(self, rng: np.random.Generator = None) -> None:
+        random.setstate(self.random_state)
+        if rng is not None and self.rng_state is not None:
+            rng.bit_generator.state = self.rng_state
+
+    def to_bytes(self) -> bytes:
+        version, internal_state, gauss = self.random_state
+        meta = {
+            'version': self.VERSION,
+            'generation': self.generation,
+            'random_version': version,
+            'random_gauss': gauss,
+            'rng_state': self.rng_state,
+        }
+        buf = io.BytesIO()
+        np.savez_compressed(buf,
+                            meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+                            population=self.population,
+                            best_fitness=np.asarray(self.best_fitness_values, dtype=np.float64),
+                            avg_fitness=np.asarray(self.avg_fitness_values, dtype=np.float64),
+                            random_internal=np.asarray(internal_state, dtype=np.uint32))
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'GACheckpoint':
+        with np.load(io.BytesIO(data)) as archive:
+            meta = json.loads(archive['meta'].tobytes().decode('utf-8'))
+            if meta['version'] != cls.VERSION:
+                raise ValueError(F"Unsupported checkpoint version: {meta['version']}. Expected {cls.VERSION}")
+            random_state = (meta['random_version'], tuple(int(v) for v in archive['random_internal']), meta['random_gauss'])
+            return cls(meta['generation'],
+                    archive['population'],
+                    archive['best_fitness'].tolist(),
+                    archive['avg_fitness'].tolist(),
+                    random_state=random_state,
+                    rng_state=meta['rng_state'])
+
+    def save(self, path: str) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as out_file:
+            out_file.write(self.to_bytes())
+            out_file.flush()
+            os.fsync(out_file.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'GACheckpoint':
+        with open(path, 'rb') as in_file:
+            return cls.from_bytes(in_file.read())
+
+class CheckpointWriter:
+    """Writes checkpoints on a background thread.
+
+    ``submit`` only stores a reference and returns. If a newer checkpoint arrives
+    before the previous one was written, the older one is skipped: only the latest
+    state matters for resuming.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pending = None
+        self._closed = False
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='CheckpointWriter', daemon=True)
+        self._thread.start()
+
+    def submit(self, checkpoint: GACheckpoint) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("CheckpointWriter is closed")
+            self._pending = checkpoint
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                checkpoint, self._pending = self._pending, None
+                self._busy = True
+            try:
+                checkpoint.save(self.path)
+                Logger.debug('Checkpoint: generation %d saved to %s', checkpoint.generation, self.path)
+            except Exception as e:
+                Logger.error('Checkpoint: failed to write %s: %s', self.path, e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self) -> None:
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
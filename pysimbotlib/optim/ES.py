@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+
+import random
+from typing import Any, Callable, List, NamedTuple, Sequence
+
+import numpy as np
+from kivy.logger import Logger
+
+from ..core.Headless import create_simbot, run_simulation
+from .Racing import partial_fitness
+
+def centered_ranks(fitness: np.ndarray) -> np.ndarray:
+    """Fitness shaping: ranks mapped linearly onto [-0.5, 0.5], best highest."""
+    fitness = np.asarray(fitness, dtype=np.float64)
+    ranks = np.empty(len(fitness))
+    ranks[np.argsort(fitness, kind='stable')] = np.arange(len(fitness))
+    return ranks / max(len(fitness) - 1, 1) - 0.5
+
+def _set_params(robot, params: np.ndarray) -> None:
+    # NeuralController and FuzzyController evaluate a robot with its own params
+    robot.params = params
+
+class BatchEvaluator:
+    """Scores a (population, dim) parameter matrix in one headless simulation per seed.
+
+    ``apply_fn(robot, row)`` loads a parameter vector into a fresh robot. By
+    default it sets ``robot.params``, which a NeuralRobot or FuzzyRobot driven
+    by its controller (``customfn_before_tick``) uses in place of the
+    controller's DenseForward weights or rule base (``params()`` gives the
+    starting point). All candidates share the same seeds, so
+    with ``food_move_after_eat=False`` and robots that cannot see each other
+    their scores differ only by their parameters.
+    """
+
+    def __init__(self,
+                robot_cls,
+                apply_fn: Callable[[Any, np.ndarray], None] = _set_params,
+                fitness_fn: Callable[[Any, Any], float] = partial_fitness,
+                seeds: Sequence[int] = (0,),
+                simbot = None,
+                **simbot_kwargs):
+        self.robot_cls = robot_cls
+        self.apply_fn = apply_fn
+        self.fitness_fn = fitness_fn
+        self.seeds = list(seeds)
+        simbot_kwargs.setdefault('food_move_after_eat', False)
+        self.simbot = simbot or create_simbot(robot_cls=robot_cls, **simbot_kwargs)
+        self.ticks = 0
+
+    def __call__(self, population: np.ndarray, seeds: Sequence[int] = None) -> np.ndarray:
+        seeds = self.seeds if seeds is None else list(seeds)
+        fitness = np.zeros(len(population))
+        for seed in seeds:
+            random.seed(seed)
+            robots = []
+            for row in population:
+                robot = self.robot_cls()
+                self.apply_fn(robot, row)
+                robots.append(robot)
+            run_simulation(self.simbot, robots=robots)
+            self.ticks += self.simbot.iteration * len(robots)
+            fitness += [self.fitness_fn(self.simbot, robot) for robot in robots]
+        return fitness / len(seeds)
+
+class OpenAIES:
+    """Natural-gradient ES with antithetic sampling and centered-rank shaping.
+
+    ``ask`` returns ``mean ± sigma * eps`` pairs; ``tell`` estimates the gradient
+    from the shaped fitness differences of each pair and takes a momentum step.
+    Maximizes fitness.
+    """
+
+    def __init__(self,
+                x0: Sequence[float],
+                sigma: float = 0.1,
+                learning_rate: float = 0.05,
+                population_size: int = 50,
+                momentum: float = 0.9,
+                weight_decay: float = 0.0,
+                rng: np.random.Generator = None):
+        if population_size < 2 or population_size % 2:
+            raise ValueError(F"population_size must be even for antithetic sampling, got {population_size}")
+        self.mean = np.array(x0, dtype=np.float64)
+        self.sigma = sigma
+        self.learning_rate = learning_rate
+        self.population_size = population_size
+        self.momentum = momentum
+        self.weight_decay = weight_decay
+        self.rng = rng or np.random.default_rng()
+        self._velocity = np.zeros_like(self.mean)
+        self._eps = None
+
+    def ask(self) -> np.ndarray:
+        half = self.rng.standard_normal((self.population_size // 2, len(self.mean)))
+        self._eps = np.concatenate((half, -half))
+        return self.mean + self.sigma * self._eps
+
+    def tell(self, fitness: np.ndarray) -> None:
+        shaped = centered_ranks(fitness)
+        half = self.population_size // 2
+        # each antithetic pair contributes (f+ - f-) * eps, cancelling the shared noise
+        gradient = (shaped[:half] - shaped[half:]) @ self._eps[:half] / (self.population_size * self.sigma)
+        gradient -= self.weight_decay * self.mean
+        self._velocity = self.momentum * self._velocity + self.learning_rate * gradient
+        self.mean = self.mean + self._velocity
+
+class CMAES:
+    """(mu/mu_w, lambda)-CMA-ES with cumulative step-size adaptation.
+
+    With ``mirrored=True`` the second half of every population mirrors the
+    first (``mean - y`` for each ``mean + y``), the antithetic variant of CMA-ES.
+    Maximizes fitness.
+    """
+
+    def __init__(self,
+                x0: Sequence[float],
+                sigma: float = 0.3,
+                population_size: int = None,
+                mirrored: bool = True,
+                rng: np.random.Generator = None):
+        self.mean = np.array(x0, dtype=np.float64)
+        n = len(self.mean)
+        self.sigma = sigma
+        self.population_size = population_size or 4 + int(3 * np.log(n))
+        if mirrored and self.population_size % 2:
+            self.population_size += 1
+        self.mirrored = mirrored
+        self.rng = rng or np.random.default_rng()
+
+        mu = self.population_size // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self.weights = weights / weights.sum()
+        self.mu = mu
+        self.mu_eff = 1.0 / np.sum(self.weights ** 2)
+        self.c_sigma = (self.mu_eff + 2) / (n + self.mu_eff + 5)
+        self.d_sigma = 1 + 2 * max(0.0, np.sqrt((self.mu_eff - 1) / (n + 1)) - 1) + self.c_sigma
+        self.c_c = (4 + self.mu_eff / n) / (n + 4 + 2 * self.mu_eff / n)
+        self.c_1 = 2 / ((n + 1.3) ** 2 + self.mu_eff)
+        self.c_mu = min(1 - self.c_1, 2 * (self.mu_eff - 2 + 1 / self.mu_eff) / ((n + 2) ** 2 + self.mu_eff))
+        self.chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        self.C = np.eye(n)
+        self.p_sigma = np.zeros(n)
+        self.p_c = np.zeros(n)
+        self._B = np.eye(n)
+        self._D = np.ones(n)
+        self._y = None
+        self.generation = 0
+
+    def ask(self) -> np.ndarray:
+        n = len(self.mean)
+        count = self.population_size // 2 if self.mirrored else self.population_size
+        z = self.rng.standard_normal((count, n))
+        y = (z * self._D) @ self._B.T
+        if self.mirrored:
+            y = np.concatenate((y, -y))
+        self._y = y
+        return self.mean + self.sigma * y
+
+    def tell(self, fitness: np.ndarray) -> None:
+        n = len(self.mean)
+        order = np.argsort(-np.asarray(fitness), kind='stable')[:self.mu]
+        y_w = self.weights @ self._y[order]
+        self.mean = self.mean + self.sigma * y_w
+        self.generation += 1
+
+        inv_sqrt_C = self._B @ np.diag(1 / self._D) @ self._B.T
+        self.p_sigma = (1 - self.c_sigma) * self.p_sigma + np.sqrt(self.c_sigma * (2 - self.c_sigma) * self.mu_eff) * inv_sqrt_C @ y_w
+        norm = np.linalg.norm(self.p_sigma)
+        h_sigma = norm / np.sqrt(1 - (1 - self.c_sigma) ** (2 * self.generation)) < (1.4 + 2 / (n + 1)) * self.chi_n
+        self.p_c = (1 - self.c_c) * self.p_c + h_sigma * np.sqrt(self.c_c * (2 - self.c_c) * self.mu_eff) * y_w
+
+        rank_mu = (self.weights[:, None] * self._y[order]).T @ self._y[order]
+        self.C = ((1 - self.c_1 - self.c_mu) * self.C
+                  + self.c_1 * (np.outer(self.p_c, self.p_c) + (not h_sigma) * self.c_c * (2 - self.c_c) * self.C)
+                  + self.c_mu * rank_mu)
+        self.sigma *= np.exp((self.c_sigma / self.d_sigma) * (norm / self.chi_n - 1))
+
+        self.C = (self.C + self.C.T) / 2
+        eigenvalues, self._B = np.linalg.eigh(self.C)
+        self._D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+class ESResult(NamedTuple):
+    best_params: np.ndarray
+    best_fitness: float
+    best_fitness_values: List[float]
+    mean_fitness_values: List[float]
+    ticks: int
+
+def optimize(strategy, evaluate: Callable[[np.ndarray], np.ndarray], generations: int = 50, seed_per_generation = True, on_generation: Callable[[int, np.ndarray, np.ndarray], None] = None) -> ESResult:
+    """Run ask/evaluate/tell for ``generations``.
+
+    With ``seed_per_generation`` and a BatchEvaluator, generation ``g`` is
+    scored on the evaluator's seeds shifted by ``g``: one common seed set for
+    the whole population, fresh from one generation to the next.
+    """
+    best_params, best_fitness = None, -np.inf
+    best_values, mean_values = [], []
+    for generation in range(generations):
+        population = strategy.ask()
+        if seed_per_generation and isinstance(evaluate, BatchEvaluator):
+            fitness = evaluate(population, [seed + generation * len(evaluate.seeds) for seed in evaluate.seeds])
+        else:
+            fitness = np.asarray(evaluate(population), dtype=np.float64)
+        strategy.tell(fitness)
+        i = int(np.argmax(fitness))
+        if fitness[i] > best_fitness:
+            best_params, best_fitness = population[i].copy(), float(fitness[i])
+        best_values.append(float(fitness[i]))
+        mean_values.append(float(fitness.mean()))
+        Logger.info("ES: generation %d - best %.2f, mean %.2f, sigma %.4f", generation, best_values[-1], mean_values[-1], float(np.mean(strategy.sigma)))
+        if on_generation:
+            on_generation(generation, population, fitness)
+    ticks = evaluate.ticks if isinstance(evaluate, BatchEvaluator) else 0
+    return ESResult(best_params, best_fitness, best_values, mean_values, ticks)
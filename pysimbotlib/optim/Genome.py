@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+
+from typing import List, Tuple
+
+import numpy as np
+
+class GenomePool:
+    """A whole population of rule genomes stored as one (P, rules, genes) uint8 array.
+
+    Selection, crossover and mutation work on the full array at once, so a new
+    generation costs a handful of numpy operations instead of a Python loop and
+    a ``deepcopy`` per child.
+    """
+
+    NUM_RULES = 16
+    RULE_LENGTH = 11
+
+    def __init__(self, genes: np.ndarray):
+        if genes.ndim != 3:
+            raise ValueError(F"Genome array must be (population, rules, genes), got shape {genes.shape}")
+        self.genes = np.ascontiguousarray(genes, dtype=np.uint8)
+
+    @classmethod
+    def random(cls, population_size: int, rng: np.random.Generator, num_rules: int = NUM_RULES, rule_length: int = RULE_LENGTH) -> 'GenomePool':
+        return cls(rng.integers(0, 256, size=(population_size, num_rules, rule_length), dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return self.genes.shape[0]
+
+    def rules(self, index: int) -> List[List[int]]:
+        # Nested python lists are what the robot controllers iterate over fastest.
+        return self.genes[index].tolist()
+
+    @staticmethod
+    def rank_select(fitness: np.ndarray, count: int, selection_pressure: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """Pick ``count`` parent pairs uniformly among the ``selection_pressure`` best.
+
+        Mirrors the assignment's ``random.randrange(n) % pressure`` scheme and,
+        like it, never pairs an individual with itself.
+        """
+        population_size = len(fitness)
+        pressure = max(1, min(selection_pressure, population_size))
+        order = np.argsort(-np.asarray(fitness), kind='stable')
+        rank1 = rng.integers(0, population_size, size=count) % pressure
+        rank2 = rng.integers(0, population_size, size=count) % pressure
+        if pressure > 1:
+            same = rank1 == rank2
+            rank2[same] = (rank2[same] + rng.integers(1, pressure, size=int(same.sum()))) % pressure
+        return order[rank1], order[rank2]
+
+    @staticmethod
+    def byte_crossover(genes1: np.ndarray, genes2: np.ndarray, crossover_rate: float, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """One-point crossover inside every rule, each rule crossed with ``crossover_rate``."""
+        count, num_rules, rule_length = genes1.shape
+        cut = rng.integers(1, rule_length, size=(count, num_rules, 1))
+        crossed = rng.random((count, num_rules, 1)) < crossover_rate
+        take_second = crossed & (np.arange(rule_length) >= cut)
+        return np.where(take_second, genes2, genes1), np.where(take_second, genes1, genes2)
+
+    @staticmethod
+    def mutate(genes: np.ndarray, mutation_rate: float, rng: np.random.Generator) -> np.ndarray:
+        """Invert whole genes (``255 - gene``, every bit flipped) with ``mutation_rate``, in place."""
+        mask = rng.random(genes.shape) < mutation_rate
+        np.bitwise_not(genes, out=genes, where=mask)
+        return genes
+
+    @staticmethod
+    def bit_flip(genes: np.ndarray, mutation_rate: float, rng: np.random.Generator) -> np.ndarray:
+        """Flip single bits independently with ``mutation_rate``, in place."""
+        flips = np.packbits(rng.random(genes.shape + (8,)) < mutation_rate, axis=-1)[..., 0]
+        np.bitwise_xor(genes, flips, out=genes)
+        return genes
+
+    def next_generation(self,
+                        fitness: np.ndarray,
+                        rng: np.random.Generator,
+                        elite_size: int = 10,
+                        selection_pressure: int = 5,
+                        crossover_rate: float = 0.8,
+                        mutation_rate: float = 0.01,
+                        crossover: bool = True,
+                        surrogate = None) -> 'GenomePool':
+        """With a SurrogateFilter, ``surrogate.oversample`` times more children are
+        bred and only the most promising by its prediction are kept."""
+        population_size = len(self)
+        fitness = np.asarray(fitness)
+        order = np.argsort(-fitness, kind='stable')
+        num_children = population_size - elite_size
+        num_bred = num_children * surrogate.oversample if surrogate is not None and surrogate.active else num_children
+        parents1, parents2 = GenomePool.rank_select(fitness, num_bred, selection_pressure, rng)
+        if crossover:
+            children, _ = GenomePool.byte_crossover(self.genes[parents1], self.genes[parents2], crossover_rate, rng)
+        else:
+            children = self.genes[parents1]
+        GenomePool.mutate(children, mutation_rate, rng)
+        if num_bred > num_children:
+            children = children[surrogate.screen(children, num_children)]
+        return GenomePool(np.concatenate((self.genes[order[:elite_size]], children)))
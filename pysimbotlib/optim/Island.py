@@ -0,0 +1,262 @@
+#!/usr/bin/python3
+
+import copy
+import os
+import queue
+import random
+import multiprocessing as mp
+from typing import Any, Callable, List, NamedTuple, Sequence, Tuple
+
+from kivy.logger import Logger
+
+from ..core.SharedWorld import SharedWorld
+from ..core.Headless import create_simbot, create_shared_world, run_simulation
+from .Racing import RacingEvaluator
+from .MultiSeed import MultiSeedEvaluator
+
+Genome = Any
+
+# seconds between liveness checks of the island processes while waiting for results
+POLL_INTERVAL = 5.0
+
+class IslandResult(NamedTuple):
+    island: int
+    best_genome: Genome
+    best_fitness: float
+    best_fitness_values: List[float]
+    avg_fitness_values: List[float]
+    ticks_saved: int = 0
+
+def rank_select(ranked: Sequence[Genome], selection_pressure: int) -> Genome:
+    # same scheme as assignment_3: pick uniformly among the best `selection_pressure`
+    return ranked[random.randrange(len(ranked)) % selection_pressure]
+
+def _excluding(ranked: Sequence[Genome], genome: Genome, selection_pressure: int) -> Tuple[List[Genome], int]:
+    # ranked without ``genome`` and the pressure that keeps the same best genomes
+    # in reach, so the second parent is drawn among the others like Genome.rank_select
+    index = next((i for i, g in enumerate(ranked) if g is genome), None)
+    if index is None or len(ranked) < 2 or selection_pressure < 2:
+        return list(ranked), selection_pressure
+    others = list(ranked[:index]) + list(ranked[index + 1:])
+    return others, selection_pressure - 1 if index < selection_pressure else selection_pressure
+
+class _Island:
+
+    def __init__(self, island_id: int, runner: 'IslandRunner', world: SharedWorld, inbox, outbox, results):
+        self.island_id = island_id
+        self.runner = runner
+        self.world = world
+        self.inbox = inbox
+        self.outbox = outbox
+        self.results = results
+        self.racing = None
+        self.multi_seed = None
+        self.ticks_saved = 0
+
+    def evaluate(self, simbot, genomes: Sequence[Genome], generation: int = 0) -> List[float]:
+        runner = self.runner
+        if self.multi_seed is not None:
+            # one shared seed set per generation (common random numbers), rotated between generations
+            offset = generation * len(runner.evaluation_seeds)
+            return self.multi_seed(genomes, [seed + offset for seed in runner.evaluation_seeds])
+        if self.racing is not None:
+            # elites sit at the front of every bred population; never race them out.
+            # The first population is random, so there is nothing to protect yet.
+            protected = range(runner.elite_size) if generation > 0 else ()
+            result = self.racing.evaluate(genomes, protected=protected)
+            self.ticks_saved += result.ticks_saved
+            return result.scores.tolist()
+        robots = []
+        for genome in genomes:
+            robot = runner.robot_cls()
+            setattr(robot, runner.genome_attr, genome)
+            robots.append(robot)
+        run_simulation(simbot, robots=robots)
+        return [runner.fitness_fn(simbot, robot) for robot in robots]
+
+    def migrate(self, ranked: List[Genome]) -> List[Genome]:
+        runner = self.runner
+        self.outbox.put(copy.deepcopy(ranked[:runner.num_migrants]))
+        try:
+            return list(self.inbox.get(timeout=runner.migration_timeout))
+        except queue.Empty:
+            Logger.warning("Island: %d got no migrants, continuing without them", self.island_id)
+            return []
+
+    def breed(self, ranked: List[Genome]) -> List[Genome]:
+        runner = self.runner
+        population = [copy.deepcopy(g) for g in ranked[:runner.elite_size]]
+        while len(population) < runner.population_size:
+            parent1 = runner.select_fn(ranked, runner.selection_pressure)
+            parent2 = runner.select_fn(*_excluding(ranked, parent1, runner.selection_pressure))
+            child1, child2 = runner.crossover_fn(copy.deepcopy(parent1), copy.deepcopy(parent2))
+            population.append(runner.mutation_fn(child1))
+            if len(population) < runner.population_size:
+                population.append(runner.mutation_fn(child2))
+        return population
+
+    def run(self) -> IslandResult:
+        runner = self.runner
+        if runner.seed is not None:
+            random.seed(runner.seed + self.island_id)
+        simbot = create_simbot(robot_cls=runner.robot_cls, shared_world=self.world, **runner.simbot_kwargs)
+        if runner.racing_horizons:
+            self.racing = RacingEvaluator(runner.robot_cls,
+                                        horizons=runner.racing_horizons,
+                                        keep_fraction=runner.racing_keep_fraction,
+                                        fitness_fn=runner.fitness_fn,
+                                        genome_attr=runner.genome_attr,
+                                        simbot=simbot)
+        if runner.evaluation_seeds:
+            self.multi_seed = MultiSeedEvaluator(runner.robot_cls,
+                                        runner.fitness_fn,
+                                        seeds=runner.evaluation_seeds,
+                                        min_seeds=runner.min_seeds,
+                                        elite_size=runner.elite_size,
+                                        genome_attr=runner.genome_attr,
+                                        simbot=simbot)
+        population = [runner.init_fn() for _ in range(runner.population_size)]
+        best_values, avg_values = [], []
+        best_genome, best_fitness = None, float('-inf')
+
+        for generation in range(runner.generations):
+            fitness = self.evaluate(simbot, population, generation)
+            order = sorted(range(len(population)), key=lambda i: fitness[i], reverse=True)
+            ranked = [population[i] for i in order]
+            best_values.append(fitness[order[0]])
+            avg_values.append(sum(fitness) / len(fitness))
+            if fitness[order[0]] > best_fitness:
+                best_fitness = fitness[order[0]]
+                best_genome = copy.deepcopy(ranked[0])
+            self.results.put(('generation', self.island_id, generation, best_values[-1], avg_values[-1]))
+
+            if generation == runner.generations - 1:
+                break
+            migrants = []
+            if runner.num_islands > 1 and (generation + 1) % runner.migration_interval == 0:
+                migrants = self.migrate(ranked)
+            population = self.breed(ranked)
+            if migrants:
+                # migrants take the place of the last children and get evaluated next generation
+                population[len(population) - len(migrants):] = migrants
+
+        return IslandResult(self.island_id, best_genome, best_fitness, best_values, avg_values, self.ticks_saved)
+
+def _island_main(island_id, runner, world_spec, inbox, outbox, results):
+    try:
+        world = SharedWorld.attach(world_spec)
+        results.put(('done', island_id, _Island(island_id, runner, world, inbox, outbox, results).run()))
+    except Exception as e:
+        results.put(('error', island_id, repr(e)))
+        raise
+
+class IslandRunner:
+    """Island-model GA: one headless population per process, ring migration.
+
+    Every ``migration_interval`` generations each island sends copies of its
+    ``num_migrants`` best genomes to the next island, and the genomes it receives
+    take the place of its last children in the next generation. Genomes are whatever ``init_fn``
+    returns; they are assigned to ``robot.<genome_attr>`` before evaluation, and
+    ``crossover_fn(g1, g2) -> (c1, c2)`` / ``mutation_fn(g) -> g`` are applied
+    to them unchanged, so the assignment operators plug in as they are.
+
+    Everything handed to the runner must be picklable (module-level functions
+    and classes).
+    """
+
+    def __init__(self,
+                robot_cls,
+                init_fn: Callable[[], Genome],
+                fitness_fn: Callable[[Any, Any], float],
+                crossover_fn: Callable[[Genome, Genome], Tuple[Genome, Genome]],
+                mutation_fn: Callable[[Genome], Genome],
+                select_fn: Callable[[Sequence[Genome], int], Genome] = rank_select,
+                genome_attr = 'RULES',
+                num_islands = None,
+                population_size = 100,
+                generations = 100,
+                elite_size = 10,
+                selection_pressure = 5,
+                migration_interval = 10,
+                num_migrants = 2,
+                migration_timeout = 600,
+                seed = None,
+                racing_horizons = None,
+                racing_keep_fraction = 0.5,
+                evaluation_seeds = None,
+                min_seeds = 3,
+                **simbot_kwargs):
+        self.robot_cls = robot_cls
+        self.init_fn = init_fn
+        self.fitness_fn = fitness_fn
+        self.crossover_fn = crossover_fn
+        self.mutation_fn = mutation_fn
+        self.select_fn = select_fn
+        self.genome_attr = genome_attr
+        self.num_islands = num_islands or os.cpu_count() or 1
+        self.population_size = population_size
+        self.generations = generations
+        self.elite_size = elite_size
+        self.selection_pressure = selection_pressure
+        self.migration_interval = migration_interval
+        self.num_migrants = num_migrants
+        self.migration_timeout = migration_timeout
+        self.seed = seed
+        # successive-halving evaluation, e.g. (100, 300, 1000); None runs every genome in full
+        self.racing_horizons = racing_horizons
+        self.racing_keep_fraction = racing_keep_fraction
+        # multi-seed evaluation with confidence-based stopping, e.g. range(8)
+        self.evaluation_seeds = list(evaluation_seeds) if evaluation_seeds else None
+        self.min_seeds = min_seeds
+        if self.racing_horizons and self.evaluation_seeds:
+            raise ValueError("racing_horizons and evaluation_seeds cannot be combined")
+        self.simbot_kwargs = simbot_kwargs
+        self.simbot_kwargs.setdefault('num_robots', population_size)
+
+    def run(self, on_generation: Callable[[int, int, float, float], None] = None) -> List[IslandResult]:
+        ctx = mp.get_context()
+        inboxes = [ctx.Queue() for _ in range(self.num_islands)]
+        results = ctx.Queue()
+        # every island simulates the same map; build it once and share it
+        world = create_shared_world(self.simbot_kwargs.get('map', 'default'))
+        processes = []
+        finished = {}
+        try:
+            for i in range(self.num_islands):
+                p = ctx.Process(target=_island_main,
+                                args=(i, self, world.spec, inboxes[i], inboxes[(i + 1) % self.num_islands], results),
+                                daemon=True)
+                p.start()
+                processes.append(p)
+
+            # an island killed from outside (OOM, segfault) never reports; after it is
+            # seen dead, give its last messages one more poll before giving up
+            dead = set()
+            while len(finished) < self.num_islands:
+                try:
+                    message = results.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    for i, p in enumerate(processes):
+                        if i in finished or p.is_alive():
+                            continue
+                        if i in dead:
+                            raise RuntimeError("Island {} died with exit code {}".format(i, p.exitcode))
+                        dead.add(i)
+                    continue
+                if message[0] == 'generation':
+                    _, island, generation, best, avg = message
+                    Logger.info("Island: %d generation %d - Best: %.2f, Avg: %.2f", island, generation, best, avg)
+                    if on_generation:
+                        on_generation(island, generation, best, avg)
+                elif message[0] == 'done':
+                    finished[message[1]] = message[2]
+                else:
+                    raise RuntimeError("Island {} failed: {}".format(message[1], message[2]))
+        finally:
+            for p in processes:
+                if p.is_alive() and len(finished) < self.num_islands:
+                    p.terminate()
+                p.join()
+            world.close()
+            world.unlink()
+        return [finished[i] for i in range(self.num_islands)]
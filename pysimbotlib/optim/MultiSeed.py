@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+
+import random
+from statistics import NormalDist
+from typing import Any, Callable, List, NamedTuple, Sequence
+
+import numpy as np
+
+from ..core.Headless import create_simbot, run_simulation
+
+class MultiSeedResult(NamedTuple):
+    mean: np.ndarray        # mean fitness over the seeds each genome received
+    stderr: np.ndarray
+    num_seeds: np.ndarray
+    ranking: List[int]      # genome indices, best first
+    rollouts: int           # genome-rollouts actually simulated
+    rollouts_saved: int     # versus every genome on every seed
+
+class MultiSeedEvaluator:
+    """Scores genomes over a batch of seeds with common random numbers.
+
+    Every seed is one headless simulation shared by all genomes still being
+    evaluated, so they all see the same food and spawn positions. After
+    ``min_seeds`` a genome stops receiving seeds once the confidence interval of
+    its paired difference to the elite cutoff genome (the ``elite_size``-th best
+    by mean) is entirely above or below zero.
+
+    Rollouts are exactly paired when robots do not interact, i.e. with
+    ``food_move_after_eat=False`` and ``robot_see_each_other=False``.
+    """
+
+    def __init__(self,
+                robot_cls,
+                fitness_fn: Callable[[Any, Any], float],
+                seeds: Sequence[int] = tuple(range(8)),
+                min_seeds = 3,
+                confidence = 0.95,
+                elite_size = 10,
+                genome_attr = 'RULES',
+                simbot = None,
+                **simbot_kwargs):
+        if min_seeds < 2:
+            raise ValueError(F"min_seeds must be at least 2 to estimate a confidence interval, got {min_seeds}")
+        self.robot_cls = robot_cls
+        self.fitness_fn = fitness_fn
+        self.seeds = list(seeds)
+        self.min_seeds = min_seeds
+        self.z = NormalDist().inv_cdf(0.5 + 0.5 * confidence)
+        self.elite_size = elite_size
+        self.genome_attr = genome_attr
+        simbot_kwargs.setdefault('food_move_after_eat', False)
+        self.simbot = simbot or create_simbot(robot_cls=robot_cls, **simbot_kwargs)
+
+    def rollout(self, genomes: Sequence, seed: int) -> List[float]:
+        random.seed(seed)
+        robots = []
+        for genome in genomes:
+            robot = self.robot_cls()
+            setattr(robot, self.genome_attr, genome)
+            robots.append(robot)
+        run_simulation(self.simbot, robots=robots)
+        return [self.fitness_fn(self.simbot, robot) for robot in robots]
+
+    def evaluate(self, genomes: Sequence, seeds: Sequence[int] = None) -> MultiSeedResult:
+        seeds = self.seeds if seeds is None else list(seeds)
+        count = len(genomes)
+        samples = np.full((count, len(seeds)), np.nan)
+        active = list(range(count))
+        rollouts = 0
+
+        for k, seed in enumerate(seeds):
+            samples[active, k] = self.rollout([genomes[i] for i in active], seed)
+            rollouts += len(active)
+            if k + 1 < self.min_seeds or k + 1 == len(seeds):
+                continue
+            active = self._still_uncertain(samples, active)
+            if not active:
+                break
+
+        mean = np.nanmean(samples, axis=1)
+        num_seeds = np.sum(~np.isnan(samples), axis=1)
+        std = np.nanstd(samples, axis=1, ddof=1) if len(seeds) > 1 else np.zeros(count)
+        stderr = np.where(num_seeds > 1, std / np.sqrt(np.maximum(num_seeds, 1)), np.inf)
+        ranking = sorted(range(count), key=lambda i: (-mean[i], i))
+        return MultiSeedResult(mean, stderr, num_seeds, ranking, rollouts, count * len(seeds) - rollouts)
+
+    def _still_uncertain(self, samples: np.ndarray, active: List[int]) -> List[int]:
+        mean = np.nanmean(samples, axis=1)
+        order = np.argsort(-mean, kind='stable')
+        cutoff = order[min(self.elite_size, len(order)) - 1]
+        remaining = []
+        for i in active:
+            if i == cutoff:
+                remaining.append(i)
+                continue
+            # paired over the seeds both genomes have seen: that is where CRN pays off
+            common = ~np.isnan(samples[i]) & ~np.isnan(samples[cutoff])
+            diff = samples[i, common] - samples[cutoff, common]
+            if len(diff) < self.min_seeds:
+                remaining.append(i)
+                continue
+            half_width = self.z * diff.std(ddof=1) / np.sqrt(len(diff))
+            if abs(diff.mean()) <= half_width:
+                remaining.append(i)
+        return remaining
+
+    def __call__(self, genomes: Sequence, seeds: Sequence[int] = None) -> List[float]:
+        return self.evaluate(genomes, seeds).mean.tolist()
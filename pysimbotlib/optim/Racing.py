@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+
+import math
+import random
+from typing import Any, Callable, Iterable, List, NamedTuple, Sequence
+
+import numpy as np
+
+from ..core.Geom import Geom
+from ..core.Headless import create_simbot, run_simulation
+
+def partial_fitness(simbot, robot) -> float:
+    """Cheap progress score: food eaten first, then collisions and distance to the nearest food."""
+    food_distance = min((Geom.distance(robot.center, obj.center) for obj in simbot.objectives), default=0.0)
+    return 1000.0 * robot.eat_count - robot.collision_count - food_distance
+
+class RacingResult(NamedTuple):
+    ranking: List[int]      # genome indices, best first
+    fitness: np.ndarray     # full fitness for finalists, partial fitness at elimination for the rest
+    scores: np.ndarray      # fitness shifted so that sorting by it reproduces `ranking`
+    ticks: np.ndarray       # ticks each genome was simulated for
+    ticks_used: int
+    ticks_saved: int
+
+class RacingEvaluator:
+    """Successive-halving evaluation of a population in one headless simulation.
+
+    All genomes start together; at every horizon but the last, only the best
+    ``keep_fraction`` by ``partial_fitness_fn`` keep running and the rest are
+    frozen where they are. Finalists are scored with ``fitness_fn`` at the end
+    and always rank above genomes eliminated earlier, so the elites are ordered
+    by full-length evaluations only. Indices in ``protected`` (e.g. last
+    generation's elites) are never eliminated.
+    """
+
+    def __init__(self,
+                robot_cls,
+                horizons: Sequence[int] = (100, 300, 1000),
+                keep_fraction: float = 0.5,
+                min_survivors: int = 1,
+                partial_fitness_fn: Callable[[Any, Any], float] = partial_fitness,
+                fitness_fn: Callable[[Any, Any], float] = None,
+                genome_attr = 'RULES',
+                simbot = None,
+                **simbot_kwargs):
+        if list(horizons) != sorted(horizons) or not horizons:
+            raise ValueError(F"Horizons must be a non-empty increasing sequence, got {horizons}")
+        self.robot_cls = robot_cls
+        self.horizons = list(horizons)
+        self.keep_fraction = keep_fraction
+        self.min_survivors = min_survivors
+        self.partial_fitness_fn = partial_fitness_fn
+        self.fitness_fn = fitness_fn or partial_fitness_fn
+        self.genome_attr = genome_attr
+        simbot_kwargs['max_tick'] = self.horizons[-1]
+        self.simbot = simbot or create_simbot(robot_cls=robot_cls, **simbot_kwargs)
+        self.simbot.max_tick = self.horizons[-1]
+
+    def evaluate(self, genomes: Sequence, seed: int = None, protected: Iterable[int] = ()) -> RacingResult:
+        if seed is not None:
+            random.seed(seed)
+        simbot = self.simbot
+        robots = []
+        for genome in genomes:
+            robot = self.robot_cls()
+            setattr(robot, self.genome_attr, genome)
+            robots.append(robot)
+
+        count = len(robots)
+        protected = set(protected)
+        alive = list(range(count))
+        fitness = np.zeros(count)
+        ticks = np.zeros(count, dtype=np.int64)
+        eliminated = []     # groups of indices, earliest elimination first
+
+        for stage, horizon in enumerate(self.horizons):
+            run_simulation(simbot, robots=robots if stage == 0 else None, until=horizon)
+            if stage == len(self.horizons) - 1 or simbot.finished:
+                break
+            scores = {i: self.partial_fitness_fn(simbot, robots[i]) for i in alive}
+            keep = max(self.min_survivors, math.ceil(len(alive) * self.keep_fraction))
+            order = sorted(alive, key=lambda i: (i not in protected, -scores[i], i))
+            alive, dropped = sorted(order[:keep]), order[keep:]
+            for i in dropped:
+                robots[i].freeze()
+                fitness[i] = scores[i]
+                ticks[i] = simbot.iteration
+            eliminated.append(dropped)
+
+        for i in alive:
+            fitness[i] = self.fitness_fn(simbot, robots[i])
+            ticks[i] = simbot.iteration
+
+        groups = [sorted(alive, key=lambda i: (-fitness[i], i))] + [sorted(g, key=lambda i: (-fitness[i], i)) for g in reversed(eliminated)]
+        ranking = [i for group in groups for i in group]
+        scores = fitness.copy()
+        floor = None
+        for group in groups:
+            if not group:
+                continue
+            if floor is not None:
+                shift = min(0.0, floor - 1.0 - fitness[group[0]])
+                scores[group] += shift
+            floor = scores[group[-1]]
+
+        full_cost = count * self.horizons[-1]
+        ticks_used = int(ticks.sum())
+        return RacingResult(ranking, fitness, scores, ticks, ticks_used, full_cost - ticks_used)
+
+    def __call__(self, genomes: Sequence, seed: int = None) -> List[float]:
+        return self.evaluate(genomes, seed).scores.tolist()
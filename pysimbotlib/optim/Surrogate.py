@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+
+from typing import List
+
+import numpy as np
+from kivy.logger import Logger
+
+def rank_correlation(a: np.ndarray, b: np.ndarray) -> float:
+    """Spearman correlation (ties broken by order), 0 when either side is constant."""
+    ra = np.argsort(np.argsort(a, kind='stable'), kind='stable').astype(np.float64)
+    rb = np.argsort(np.argsort(b, kind='stable'), kind='stable').astype(np.float64)
+    if np.ptp(a) == 0 or np.ptp(b) == 0:
+        return 0.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+class SurrogateFilter:
+    """k-nearest-neighbour fitness predictor that screens oversized offspring pools.
+
+    Every evaluated (genome, fitness) pair goes into an archive. ``screen``
+    predicts the fitness of candidate genomes from the ``k`` archived genomes
+    with the fewest differing genes and keeps the best ones for simulation.
+
+    Before new pairs are archived, ``record`` predicts the ones not seen yet and
+    measures the rank correlation with their real fitness. While the mean of
+    the last ``window`` correlations stays below ``min_correlation`` the filter
+    backs off: ``screen`` keeps the first candidates unscored, as if there were
+    no surrogate, until the predictions track the simulation again.
+    """
+
+    def __init__(self,
+                oversample: int = 3,
+                k: int = 5,
+                min_archive: int = 50,
+                max_archive: int = 5000,
+                min_correlation: float = 0.3,
+                window: int = 3,
+                chunk_size: int = 64):
+        if oversample < 1:
+            raise ValueError(F"oversample must be at least 1, got {oversample}")
+        self.oversample = oversample
+        self.k = k
+        self.min_archive = min_archive
+        self.max_archive = max_archive
+        self.min_correlation = min_correlation
+        self.window = window
+        self.chunk_size = chunk_size
+        self.archive_genes = None
+        self.archive_fitness = np.empty(0)
+        self.correlations: List[float] = []
+        self.screened = 0
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.archive_fitness)
+
+    @property
+    def active(self) -> bool:
+        if len(self) < self.min_archive:
+            return False
+        recent = self.correlations[-self.window:]
+        return not recent or float(np.mean(recent)) >= self.min_correlation
+
+    def _distances(self, genes: np.ndarray) -> np.ndarray:
+        # number of differing genes; chunked so the (chunk, archive, genes) mask stays small
+        genes = genes.reshape(len(genes), -1)
+        distances = np.empty((len(genes), len(self)), dtype=np.int32)
+        for start in range(0, len(genes), self.chunk_size):
+            chunk = genes[start:start + self.chunk_size]
+            distances[start:start + len(chunk)] = (chunk[:, None, :] != self.archive_genes[None, :, :]).sum(axis=2)
+        return distances
+
+    def predict(self, genes: np.ndarray) -> np.ndarray:
+        if not len(self):
+            return np.zeros(len(genes))
+        distances = self._distances(genes)
+        k = min(self.k, len(self))
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        d = np.take_along_axis(distances, nearest, axis=1).astype(np.float64)
+        weights = 1.0 / (d + 1.0)
+        return (weights * self.archive_fitness[nearest]).sum(axis=1) / weights.sum(axis=1)
+
+    def record(self, genes: np.ndarray, fitness: np.ndarray) -> None:
+        flat = genes.reshape(len(genes), -1)
+        fitness = np.asarray(fitness, dtype=np.float64)
+        if len(self) >= self.min_archive:
+            # only genomes the archive has never seen tell how well it generalizes
+            novel = self._distances(flat).min(axis=1) > 0
+            if novel.sum() >= 3:
+                was_active = self.active
+                self.correlations.append(rank_correlation(self.predict(flat[novel]), fitness[novel]))
+                if was_active != self.active:
+                    Logger.info("Surrogate: %s (rank correlation %.2f)", "enabled" if self.active else "backing off", self.correlations[-1])
+        if self.archive_genes is None:
+            self.archive_genes = flat.copy()
+        else:
+            self.archive_genes = np.concatenate((self.archive_genes, flat))[-self.max_archive:]
+        self.archive_fitness = np.concatenate((self.archive_fitness, fitness))[-self.max_archive:]
+
+    def screen(self, candidates: np.ndarray, count: int) -> np.ndarray:
+        """Indices of the ``count`` candidates to simulate."""
+        if not self.active or count >= len(candidates):
+            return np.arange(min(count, len(candidates)))
+        predicted = self.predict(candidates)
+        self.screened += count
+        self.skipped += len(candidates) - count
+        return np.sort(np.argsort(-predicted, kind='stable')[:count])
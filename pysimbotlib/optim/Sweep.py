@@ -0,0 +1,222 @@
+#!/usr/bin/python3
+
+import os
+import json
+import random
+import hashlib
+import itertools
+import multiprocessing as mp
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+import numpy as np
+from kivy.logger import Logger
+
+from ..core.Events import EventType
+from ..core.MapGen import GeneratedMap
+from ..core.Headless import create_simbot, create_shared_world, init_worker, worker_world, run_simulation
+
+Params = Dict[str, Any]
+
+def grid(**axes: Sequence) -> List[Params]:
+    """Every combination of the listed values, e.g. ``grid(obstacle_threshold=[8, 12, 16])``."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+def random_space(count: int, seed: int = None, **axes) -> List[Params]:
+    """``count`` random configurations.
+
+    An axis given as a (low, high) tuple is sampled uniformly (as integers when
+    both bounds are ints); a list is sampled as a choice.
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(count):
+        params = {}
+        for name, axis in axes.items():
+            if isinstance(axis, tuple) and len(axis) == 2:
+                low, high = axis
+                params[name] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(axis))
+        configs.append(params)
+    return configs
+
+class SweepResult(NamedTuple):
+    params: Params
+    eat_rate: float             # food eaten per robot per 1000 ticks, averaged over seeds
+    collisions: float           # collisions per robot, averaged over seeds
+    ticks_to_first_eat: float   # mean over seeds; max_tick when nothing was eaten
+    seeds: int
+
+def _stable(value) -> Any:
+    """JSON-ready form of ``value`` that is the same in every process and run."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _stable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_stable(v) for v in value]
+    if isinstance(value, GeneratedMap):
+        # the name alone could be reused for another layout
+        digest = hashlib.sha1(np.ascontiguousarray(value.obstacles, dtype=np.float64).tobytes()).hexdigest()
+        return ['GeneratedMap', value.name, list(value.world_size), digest]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, type) or callable(value) and hasattr(value, '__qualname__'):
+        return F"{value.__module__}.{value.__qualname__}"
+    if hasattr(value, '__dict__'):
+        # e.g. termination predicates: their settings, not their running counters
+        settings = {k: v for k, v in vars(value).items() if not k.startswith('_')}
+        return [F"{type(value).__module__}.{type(value).__qualname__}", _stable(settings)]
+    return repr(value)
+
+def _cache_key(robot_cls, params: Params, seed: int, map, num_robots: int, max_tick: int, simbot_kwargs: Params = None) -> str:
+    return json.dumps(_stable([robot_cls, params, seed, map, num_robots, max_tick, simbot_kwargs or {}]), sort_keys=True)
+
+_simbots = {}
+
+def _run_configuration(task: Dict) -> Dict:
+    # the map is the pool's SharedWorld, so only the robot count varies per worker
+    key = task['num_robots']
+    if key not in _simbots:
+        _simbots[key] = create_simbot(num_robots=task['num_robots'], shared_world=worker_world(), **task['simbot_kwargs'])
+    simbot = _simbots[key]
+    simbot.max_tick = task['max_tick']
+
+    random.seed(task['seed'])
+    np.random.seed(task['seed'] % (2 ** 32))
+    robots = []
+    for _ in range(task['num_robots']):
+        robot = task['robot_cls']()
+        for name, value in task['params'].items():
+            setattr(robot, name, value)
+        robots.append(robot)
+
+    first_eat = []
+    def on_eat(event):
+        if not first_eat:
+            first_eat.append(event.tick)
+    simbot.events.subscribe(on_eat, kinds=(EventType.EAT,))
+    try:
+        run_simulation(simbot, robots=robots)
+    finally:
+        simbot.events.unsubscribe(on_eat)
+
+    return {
+        'key': task['key'],
+        'index': task['index'],
+        'ticks': simbot.iteration,
+        'eat_count': sum(r.eat_count for r in robots),
+        'collision_count': sum(r.collision_count for r in robots),
+        'first_eat': first_eat[0] if first_eat else task['max_tick'],
+    }
+
+class ParameterSweep:
+    """Runs every configuration of a controller headless over a seed set in a process pool.
+
+    Configurations are plain dicts set as attributes on each robot after it is
+    constructed, so constructor defaults (e.g. ``RobotController`` thresholds)
+    are overridden. Every (params, seed, map) run is appended to ``cache_path``
+    as one JSON line and skipped by later sweeps. ``run`` logs the ranked
+    table each time a configuration has all its seeds.
+    """
+
+    def __init__(self,
+                robot_cls,
+                seeds: Sequence[int] = tuple(range(4)),
+                num_robots = 1,
+                max_tick = 2000,
+                map = 'default',
+                processes = None,
+                cache_path: str = None,
+                rank_key: Callable[[SweepResult], Any] = None,
+                **simbot_kwargs):
+        self.robot_cls = robot_cls
+        self.seeds = list(seeds)
+        self.num_robots = num_robots
+        self.max_tick = max_tick
+        self.map = map
+        self.processes = processes
+        self.cache_path = cache_path
+        # best first: eat more, then collide less, then eat sooner
+        self.rank_key = rank_key or (lambda r: (-r.eat_rate, r.collisions, r.ticks_to_first_eat))
+        self.simbot_kwargs = simbot_kwargs
+        self.cache: Dict[str, Dict] = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as in_file:
+                for line in in_file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.cache[entry['key']] = entry
+
+    def _summarize(self, params: Params, runs: List[Dict]) -> SweepResult:
+        robots = max(self.num_robots, 1)
+        eat_rate = np.mean([1000.0 * run['eat_count'] / (robots * max(run['ticks'], 1)) for run in runs])
+        collisions = np.mean([run['collision_count'] / robots for run in runs])
+        first_eat = np.mean([run['first_eat'] for run in runs])
+        return SweepResult(params, float(eat_rate), float(collisions), float(first_eat), len(runs))
+
+    def rank(self, results: Iterable[SweepResult]) -> List[SweepResult]:
+        return sorted(results, key=self.rank_key)
+
+    def iter_results(self, configs: Sequence[Params]) -> Iterator[SweepResult]:
+        """Yield each configuration's result as soon as all its seeds are done."""
+        configs = [dict(params) for params in configs]
+        runs = [[] for _ in configs]
+        tasks = []
+        for index, params in enumerate(configs):
+            for seed in self.seeds:
+                key = _cache_key(self.robot_cls, params, seed, self.map, self.num_robots, self.max_tick, self.simbot_kwargs)
+                if key in self.cache:
+                    runs[index].append(self.cache[key])
+                else:
+                    tasks.append({
+                        'key': key,
+                        'index': index,
+                        'robot_cls': self.robot_cls,
+                        'params': params,
+                        'seed': seed,
+                        'num_robots': self.num_robots,
+                        'max_tick': self.max_tick,
+                        'simbot_kwargs': self.simbot_kwargs,
+                    })
+        for index, params in enumerate(configs):
+            if len(runs[index]) == len(self.seeds):
+                yield self._summarize(params, runs[index])
+        if not tasks:
+            return
+
+        cache_file = open(self.cache_path, 'a') if self.cache_path else None
+        try:
+            with create_shared_world(self.map) as world, \
+                    mp.get_context().Pool(self.processes, initializer=init_worker, initargs=(world.spec,)) as pool:
+                for run in pool.imap_unordered(_run_configuration, tasks):
+                    self.cache[run['key']] = run
+                    if cache_file:
+                        cache_file.write(json.dumps(run) + '\n')
+                        cache_file.flush()
+                    index = run['index']
+                    runs[index].append(run)
+                    if len(runs[index]) == len(self.seeds):
+                        yield self._summarize(configs[index], runs[index])
+        finally:
+            if cache_file:
+                cache_file.close()
+
+    def run(self, configs: Sequence[Params], on_update: Callable[[List[SweepResult]], None] = None, top: int = 10) -> List[SweepResult]:
+        results = []
+        for result in self.iter_results(configs):
+            results.append(result)
+            ranked = self.rank(results)
+            if on_update:
+                on_update(ranked)
+            Logger.info("Sweep: %d/%d configurations\n%s", len(results), len(configs), format_table(ranked, top))
+        return self.rank(results)
+
+def format_table(ranked: Sequence[SweepResult], top: int = 10) -> str:
+    lines = ['%4s  %9s  %10s  %10s  %s' % ('rank', 'eat/1000t', 'collisions', 'first eat', 'params')]
+    for i, result in enumerate(ranked[:top]):
+        lines.append('%4d  %9.2f  %10.1f  %10.0f  %s' % (i + 1, result.eat_rate, result.collisions, result.ticks_to_first_eat, result.params))
+    return '\n'.join(lines)
@@ -0,0 +1,8 @@
+from .Island import IslandRunner, IslandResult, rank_select
+from .Genome import GenomePool
+from .Checkpoint import GACheckpoint, CheckpointWriter
+from .Racing import RacingEvaluator, RacingResult, partial_fitness
+from .MultiSeed import MultiSeedEvaluator, MultiSeedResult
+from .Sweep import ParameterSweep, SweepResult, grid, random_space, format_table
+from .Surrogate import SurrogateFilter, rank_correlation
+from .ES import OpenAIES, CMAES, BatchEvaluator, ESResult, optimize, centered_ranks
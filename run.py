@@ -6,17 +6,20 @@ Task: Implement reactive control for robot navigation through obstacles to reach
 Strategy: Environment-aware navigation with strategic smell control.
 """
 
-import os, platform
+import os, sys, platform
 if platform.system() == "Linux" or platform.system() == "Darwin":
     os.environ["KIVY_VIDEO"] = "ffpyplayer"
     
-from pysimbotlib.core import PySimbotApp, Robot
-from kivy.logger import Logger
+from pysimbotlib.core import Robot, Telemetry
+from pysimbotlib.optim import ParameterSweep, grid, format_table
 from kivy.config import Config
+from kivy.logger import Logger
 
 # Configure logging level
 Config.set('kivy', 'log_level', 'info')
 
+IR_LOG_FORMAT = "IR Sensors: [" + ", ".join(["%.1f"] * 8) + "]"
+
 class RobotController(Robot):
     """
     Smart Reactive Control with Environment-Aware Navigation
@@ -30,6 +33,9 @@ class RobotController(Robot):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         
+        # Rate-limited logging: each message is formatted at most once per second
+        self.telemetry = Telemetry(interval=1.0)
+        
         # Navigation thresholds
         self.obstacle_threshold = 12    # Distance to consider as obstacle
         
@@ -59,17 +65,17 @@ class RobotController(Robot):
         IR = self.distance()
         
         # Log sensor values for debugging
-        Logger.info(f"IR Sensors: {[round(x, 1) for x in IR]}")
+        self.telemetry.info(self, IR_LOG_FORMAT, *IR)
         
         # Environment detection and strategy selection
         if self.is_in_narrow_path(IR):
-            Logger.info("🚨 NARROW PATH - Smell DISABLED, focusing on escape")
+            self.telemetry.info(self, "🚨 NARROW PATH - Smell DISABLED, focusing on escape")
             self.escape_narrow_path(IR)
         elif self.is_in_open_area(IR):
-            Logger.info("🌤️ OPEN AREA - Smell ENABLED, full food seeking")
+            self.telemetry.info(self, "🌤️ OPEN AREA - Smell ENABLED, full food seeking")
             self.seek_food_in_open_area(IR)
         else:
-            Logger.info("🟡 MODERATE PATH - Balanced approach")
+            self.telemetry.info(self, "🟡 MODERATE PATH - Balanced approach")
             self.balanced_navigation(IR)
     
     def escape_narrow_path(self, IR):
@@ -77,7 +83,7 @@ class RobotController(Robot):
         front_clear = IR[0] > self.obstacle_threshold and IR[1] > self.obstacle_threshold and IR[7] > self.obstacle_threshold
         
         if front_clear:
-            Logger.info("Moving forward to escape narrow path")
+            self.telemetry.info(self, "Moving forward to escape narrow path")
             self.move(5)
         else:
             # Find wider side and turn toward it
@@ -85,16 +91,16 @@ class RobotController(Robot):
             right_space = min(IR[1], IR[2])
             
             if right_space > left_space:
-                Logger.info(f"Turning RIGHT {20}° toward wider space")
+                self.telemetry.info(self, "Turning RIGHT %d° toward wider space", 20)
                 self.turn(20)
             else:
-                Logger.info(f"Turning LEFT {20}° toward wider space")
+                self.telemetry.info(self, "Turning LEFT %d° toward wider space", 20)
                 self.turn(-20)
     
     def seek_food_in_open_area(self, IR):
         """Priority 2: Full food seeking in safe open areas"""
         food_direction = self.smell()
-        Logger.info(f"Food Direction: {round(food_direction, 1)}°")
+        self.telemetry.info(self, "Food Direction: %.1f°", food_direction)
         
         front_clear = IR[0] > self.obstacle_threshold and IR[1] > self.obstacle_threshold and IR[7] > self.obstacle_threshold
         
@@ -105,26 +111,26 @@ class RobotController(Robot):
             if self.food_seek_counter >= self.food_seek_interval:
                 if abs(food_direction) > 10:
                     if food_direction > 0:
-                        Logger.info(f"Periodic food seeking: Turning RIGHT {15}°")
+                        self.telemetry.info(self, "Periodic food seeking: Turning RIGHT %d°", 15)
                         self.move(-5)  # Back up before turn
                         self.turn(15)
                     else:
-                        Logger.info(f"Periodic food seeking: Turning LEFT {15}°")
+                        self.telemetry.info(self, "Periodic food seeking: Turning LEFT %d°", 15)
                         self.move(-5)  # Back up before turn
                         self.turn(-15)
                 self.food_seek_counter = 0
             
             # Move forward
-            Logger.info("Path clear - MOVING FORWARD")
+            self.telemetry.info(self, "Path clear - MOVING FORWARD")
             self.move(5)
             
             # Continuous course correction
             if abs(food_direction) > 5:
                 if food_direction > 0:
-                    Logger.info(f"Course correction: RIGHT {5}°")
+                    self.telemetry.info(self, "Course correction: RIGHT %d°", 5)
                     self.turn(5)
                 else:
-                    Logger.info(f"Course correction: LEFT {5}°")
+                    self.telemetry.info(self, "Course correction: LEFT %d°", 5)
                     self.turn(-5)
         else:
             self.avoid_obstacle(IR)
@@ -132,12 +138,12 @@ class RobotController(Robot):
     def balanced_navigation(self, IR):
         """Priority 3: Conservative navigation in moderate paths"""
         food_direction = self.smell()
-        Logger.info(f"Food Direction: {round(food_direction, 1)}°")
+        self.telemetry.info(self, "Food Direction: %.1f°", food_direction)
         
         front_clear = IR[0] > self.obstacle_threshold and IR[1] > self.obstacle_threshold and IR[7] > self.obstacle_threshold
         
         if front_clear:
-            Logger.info("Path clear - MOVING FORWARD")
+            self.telemetry.info(self, "Path clear - MOVING FORWARD")
             self.move(5)
             
             # Conservative food seeking
@@ -154,20 +160,37 @@ class RobotController(Robot):
         left_space = min(IR[6], IR[7])
         right_space = min(IR[1], IR[2])
         
-        Logger.info(f"Obstacle ahead! Right: {round(right_space, 1)}, Left: {round(left_space, 1)}")
+        self.telemetry.info(self, "Obstacle ahead! Right: %.1f, Left: %.1f", right_space, left_space)
         
         if right_space > left_space and right_space > self.obstacle_threshold:
-            Logger.info(f"Turning RIGHT {20}° - more space on right")
+            self.telemetry.info(self, "Turning RIGHT %d° - more space on right", 20)
             self.turn(20)
         elif left_space > right_space and left_space > self.obstacle_threshold:
-            Logger.info(f"Turning LEFT {20}° - more space on left")
+            self.telemetry.info(self, "Turning LEFT %d° - more space on left", 20)
             self.turn(-20)
         else:
-            Logger.info("Both sides blocked - BACKING UP and turning")
+            self.telemetry.info(self, "Both sides blocked - BACKING UP and turning")
             self.move(-5)
             self.turn(25)
 
+def sweep_thresholds():
+    """Rank threshold settings headless over a few seeds instead of watching the window"""
+    sweep = ParameterSweep(RobotController, seeds=range(4), max_tick=2000, cache_path="sweep_cache.jsonl")
+    configs = grid(
+        obstacle_threshold=[8, 12, 16],
+        narrow_path_threshold=[6, 10, 14],
+        open_area_threshold=[30, 40, 50],
+        food_seek_interval=[5, 10, 20],
+    )
+    Logger.info("Sweep: best configurations\n%s", format_table(sweep.run(configs), top=5))
+
 if __name__ == '__main__':
+    if '--sweep' in sys.argv:
+        sweep_thresholds()
+        sys.exit(0)
+
+    # App opens the window on import, so load it only here and not before the sweep forks
+    from pysimbotlib.core import PySimbotApp
     app = PySimbotApp(
         robot_cls=RobotController, 
         interval=1/50.0,  # Fast simulation
@@ -175,6 +198,3 @@ if __name__ == '__main__':
         simulation_forever=True
     )
     app.run()
-
-
-
@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip('kivy')
+
+from pysimbotlib.core import Robot, NoPoseChange
+from pysimbotlib.core.Headless import create_simbot, run_simulation
+from pysimbotlib.optim import partial_fitness
+
+MAX_TICK = 1000
+
+class WallPusher(Robot):
+    def update(self):
+        self.move(5)
+
+class Idle(Robot):
+    pass
+
+def _run(robot_cls, termination):
+    random.seed(0)
+    np.random.seed(0)
+    simbot = create_simbot(robot_cls=robot_cls, max_tick=MAX_TICK, food_move_after_eat=False, termination=termination)
+    robot = robot_cls()
+    run_simulation(simbot, robots=[robot])
+    return simbot, robot
+
+def test_wall_pusher_fitness_unchanged_by_no_pose_change():
+    baseline_simbot, baseline = _run(WallPusher, None)
+    simbot, robot = _run(WallPusher, [NoPoseChange(20)])
+    assert baseline.collision_count > 0
+    assert robot.collision_count == baseline.collision_count
+    assert partial_fitness(simbot, robot) == partial_fitness(baseline_simbot, baseline)
+
+def test_idle_robot_ends_early():
+    simbot, _ = _run(Idle, [NoPoseChange(20)])
+    assert simbot.termination_reason == NoPoseChange.reason
+    assert simbot.iteration < MAX_TICK